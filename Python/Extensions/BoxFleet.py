@@ -0,0 +1,216 @@
+# BoxFleet.py
+# Array-backed model of the sculpture's box fleet (state, actuators, locks).
+# NumPy ships with TouchDesigner; headless scripts need it installed in the venv.
+from types import MappingProxyType
+
+import numpy as np
+
+from transitions.core import MachineError
+
+# Per-box states, stored as int8 codes in BoxFleet.state_codes
+BOX_STATES = ('Misaligned', 'Aligned', 'Fault')
+MISALIGNED, ALIGNED, FAULT = 0, 1, 2
+
+# Per-box sub-machine (same dict format as the Maestro TRANSITIONS)
+BOX_TRANSITIONS = [
+    {'trigger': 'alignment_achieved', 'source': 'Misaligned', 'dest': 'Aligned'},
+    {'trigger': 'misalignment_detected', 'source': 'Aligned', 'dest': 'Misaligned'},
+    {'trigger': 'fault_detected', 'source': ['Misaligned', 'Aligned'], 'dest': 'Fault'},
+    {'trigger': 'fault_cleared', 'source': 'Fault', 'dest': 'Misaligned'},
+]
+
+DEFAULT_BOX_COUNT = 6
+
+
+class BoxMachineSpec:
+    """
+    Immutable compiled form of the per-box FSM, shared by every box.
+
+    The (state x trigger) table holds the destination state index, or -1 where
+    the trigger is invalid. One spec serves the whole fleet, so adding boxes
+    adds no state/event/callback dictionaries.
+    """
+
+    __slots__ = ('states', 'triggers', 'trigger_index', 'table')
+
+    def __init__(self, states, transitions):
+        triggers = tuple(dict.fromkeys(transition['trigger'] for transition in transitions))
+        state_index = {state: index for index, state in enumerate(states)}
+        table = [-1] * (len(states) * len(triggers))
+        for transition in transitions:
+            sources = transition['source']
+            for source in [sources] if isinstance(sources, str) else sources:
+                table[state_index[source] * len(triggers) + triggers.index(transition['trigger'])] = \
+                    state_index[transition['dest']]
+
+        object.__setattr__(self, 'states', tuple(states))
+        object.__setattr__(self, 'triggers', triggers)
+        object.__setattr__(self, 'trigger_index',
+                           MappingProxyType({trigger: index for index, trigger in enumerate(triggers)}))
+        object.__setattr__(self, 'table', tuple(table))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BoxMachineSpec is immutable.")
+
+    def dest(self, state_idx, trigger_idx):
+        return self.table[state_idx * len(self.triggers) + trigger_idx]
+
+
+BOX_SPEC = BoxMachineSpec(BOX_STATES, BOX_TRANSITIONS)
+
+
+class BoxFleet:
+    """
+    Holds every box as a row in parallel NumPy arrays instead of one Python
+    object per box, so bulk triggers are masked assignments whether there are
+    6 boxes or 500.
+
+    Per-state box counts are maintained incrementally: single-box transitions
+    adjust them on exit/enter and bulk triggers recount with one bincount, so
+    parent guards such as all_aligned() are O(1) reads. Listeners registered
+    in 'listeners' are notified with (box_id, source_code, dest_code) on every
+    single-box transition, and with (None, None, None) after a bulk change.
+
+    Box IDs are 1-based to match the curator/POST numbering ('LA 4', 'Box 6').
+    """
+
+    def __init__(self, count=DEFAULT_BOX_COUNT, spec=BOX_SPEC):
+        self.count = count
+        self.spec = spec
+        self.state_codes = np.full(count, MISALIGNED, dtype=np.int8)
+        self.actuator_position = np.zeros(count, dtype=np.float32)
+        self.rotation_angle = np.zeros(count, dtype=np.float32)
+        self.locked_at_max = np.zeros(count, dtype=bool)
+        self.box_ids = np.arange(1, count + 1)
+
+        self.state_counts = [0] * len(spec.states)
+        self.state_counts[MISALIGNED] = count
+        self.listeners = []
+
+    # --- 1. FLEET QUERIES ---
+
+    def all_aligned(self):
+        """True when every box is Aligned (incrementally maintained count, O(1))."""
+        return self.state_counts[ALIGNED] == self.count
+
+    def in_state(self, code):
+        """Boolean mask of boxes in the given state code."""
+        return self.state_codes == code
+
+    def box_ids_where(self, mask):
+        """1-based box IDs selected by a boolean mask."""
+        return self.box_ids[mask].tolist()
+
+    def box_state(self, box_id):
+        return BOX_STATES[self.state_codes[box_id - 1]]
+
+    # --- 2. SINGLE-BOX TRANSITIONS ---
+
+    def fire(self, index, trigger_idx):
+        """Runs one per-box trigger through the shared spec (raises MachineError if invalid)."""
+        source = int(self.state_codes[index])
+        dest = self.spec.dest(source, trigger_idx)
+        if dest < 0:
+            raise MachineError("Can't trigger event %s from state %s!"
+                               % (self.spec.triggers[trigger_idx], self.spec.states[source]))
+        # Exit/enter notifications keep the per-state counts current.
+        self.state_counts[source] -= 1
+        self.state_codes[index] = dest
+        self.state_counts[dest] += 1
+        for listener in self.listeners:
+            listener(index + 1, source, dest)
+        return True
+
+    # --- 3. BULK TRIGGERS ---
+
+    def recount(self):
+        """Recomputes the per-state counts after state_codes were written directly (bulk ops, restore)."""
+        self.state_counts = np.bincount(self.state_codes, minlength=len(self.spec.states)).tolist()
+        for listener in self.listeners:
+            listener(None, None, None)
+
+    def align_all(self, mask=None):
+        """Marks all boxes (or those in 'mask') Aligned. Faulted boxes are left alone."""
+        target = self.state_codes != FAULT
+        if mask is not None:
+            target &= mask
+        self.state_codes[target] = ALIGNED
+        self.recount()
+
+    def misalign(self, mask):
+        """Marks the masked, non-faulted boxes Misaligned."""
+        self.state_codes[mask & (self.state_codes != FAULT)] = MISALIGNED
+        self.recount()
+
+    def fault_mask(self, mask):
+        """Puts the masked boxes into Fault."""
+        self.state_codes[mask] = FAULT
+        self.recount()
+
+    def clear_faults(self, mask=None):
+        """Returns faulted boxes (optionally only those in 'mask') to Misaligned."""
+        target = self.state_codes == FAULT
+        if mask is not None:
+            target &= mask
+        self.state_codes[target] = MISALIGNED
+        self.recount()
+
+    def lock_set(self, mask):
+        """Locks the masked linear actuators at max, excluding them from linear movement."""
+        self.locked_at_max |= mask
+
+    def mask_for(self, box_ids):
+        """Boolean mask from an iterable of 1-based box IDs (ValueError outside 1..count)."""
+        ids = np.asarray(list(box_ids), dtype=np.intp)
+        if ids.size and (ids.min() < 1 or ids.max() > self.count):
+            raise ValueError(f"Box IDs must be in 1..{self.count}, got {ids.tolist()}.")
+        mask = np.zeros(self.count, dtype=bool)
+        mask[ids - 1] = True
+        return mask
+
+    # --- 4. PER-BOX SUB-MACHINES ---
+
+    def models(self):
+        """{box_id: BoxView} for code that addresses boxes individually."""
+        return {box_id: BoxView(self, box_id - 1) for box_id in range(1, self.count + 1)}
+
+
+class BoxView:
+    """
+    Per-box sub-machine handle. It stores only its row in the fleet; the state
+    index itself lives in BoxFleet.state_codes and the transition table in the
+    shared BoxMachineSpec. Trigger methods (alignment_achieved, ...) are
+    generated once on the class from BOX_SPEC.
+    """
+
+    __slots__ = ('fleet', 'index')
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def box_id(self):
+        return self.index + 1
+
+    @property
+    def box_state(self):
+        return BOX_STATES[self.fleet.state_codes[self.index]]
+
+    @property
+    def locked_at_max(self):
+        return bool(self.fleet.locked_at_max[self.index])
+
+    def is_state(self, state):
+        return self.box_state == state
+
+
+def _make_box_trigger(trigger_idx):
+    def trigger(self):
+        return self.fleet.fire(self.index, trigger_idx)
+
+    return trigger
+
+
+for _trigger, _trigger_idx in BOX_SPEC.trigger_index.items():
+    setattr(BoxView, _trigger, _make_box_trigger(_trigger_idx))
@@ -0,0 +1,240 @@
+# GestureDetector.py
+# Streaming Joystick/Kinect input stage: vectorized step-sequence and motion detection
+# over NumPy sample blocks, emitting FSM triggers.
+import numpy as np
+
+# Blocks shorter than this run the per-sample path: a 30 Hz Kinect feeding a 60 fps cook
+# delivers 1-2 samples per block, where NumPy call overhead outweighs the vectorized work
+# (the two break even around 64 rows in bench_gesture_detector.py).
+VECTORIZE_MIN_ROWS = 64
+
+
+def _column_index(channels):
+    """Block column selector: a basic slice for consecutive channels (no fancy-indexing copy), else the list."""
+    if channels is None:
+        return None
+    channels = list(channels)
+    if channels == list(range(channels[0], channels[0] + len(channels))):
+        return slice(channels[0], channels[0] + len(channels))
+    return channels
+
+
+class SequenceDetector:
+    """
+    Detects an ordered sequence of held poses (one per LED cue) in a stream of
+    (samples, channels) blocks and dispatches 'trigger' when the last step completes.
+
+    A step completes on the first sample where the input has stayed within
+    'tolerance' (Euclidean) of its 'target' for 'hold_s' seconds. All steps are
+    matched against the whole block at once; run lengths carry across blocks,
+    so the result does not depend on how the stream is chunked. Blocks shorter
+    than VECTORIZE_MIN_ROWS take an equivalent per-sample path. If the next step
+    is not completed within 'max_gap_s' of the previous one the sequence restarts.
+    """
+
+    def __init__(self, steps, sample_rate, trigger='post_interactive_complete', channels=None, max_gap_s=5.0):
+        self.names = [step['name'] for step in steps]
+        self.targets = np.array([step['target'] for step in steps], dtype=np.float32)
+        self.tolerance_sq = np.array([step['tolerance'] ** 2 for step in steps], dtype=np.float32)[:, None]
+        self.hold = np.array([max(1, round(step['hold_s'] * sample_rate)) for step in steps])[:, None]
+        self.max_gap = max(1, round(max_gap_s * sample_rate))
+        # Plain-list copies for the per-sample path
+        self._targets = self.targets.tolist()
+        self._tolerances = self.tolerance_sq[:, 0].tolist()
+        self._holds = self.hold[:, 0].tolist()
+        self.trigger = trigger
+        self.channels = channels
+        self._columns = _column_index(channels)
+        self.listeners = []
+        self.completions = 0
+        self.reset()
+
+    def reset(self):
+        """Back to the first step (entering TouchDesignerInteractiveChecks, or after a timeout)."""
+        self.step = 0
+        self.last_completion = None
+        self.sample = 0
+        self._run = [0] * len(self.names)
+
+    @property
+    def current_cue(self):
+        return self.names[self.step]
+
+    def _held(self, block):
+        """(steps, samples) bool: pose held for at least 'hold' samples ending at each sample."""
+        distance_sq = np.square(block[None, :, :] - self.targets[:, None, :]).sum(axis=2)
+        matched = distance_sq <= self.tolerance_sq
+        index = np.arange(block.shape[0])
+        # Run length = distance to the last unmatched sample; leading matches extend the carried run.
+        last_miss = np.maximum.accumulate(np.where(matched, -1, index), axis=1)
+        run = np.where(last_miss < 0, index + 1 + np.array(self._run)[:, None], index - last_miss)
+        self._run = run[:, -1].tolist()
+        return run >= self.hold
+
+    def process(self, block, dispatch):
+        """Consumes one block; returns the number of completed sequences."""
+        if self._columns is not None:
+            block = block[:, self._columns]
+        count = block.shape[0]
+        if count < VECTORIZE_MIN_ROWS:
+            return self._process_samples(block.tolist(), dispatch)
+        held = self._held(block)
+        start = self.sample
+        position = 0
+        completed = 0
+        while position < count:
+            hits = np.flatnonzero(held[self.step, position:])
+            if self.step:
+                deadline = self.last_completion + self.max_gap - start
+                if not hits.size or position + hits[0] > deadline:
+                    if deadline >= count:
+                        break
+                    self.step = 0
+                    self.last_completion = None
+                    position = max(position, deadline + 1)
+                    continue
+            elif not hits.size:
+                break
+
+            hit = position + int(hits[0])
+            completed += self._complete(start + hit, dispatch)
+            position = hit + 1
+
+        self.sample += count
+        return completed
+
+    def _process_samples(self, samples, dispatch):
+        """Per-sample path for short blocks, with the same semantics as the vectorized one."""
+        runs, targets, tolerances, holds = self._run, self._targets, self._tolerances, self._holds
+        planar = len(targets[0]) == 2
+        completed = 0
+        for sample in samples:
+            if planar:
+                # Joystick / hand X-Y: the common case, unrolled.
+                x, y = sample
+                for step, (target_x, target_y) in enumerate(targets):
+                    dx = x - target_x
+                    dy = y - target_y
+                    runs[step] = runs[step] + 1 if dx * dx + dy * dy <= tolerances[step] else 0
+            else:
+                for step, target in enumerate(targets):
+                    distance_sq = 0.0
+                    for value, centre in zip(sample, target):
+                        distance_sq += (value - centre) * (value - centre)
+                    runs[step] = runs[step] + 1 if distance_sq <= tolerances[step] else 0
+            index = self.sample
+            self.sample += 1
+            if self.step and index > self.last_completion + self.max_gap:
+                self.step = 0
+                self.last_completion = None
+            if runs[self.step] >= holds[self.step]:
+                completed += self._complete(index, dispatch)
+        return completed
+
+    def _complete(self, index, dispatch):
+        """Advances past the current step at sample 'index'; returns 1 if that finished the sequence."""
+        for listener in self.listeners:
+            listener(self.step, self.names[self.step])
+        self.step += 1
+        self.last_completion = index
+        if self.step < len(self.names):
+            return 0
+        self.step = 0
+        self.last_completion = None
+        self.completions += 1
+        dispatch(self.trigger)
+        return 1
+
+
+class ActivityDetector:
+    """
+    Dispatches 'trigger' (once per block) when the mean per-sample motion over a
+    'window_s' sliding window exceeds 'threshold'. Motion is the summed absolute
+    change across channels; the previous sample and partial window carry over.
+    Blocks shorter than VECTORIZE_MIN_ROWS take an equivalent per-sample path.
+    """
+
+    def __init__(self, sample_rate, threshold, trigger='start_interaction', channels=None, window_s=0.25):
+        self.window = max(1, round(window_s * sample_rate))
+        self.threshold = threshold * self.window
+        self.trigger = trigger
+        self.channels = channels
+        self._columns = _column_index(channels)
+        self.detections = 0
+        self.reset()
+
+    def reset(self):
+        self._previous = None   # last sample (list)
+        self._tail = []         # motion of the last window - 1 samples
+
+    def process(self, block, dispatch):
+        if self._columns is not None:
+            block = block[:, self._columns]
+        if block.shape[0] < VECTORIZE_MIN_ROWS:
+            exceeded = self._samples_exceed(block.tolist())
+        else:
+            exceeded = self._block_exceeds(block)
+        if not exceeded:
+            return 0
+        self.detections += 1
+        dispatch(self.trigger)
+        return 1
+
+    def _block_exceeds(self, block):
+        previous = block[:1] if self._previous is None else np.array([self._previous], dtype=block.dtype)
+        motion = np.abs(np.diff(block, axis=0, prepend=previous)).sum(axis=1)
+        motion = np.concatenate((np.array(self._tail, dtype=motion.dtype), motion))
+        self._previous = block[-1].tolist()
+        self._tail = motion[-(self.window - 1):].tolist() if self.window > 1 else []
+        if motion.shape[0] < self.window:
+            return False
+        cumulative = np.cumsum(motion)
+        window_sums = cumulative[self.window - 1:] - np.concatenate(([0.0], cumulative[:-self.window]))
+        return window_sums.max() > self.threshold
+
+    def _samples_exceed(self, samples):
+        previous = samples[0] if self._previous is None else self._previous
+        tail, window, threshold = self._tail, self.window, self.threshold
+        exceeded = False
+        planar = len(previous) == 2
+        for sample in samples:
+            if planar:
+                motion = abs(sample[0] - previous[0]) + abs(sample[1] - previous[1])
+            else:
+                motion = 0.0
+                for value, last in zip(sample, previous):
+                    motion += abs(value - last)
+            previous = sample
+            tail.append(motion)
+            if len(tail) == window:
+                exceeded = exceeded or sum(tail) > threshold
+                del tail[0]
+        self._previous = previous
+        return exceeded
+
+
+class InputStage:
+    """
+    Routes Joystick/Kinect sample blocks to the detectors active in the current
+    FSM state. Blocks are (samples, channels) float32; a CHOP's numpyArray() is
+    (channels, samples) and must be transposed first.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.samples = 0
+        self.blocks = 0
+
+    def add(self, states, detector):
+        for state in states:
+            self.routes.setdefault(state, []).append(detector)
+        return detector
+
+    def process(self, state, block, dispatch):
+        """Runs the block through the detectors for 'state'; returns the number of triggers dispatched."""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            block = block[None, :]
+        self.samples += block.shape[0]
+        self.blocks += 1
+        return sum(detector.process(block, dispatch) for detector in self.routes.get(state, ()))
@@ -0,0 +1,68 @@
+# GuardCache.py
+# Memoized FSM guard results with explicit dirty-flag invalidation.
+
+
+class GuardCache:
+    """
+    Caches guard (condition/unless) results on the model until marked dirty.
+
+    The same guard is often evaluated several times for one trigger
+    ('return_to_attract' checks check_all_aligned in both its conditional and
+    its 'unless' transition) and again by later triggers in the same frame.
+    Once installed, a guard is evaluated once and then served from the cache
+    until whoever changes its inputs calls invalidate(), or the frame tick
+    calls invalidate_all().
+
+    Only suitable for guards whose result depends on model/sensor state, not on
+    the trigger arguments (those are ignored while the cached value is valid).
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._dirty = {}
+        self.evaluations = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    def install(self, model, names):
+        """Replaces each named guard on 'model' with a memoizing wrapper."""
+        for name in names:
+            self._dirty[name] = True
+            setattr(model, name, self._wrap(name, getattr(model, name)))
+
+    def _wrap(self, name, func):
+        values = self._values
+        dirty = self._dirty
+
+        def cached(*args, **kwargs):
+            if dirty[name]:
+                values[name] = func(*args, **kwargs)
+                dirty[name] = False
+                self.evaluations += 1
+            else:
+                self.hits += 1
+            return values[name]
+
+        return cached
+
+    def invalidate(self, *names):
+        """Marks the named guards dirty (their inputs changed)."""
+        for name in names:
+            if name in self._dirty:
+                self._dirty[name] = True
+        self.invalidations += 1
+
+    def invalidate_all(self):
+        for name in self._dirty:
+            self._dirty[name] = True
+        self.invalidations += 1
+
+    def stats(self):
+        """Evaluations performed vs. saved ('hits')."""
+        total = self.evaluations + self.hits
+        return {
+            'evaluations': self.evaluations,
+            'hits': self.hits,
+            'saved_ratio': self.hits / total if total else 0.0,
+            'invalidations': self.invalidations,
+        }
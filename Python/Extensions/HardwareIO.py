@@ -0,0 +1,174 @@
+# HardwareIO.py
+# Off-cook-thread device workers feeding decoded FSM events to the frame tick.
+import threading
+import time
+
+
+class SPSCQueue:
+    """
+    Bounded single-producer/single-consumer ring buffer without locks.
+
+    The producer only ever writes '_tail' and the consumer only '_head'; each
+    side publishes its index after touching the slot, which is enough for one
+    producer thread and one consumer under CPython's GIL. Every device worker
+    owns its own queue, so the cook thread is the only consumer of each.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity + 1  # one slot stays empty to tell full from empty
+        self._buffer = [None] * self.capacity
+        self._head = 0
+        self._tail = 0
+
+    def push(self, item):
+        """Producer side. Returns False (item not queued) when the ring is full."""
+        tail = self._tail
+        next_tail = (tail + 1) % self.capacity
+        if next_tail == self._head:
+            return False
+        self._buffer[tail] = item
+        self._tail = next_tail
+        return True
+
+    def pop(self):
+        """Consumer side. Returns None when the ring is empty."""
+        head = self._head
+        if head == self._tail:
+            return None
+        item = self._buffer[head]
+        self._buffer[head] = None
+        self._head = (head + 1) % self.capacity
+        return item
+
+    def __len__(self):
+        return (self._tail - self._head) % self.capacity
+
+
+class DeviceWorker(threading.Thread):
+    """
+    Polls one controller on its own thread. controller.poll() may block on
+    serial/UDP I/O; whatever (trigger, kwargs) events it returns are stamped
+    with perf_counter_ns and pushed into this worker's SPSC queue. A poll that
+    returns nothing without blocking (non-blocking serial reads, UDP sockets with
+    a zero timeout) backs off for IDLE_BACKOFF_S, so an idle device never spins
+    on the GIL the cook thread needs.
+    """
+
+    ERROR_BACKOFF_S = 0.1
+    IDLE_BACKOFF_S = 0.001   # well under a 60 fps frame, so it adds at most ~1 ms of latency
+
+    def __init__(self, controller, capacity=1024):
+        super().__init__(name=f"DeviceWorker-{getattr(controller, 'name', 'controller')}", daemon=True)
+        self.controller = controller
+        self.queue = SPSCQueue(capacity)
+        self.dropped = 0
+        self.errors = 0
+        self._running = threading.Event()
+
+    def run(self):
+        self._running.set()
+        while self._running.is_set():
+            try:
+                events = self.controller.poll()
+            except Exception:
+                # A flaky device must not kill the worker; the counter shows up in stats().
+                self.errors += 1
+                time.sleep(self.ERROR_BACKOFF_S)
+                continue
+            if not events:
+                time.sleep(self.IDLE_BACKOFF_S)
+                continue
+            for trigger, kwargs in events:
+                if not self.queue.push((trigger, kwargs, time.perf_counter_ns())):
+                    self.dropped += 1
+
+    def stop(self):
+        self._running.clear()
+
+
+class HardwareIO:
+    """
+    Pool of DeviceWorkers, one per controller. The cook thread calls drain()
+    once per frame to hand every pending event to the FSM.
+    """
+
+    def __init__(self, controllers, capacity=1024):
+        self.workers = [DeviceWorker(controller, capacity) for controller in controllers]
+        self.drained = 0
+        self.latency_ns_total = 0
+        self.latency_ns_max = 0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self, timeout=1.0):
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join(timeout)
+        for worker in self.workers:
+            close = getattr(worker.controller, 'close', None)
+            if close is not None:
+                close()
+
+    def drain(self, dispatch, limit=None):
+        """Passes pending events to dispatch(trigger, **kwargs). Returns the number drained."""
+        drained = 0
+        now = time.perf_counter_ns()
+        for worker in self.workers:
+            queue = worker.queue
+            while limit is None or drained < limit:
+                event = queue.pop()
+                if event is None:
+                    break
+                trigger, kwargs, stamp = event
+                latency = now - stamp
+                self.latency_ns_total += latency
+                if latency > self.latency_ns_max:
+                    self.latency_ns_max = latency
+                dispatch(trigger, **kwargs)
+                drained += 1
+        self.drained += drained
+        return drained
+
+    def stats(self):
+        return {
+            'workers': len(self.workers),
+            'drained': self.drained,
+            'pending': sum(len(worker.queue) for worker in self.workers),
+            'dropped': sum(worker.dropped for worker in self.workers),
+            'errors': sum(worker.errors for worker in self.workers),
+            'mean_latency_us': self.latency_ns_total / self.drained / 1000.0 if self.drained else 0.0,
+            'max_latency_us': self.latency_ns_max / 1000.0,
+        }
+
+
+class SimulatedController:
+    """
+    Local stand-in for a limit-switch/encoder/actuator controller.
+
+    Each poll() blocks for 'response_s' (the serial/UDP round trip) and then
+    returns the next scripted (trigger, kwargs) event, or the 'idle' event list
+    once the script has been used up ('repeat' restarts it instead).
+    """
+
+    def __init__(self, name, script=(), response_s=0.005, repeat=False, idle=()):
+        self.name = name
+        self.script = list(script)
+        self.response_s = response_s
+        self.repeat = repeat
+        self.idle = list(idle)
+        self._position = 0
+
+    def poll(self):
+        if self.response_s:
+            time.sleep(self.response_s)
+        if self._position >= len(self.script):
+            if not self.repeat or not self.script:
+                return self.idle
+            self._position = 0
+        event = self.script[self._position]
+        self._position += 1
+        return [event]
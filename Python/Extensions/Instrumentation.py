@@ -0,0 +1,194 @@
+# Instrumentation.py
+# Switchable hot-path timing for FSM triggers and callbacks.
+from array import array
+from time import perf_counter_ns
+
+HISTOGRAM_BUCKETS = 32      # log2(ns) buckets: bucket i holds durations below 2**i ns
+DEFAULT_RING_SIZE = 1024
+
+
+class Instrumentation:
+    """
+    Per-trigger and per-callback durations, time-in-state and transition counts.
+
+    Timing works by swapping the model's trigger and callback attributes for
+    timing wrappers while enabled, and restoring the originals when disabled,
+    so a disabled instance adds nothing to the dispatch path. All storage is
+    preallocated in enable(): fixed log2 histograms per name and one ring
+    buffer of the most recent (name, duration) samples.
+    """
+
+    def __init__(self, ring_size=DEFAULT_RING_SIZE):
+        self.enabled = False
+        self.ring_size = ring_size
+
+        self.names = []
+        self.kinds = []
+        self._ids = {}
+        self._originals = {}
+
+        self._counts = array('q')
+        self._totals = array('q')
+        self._maxima = array('q')
+        self._histograms = array('q')
+        self._ring_ids = array('q', [-1] * ring_size)
+        self._ring_ns = array('q', [0] * ring_size)
+        self._ring_head = 0
+
+        self.states = []
+        self._state_ids = {}
+        self._time_in_state = array('q')
+        self._entries = array('q')
+        self._transition_counts = array('q')
+        self._current_state = -1
+        self._state_since = 0
+
+    # --- 1. ENABLE / DISABLE ---
+
+    def enable(self, model, triggers, callbacks, states, initial_state):
+        """Wraps 'triggers' and 'callbacks' (attribute names on 'model') and starts counting."""
+        if self.enabled:
+            return
+        self.names = list(triggers) + list(callbacks)
+        self.kinds = ['trigger'] * len(triggers) + ['callback'] * len(callbacks)
+        self._ids = {name: index for index, name in enumerate(self.names)}
+
+        count = len(self.names)
+        self._counts = array('q', [0] * count)
+        self._totals = array('q', [0] * count)
+        self._maxima = array('q', [0] * count)
+        self._histograms = array('q', [0] * (count * HISTOGRAM_BUCKETS))
+        self._ring_ids = array('q', [-1] * self.ring_size)
+        self._ring_ns = array('q', [0] * self.ring_size)
+        self._ring_head = 0
+
+        self.states = list(states)
+        self._state_ids = {state: index for index, state in enumerate(self.states)}
+        self._time_in_state = array('q', [0] * len(self.states))
+        self._entries = array('q', [0] * len(self.states))
+        self._transition_counts = array('q', [0] * (len(self.states) * len(self.states)))
+        self._current_state = self._state_ids[initial_state]
+        self._state_since = perf_counter_ns()
+
+        for name in self.names:
+            self._originals[name] = model.__dict__.get(name)
+            setattr(model, name, self._wrap(getattr(model, name), self._ids[name]))
+        self.enabled = True
+
+    def disable(self, model):
+        """Restores the original attributes. Collected data is kept until the next enable()."""
+        if not self.enabled:
+            return
+        for name, original in self._originals.items():
+            if original is None:
+                # Class-level method: drop the instance wrapper so lookup falls through again.
+                model.__dict__.pop(name, None)
+            else:
+                setattr(model, name, original)
+        self._originals = {}
+        self._accumulate_state_time(perf_counter_ns())
+        self.enabled = False
+
+    def _wrap(self, func, name_id):
+        record = self._record
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name_id, perf_counter_ns() - start)
+
+        return timed
+
+    # --- 2. RECORDING (hot path) ---
+
+    def _record(self, name_id, duration_ns):
+        self._counts[name_id] += 1
+        self._totals[name_id] += duration_ns
+        if duration_ns > self._maxima[name_id]:
+            self._maxima[name_id] = duration_ns
+        bucket = duration_ns.bit_length()
+        if bucket >= HISTOGRAM_BUCKETS:
+            bucket = HISTOGRAM_BUCKETS - 1
+        self._histograms[name_id * HISTOGRAM_BUCKETS + bucket] += 1
+
+        head = self._ring_head
+        self._ring_ids[head] = name_id
+        self._ring_ns[head] = duration_ns
+        self._ring_head = (head + 1) % self.ring_size
+
+    def state_changed(self, state):
+        """Call from the after_state_change hook: closes the previous state's interval."""
+        now = perf_counter_ns()
+        dest = self._state_ids[state]
+        self._transition_counts[self._current_state * len(self.states) + dest] += 1
+        self._accumulate_state_time(now)
+        self._entries[dest] += 1
+        self._current_state = dest
+
+    def _accumulate_state_time(self, now):
+        if self._current_state >= 0:
+            self._time_in_state[self._current_state] += now - self._state_since
+        self._state_since = now
+
+    # --- 3. REPORTING ---
+
+    def percentile_us(self, name, fraction):
+        """Upper bound (us) of the histogram bucket holding the given percentile."""
+        name_id = self._ids[name]
+        total = self._counts[name_id]
+        if not total:
+            return 0.0
+        target = fraction * total
+        seen = 0
+        offset = name_id * HISTOGRAM_BUCKETS
+        for bucket in range(HISTOGRAM_BUCKETS):
+            seen += self._histograms[offset + bucket]
+            if seen >= target:
+                return (1 << bucket) / 1000.0
+        return (1 << (HISTOGRAM_BUCKETS - 1)) / 1000.0
+
+    def recent(self):
+        """Most recent (name, duration_us) samples from the ring buffer, oldest first."""
+        samples = []
+        for offset in range(self.ring_size):
+            index = (self._ring_head + offset) % self.ring_size
+            if self._ring_ids[index] >= 0:
+                samples.append((self.names[self._ring_ids[index]], self._ring_ns[index] / 1000.0))
+        return samples
+
+    def timing_table(self):
+        """Rows for a Table DAT: one per trigger/callback that has fired."""
+        rows = [['name', 'kind', 'count', 'total_ms', 'mean_us', 'max_us', 'p50_us', 'p99_us']]
+        for name_id, name in enumerate(self.names):
+            count = self._counts[name_id]
+            if not count:
+                continue
+            rows.append([
+                name, self.kinds[name_id], count,
+                round(self._totals[name_id] / 1e6, 3),
+                round(self._totals[name_id] / count / 1000.0, 2),
+                round(self._maxima[name_id] / 1000.0, 2),
+                self.percentile_us(name, 0.50),
+                self.percentile_us(name, 0.99),
+            ])
+        return rows
+
+    def state_table(self):
+        """Rows for a Table DAT: time-in-state totals and entry counts."""
+        if self.enabled:
+            self._accumulate_state_time(perf_counter_ns())
+        rows = [['state', 'time_s', 'entries']]
+        for state_id, state in enumerate(self.states):
+            rows.append([state, round(self._time_in_state[state_id] / 1e9, 3), self._entries[state_id]])
+        return rows
+
+    def transition_table(self):
+        """Rows for a Table DAT: source/dest transition counts (non-zero only)."""
+        rows = [['source', 'dest', 'count']]
+        state_count = len(self.states)
+        for index, count in enumerate(self._transition_counts):
+            if count:
+                rows.append([self.states[index // state_count], self.states[index % state_count], count])
+        return rows
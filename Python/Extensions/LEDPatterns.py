@@ -0,0 +1,151 @@
+# LEDPatterns.py
+# Per-state LED patterns as precomputed one-period lookup tables, rendered each
+# frame into one preallocated (3, pixels) float32 buffer.
+import numpy as np
+
+# Pattern library. 'period_s' is one loop of the animation; colors are linear RGB 0..1.
+LED_PATTERNS = {
+    'Off': {'type': 'solid', 'color': (0.0, 0.0, 0.0)},
+    'DimWhite': {'type': 'solid', 'color': (0.2, 0.2, 0.2)},
+    'AttractRainbow': {'type': 'rainbow', 'period_s': 8.0, 'brightness': 0.6},
+    'SlowPulseRainbow': {'type': 'rainbow_pulse', 'period_s': 4.0},
+    'SlowPulseWhite': {'type': 'pulse', 'color': (1.0, 1.0, 1.0), 'period_s': 3.0},
+    'SlowPulseBlue': {'type': 'pulse', 'color': (0.0, 0.3, 1.0), 'period_s': 3.0},
+    'SlowPulseOrange': {'type': 'pulse', 'color': (1.0, 0.45, 0.0), 'period_s': 3.0},
+    'SlowPulseGreen': {'type': 'pulse', 'color': (0.0, 1.0, 0.2), 'period_s': 3.0},
+    'FaultIdle': {'type': 'solid', 'color': (0.15, 0.0, 0.0)},
+    'FaultBlink': {'type': 'blink', 'color': (1.0, 0.0, 0.0), 'period_s': 0.5, 'duty': 0.5},
+}
+
+
+def _rainbow(hue):
+    """Vectorized fully saturated HSV -> RGB; returns (3,) + hue.shape."""
+    sector = hue[None, ...] * 6.0 - np.array([3.0, 2.0, 4.0]).reshape((3,) + (1,) * hue.ndim)
+    rgb = np.abs(sector)
+    rgb[0] -= 1.0
+    rgb[1:] = 2.0 - rgb[1:]
+    return np.clip(rgb, 0.0, 1.0)
+
+
+class PatternTable:
+    """
+    One animation period of a pattern, factored into a spatial image and two
+    per-frame lookup tables: frame f shows spatial[:, shifts[f]:shifts[f] + pixels]
+    scaled by levels[f]. Uniform patterns keep a single (3, 1) color column that
+    broadcasts across all pixels; rainbows keep a doubled (3, 2 * pixels) hue ring
+    that scrolls by slicing, so every frame is a view and memory stays O(pixels).
+    """
+
+    __slots__ = ('spatial', 'levels', 'shifts', 'frames', 'width')
+
+    def __init__(self, definition, pixel_count, frame_rate):
+        kind = definition['type']
+        frames = 1 if kind == 'solid' else max(1, round(definition['period_s'] * frame_rate))
+        phase = np.arange(frames) / frames
+
+        if kind in ('rainbow', 'rainbow_pulse'):
+            ring = _rainbow(np.arange(2 * pixel_count) / pixel_count % 1.0)
+            levels = (np.full(frames, definition.get('brightness', 1.0)) if kind == 'rainbow'
+                      else 0.5 - 0.5 * np.cos(2.0 * np.pi * phase))
+            self.spatial = np.ascontiguousarray(ring, dtype=np.float32)
+            self.shifts = np.round(phase * pixel_count).astype(np.intp) % pixel_count
+            self.width = pixel_count
+        else:
+            if kind == 'solid':
+                levels = np.ones(1)
+            elif kind == 'pulse':
+                levels = 0.5 - 0.5 * np.cos(2.0 * np.pi * phase)
+            elif kind == 'blink':
+                levels = (phase < definition.get('duty', 0.5)).astype(np.float64)
+            else:
+                raise ValueError(f"Unknown LED pattern type '{kind}'")
+            self.spatial = np.asarray(definition['color'], dtype=np.float32).reshape(3, 1)
+            self.shifts = np.zeros(frames, dtype=np.intp)
+            self.width = 1
+        self.levels = levels.tolist()
+        self.shifts = self.shifts.tolist()
+        self.frames = frames
+
+    def render_into(self, out, frame, scale=1.0):
+        """Writes frame 'frame' (any integer, wrapped to the period) times 'scale' into 'out'."""
+        index = frame % self.frames
+        shift = self.shifts[index]
+        np.multiply(self.spatial[:, shift:shift + self.width], self.levels[index] * scale, out=out)
+
+    @property
+    def nbytes(self):
+        return self.spatial.nbytes + 16 * self.frames
+
+
+class LEDPatternEngine:
+    """
+    Renders the active pattern into 'buffer' once per frame.
+
+    Every pattern's one-period tables are built at construction, so a frame is a
+    table lookup and one scaled copy into preallocated arrays (plus a blend while
+    crossfading, and a masked copy for a per-box overlay such as blinking faulted
+    boxes); render() allocates no arrays. 'buffer' is a C-contiguous (3, pixels)
+    float32 array, channel-major like a Script CHOP (r, g, b channels x pixel
+    samples), and can be passed to scriptOp.copyNumpyArray() as is.
+    """
+
+    def __init__(self, box_count, leds_per_box, frame_rate, patterns=LED_PATTERNS, crossfade_s=0.5):
+        self.box_count = box_count
+        self.leds_per_box = leds_per_box
+        self.pixel_count = box_count * leds_per_box
+        self.tables = {name: PatternTable(definition, self.pixel_count, frame_rate)
+                       for name, definition in patterns.items()}
+        self.fade_frames = max(0, round(crossfade_s * frame_rate))
+
+        self.buffer = np.zeros((3, self.pixel_count), dtype=np.float32)
+        self._scratch = np.zeros_like(self.buffer)
+        self._overlay_mask = np.zeros(self.buffer.shape, dtype=bool)
+
+        self.pattern = None
+        self.start_frame = 0
+        self.previous = None
+        self.previous_start = 0
+        self.fade_start = 0
+        self.overlay = None
+        self.frames_rendered = 0
+
+    def set_pattern(self, name, frame, crossfade=True):
+        """Switches to 'name' starting at 'frame', fading out the current pattern unless crossfade=False."""
+        if name == self.pattern:
+            return
+        if name not in self.tables:
+            raise KeyError(f"Unknown LED pattern '{name}'")
+        if crossfade and self.pattern is not None and self.fade_frames:
+            self.previous, self.previous_start, self.fade_start = self.pattern, self.start_frame, frame
+        else:
+            self.previous = None
+        self.pattern, self.start_frame = name, frame
+
+    def set_overlay(self, name, box_mask=None):
+        """Shows pattern 'name' on the boxes in 'box_mask' on top of the base pattern (None clears it)."""
+        if name is None or box_mask is None or not box_mask.any():
+            self.overlay = None
+            return
+        np.copyto(self._overlay_mask, np.repeat(box_mask, self.leds_per_box))
+        self.overlay = name
+
+    def render(self, frame):
+        """Writes the given frame into 'buffer' and returns it."""
+        buffer = self.buffer
+        table = self.tables[self.pattern]
+
+        if self.previous is not None and frame - self.fade_start < self.fade_frames:
+            progress = (frame - self.fade_start) / self.fade_frames
+            table.render_into(buffer, frame - self.start_frame, progress)
+            self.tables[self.previous].render_into(self._scratch, frame - self.previous_start, 1.0 - progress)
+            buffer += self._scratch
+        else:
+            self.previous = None
+            table.render_into(buffer, frame - self.start_frame)
+
+        if self.overlay is not None:
+            self.tables[self.overlay].render_into(self._scratch, frame)
+            np.copyto(buffer, self._scratch, where=self._overlay_mask)
+
+        self.frames_rendered += 1
+        return buffer
@@ -0,0 +1,263 @@
+# MachineSpec.py
+# The Maestro FSM definition (states, transitions, timed states) loaded from the
+# declarative spec file Python/Spec/maestro_fsm.json, validated, compiled and
+# cached on disk by content hash.
+import hashlib
+import json
+import os
+import pickle
+
+from TransitionTable import CALLBACK_KEYS, compile_spec, register_spec
+
+
+# Note: Apart from 'project.folder' (the spec location when this module is loaded
+# from a DAT), there are no TouchDesigner dependencies, so StateExtension and the
+# headless scripts load the same definition.
+
+SPEC_FILE = os.path.join('Python', 'Spec', 'maestro_fsm.json')  # relative to the project folder
+CACHE_DIR = '.speccache'                                         # next to the spec file
+FORMAT_VERSION = 1  # bump when the compiled layout changes so older cache files are ignored
+
+SPEC_KEYS = ('name', 'initial', 'auto_transitions', 'states', 'sections', 'timeouts')
+SECTION_KEYS = ('title', 'transitions', 'notes')
+TRANSITION_KEYS = ('trigger', 'source', 'dest') + CALLBACK_KEYS
+DIAGRAM_KEYS = ('label',)  # used by the generated Mermaid diagram only
+
+# Compiled definitions by content hash, shared by every load in this process
+_LOADED = {}
+
+
+class SpecError(ValueError):
+    """The spec file is malformed; 'problems' lists every issue found, not just the first."""
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = list(problems)
+        super().__init__(f"Invalid machine spec {path}:\n  " + "\n  ".join(self.problems))
+
+
+class MachineDefinition:
+    """
+    A loaded spec. 'states', 'transitions', 'initial' and 'auto_transitions' are
+    the Machine()/CompiledMachine() arguments; 'timeouts' maps timed states to
+    {'timeout', 'on_timeout'}; 'table' is the compile_spec() dispatch table;
+    'sections' keeps the grouping, labels and notes for the diagram. 'source'
+    says where this load came from: 'memory', 'disk' (the cache) or 'compiled'.
+
+    Only CompiledMachine consumes 'table'. A stock transitions.Machine (the
+    default StateExtension engine, and TestStateModel) gets the cached, already
+    validated lists but still builds its own event graph from them on every
+    construction.
+    """
+
+    __slots__ = ('key', 'name', 'initial', 'auto_transitions', 'states', 'transitions', 'timeouts',
+                 'sections', 'table', 'path', 'source')
+
+    def __init__(self, compiled, path, source):
+        for field in ('key', 'name', 'initial', 'auto_transitions', 'states', 'transitions', 'timeouts',
+                      'sections', 'table'):
+            setattr(self, field, compiled[field])
+        self.path = path
+        self.source = source
+
+
+def default_spec_path():
+    """The spec next to this checkout, or under project.folder inside TouchDesigner."""
+    here = globals().get('__file__')
+    if here and os.path.isfile(here):
+        return os.path.join(os.path.dirname(os.path.abspath(here)), '..', '..', SPEC_FILE)
+    return os.path.join(project.folder, SPEC_FILE)
+
+
+def load_machine_spec(path=None, cache_dir=None):
+    """
+    Returns the MachineDefinition for the spec file at 'path'. The file is hashed
+    on every call (it is a few kB), so an edited spec is picked up immediately;
+    an unchanged one comes from this process or from the pickle in 'cache_dir'
+    without being parsed, validated or compiled again. Raises SpecError if the
+    spec is invalid.
+    """
+    path = os.path.normpath(path or default_spec_path())
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    key = hashlib.sha1(b'%d:' % FORMAT_VERSION + data).hexdigest()
+
+    compiled = _LOADED.get(key)
+    if compiled is not None:
+        return MachineDefinition(compiled, path, 'memory')
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), CACHE_DIR)
+    cache_path = os.path.join(cache_dir, f"{stem}-{key[:16]}.pickle")
+    compiled, source = _read_cache(cache_path, key), 'disk'
+    if compiled is None:
+        try:
+            raw = json.loads(data.decode('utf-8'))
+        except ValueError as error:
+            raise SpecError(path, [f"not valid JSON: {error}"]) from None
+        compiled, source = compile_definition(raw, key, path), 'compiled'
+        _write_cache(cache_path, compiled, stem)
+
+    register_spec(compiled['table'])
+    _LOADED[key] = compiled
+    return MachineDefinition(compiled, path, source)
+
+
+def compile_definition(raw, key, path='<spec>'):
+    """Validates a parsed spec and flattens it into the picklable compiled form."""
+    problems = validate_spec(raw)
+    if problems:
+        raise SpecError(path, problems)
+
+    states = list(raw['states'])
+    auto_transitions = raw.get('auto_transitions', True)
+    sections = []
+    transitions = []
+    for section in raw['sections']:
+        sections.append({'title': section['title'],
+                         'transitions': [dict(transition) for transition in section['transitions']],
+                         'notes': {state: list(lines) for state, lines in section.get('notes', {}).items()}})
+        transitions.extend({field: transition[field] for field in TRANSITION_KEYS if field in transition}
+                           for transition in section['transitions'])
+    return {
+        'key': key,
+        'name': raw['name'],
+        'initial': raw['initial'],
+        'auto_transitions': auto_transitions,
+        'states': states,
+        'transitions': transitions,
+        'timeouts': {state: dict(spec) for state, spec in raw.get('timeouts', {}).items()},
+        'sections': sections,
+        'table': compile_spec(states, transitions, auto_transitions),
+    }
+
+
+def validate_spec(raw):
+    """Returns a list of problems with a parsed spec (empty when it is valid)."""
+    if not isinstance(raw, dict):
+        return ["the spec must be a JSON object"]
+    problems = [f"unknown key '{key}'" for key in raw if key not in SPEC_KEYS]
+    for key in ('name', 'initial', 'states', 'sections'):
+        if key not in raw:
+            problems.append(f"missing '{key}'")
+    if problems:
+        return problems
+
+    states = raw['states']
+    if not isinstance(states, list) or not states or not all(_is_name(state) for state in states):
+        return problems + ["'states' must be a non-empty list of identifiers"]
+    problems += [f"duplicate state '{state}'" for state in sorted({s for s in states if states.count(s) > 1})]
+    state_set = set(states)
+    if raw['initial'] not in state_set:
+        problems.append(f"initial state '{raw['initial']}' is not a state")
+    auto_transitions = raw.get('auto_transitions', True)
+    if not isinstance(auto_transitions, bool):
+        problems.append("'auto_transitions' must be true or false")
+
+    if not isinstance(raw['sections'], list):
+        return problems + ["'sections' must be a list"]
+
+    sources_by_trigger = {}
+    unconditional = set()
+    for i, section in enumerate(raw['sections']):
+        where = f"sections[{i}]"
+        if not isinstance(section, dict) or not isinstance(section.get('transitions'), list):
+            problems.append(f"{where}: must be an object with a 'transitions' list")
+            continue
+        problems += [f"{where}: unknown key '{key}'" for key in section if key not in SECTION_KEYS]
+        if not isinstance(section.get('title'), str):
+            problems.append(f"{where}: missing 'title'")
+        notes = section.get('notes', {})
+        if not isinstance(notes, dict):
+            problems.append(f"{where}: 'notes' must map states to lists of lines")
+            notes = {}
+        for state, lines in notes.items():
+            if state not in state_set:
+                problems.append(f"{where}: note on unknown state '{state}'")
+            if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+                problems.append(f"{where}: note on '{state}' must be a list of strings")
+
+        for j, transition in enumerate(section['transitions']):
+            where = f"sections[{i}].transitions[{j}]"
+            if not isinstance(transition, dict):
+                problems.append(f"{where}: must be an object")
+                continue
+            trigger = transition.get('trigger')
+            where += f" '{trigger}'"
+            problems += [f"{where}: unknown key '{key}'" for key in transition
+                         if key not in TRANSITION_KEYS + DIAGRAM_KEYS]
+            if not _is_name(trigger):
+                problems.append(f"{where}: 'trigger' must be an identifier")
+                continue
+            if auto_transitions and trigger.startswith('to_') and trigger[3:] in state_set:
+                problems.append(f"{where}: clashes with the auto transition to '{trigger[3:]}'")
+            source = transition.get('source')
+            sources = states if source == '*' else [source] if isinstance(source, str) else source
+            if not isinstance(sources, list) or not sources or not all(isinstance(state, str) for state in sources):
+                problems.append(f"{where}: 'source' must be a state, a list of states or '*'")
+                sources = []
+            problems += [f"{where}: unknown source state '{state}'" for state in sources if state not in state_set]
+            if transition.get('dest') not in state_set:
+                problems.append(f"{where}: unknown dest state '{transition.get('dest')}'")
+            for key in CALLBACK_KEYS:
+                names = transition.get(key, [])
+                names = [names] if isinstance(names, str) else names
+                if not isinstance(names, list) or not all(_is_name(name) for name in names):
+                    problems.append(f"{where}: '{key}' must be a callback name or a list of them")
+            if 'label' in transition and not isinstance(transition['label'], str):
+                problems.append(f"{where}: 'label' must be a string")
+
+            # An earlier transition without guards always wins, so this one could never fire.
+            guarded = bool(transition.get('conditions') or transition.get('unless'))
+            for state in dict.fromkeys(sources):
+                if (trigger, state) in unconditional:
+                    problems.append(f"{where}: unreachable, an earlier unguarded '{trigger}' from '{state}' always wins")
+                elif not guarded:
+                    unconditional.add((trigger, state))
+                sources_by_trigger.setdefault(trigger, set()).add(state)
+
+    timeouts = raw.get('timeouts', {})
+    if not isinstance(timeouts, dict):
+        return problems + ["'timeouts' must be an object"]
+    for state, spec in timeouts.items():
+        where = f"timeouts['{state}']"
+        if state not in state_set:
+            problems.append(f"{where}: unknown state")
+        if not isinstance(spec, dict) or set(spec) != {'timeout', 'on_timeout'}:
+            problems.append(f"{where}: must have exactly 'timeout' and 'on_timeout'")
+            continue
+        if isinstance(spec['timeout'], bool) or not isinstance(spec['timeout'], (int, float)) or spec['timeout'] <= 0:
+            problems.append(f"{where}: 'timeout' must be a positive number of seconds")
+        if state not in sources_by_trigger.get(spec['on_timeout'], ()):
+            problems.append(f"{where}: trigger '{spec['on_timeout']}' has no transition from '{state}'")
+    return problems
+
+
+def _is_name(value):
+    return isinstance(value, str) and value.isidentifier()
+
+
+def _read_cache(cache_path, key):
+    try:
+        with open(cache_path, 'rb') as handle:
+            compiled = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return compiled if isinstance(compiled, dict) and compiled.get('key') == key else None
+
+
+def _write_cache(cache_path, compiled, stem):
+    """Writes the compiled spec atomically and drops caches of older revisions (best effort)."""
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as handle:
+            pickle.dump(compiled, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+        for name in os.listdir(cache_dir):
+            if name.startswith(stem + '-') and name.endswith('.pickle') and name != os.path.basename(cache_path):
+                os.remove(os.path.join(cache_dir, name))
+    except OSError:
+        # A read-only install just compiles on every cold start.
+        pass
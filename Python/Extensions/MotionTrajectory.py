@@ -0,0 +1,252 @@
+# MotionTrajectory.py
+# Attract-mode autonomous motion: velocity/acceleration-limited rotation and linear
+# setpoints for every box, generated in NumPy chunks of frames ahead of playback.
+import numpy as np
+
+LINEAR_MAX = 1.0  # normalized actuator travel; locked-at-max actuators are held here
+
+
+class MotionLimits:
+    """Per-axis motion envelope (units per second / per second squared; rotation in degrees)."""
+
+    def __init__(self, max_speed, max_accel, center, amplitude, periods_s):
+        self.max_speed = max_speed
+        self.max_accel = max_accel
+        self.center = center
+        self.amplitude = amplitude
+        self.periods_s = periods_s
+
+
+ROTATION_LIMITS = MotionLimits(max_speed=30.0, max_accel=20.0, center=0.0, amplitude=45.0, periods_s=(20.0, 7.0))
+LINEAR_LIMITS = MotionLimits(max_speed=0.2, max_accel=0.2, center=0.5, amplitude=0.35, periods_s=(12.0, 5.0))
+
+
+class _Axis:
+    """
+    One actuator axis for all boxes. The autonomous 'intent' is a sum of two sine
+    waves per box (phase spread across the fleet), with amplitudes scaled down so
+    its peak speed/acceleration stay inside the limits; it is evaluated in closed
+    form for a whole chunk. While the actuators are still catching up with it
+    (after start() or a lock change) a per-frame tracker, vectorized across boxes,
+    limits velocity and acceleration until every box has converged.
+    """
+
+    def __init__(self, limits, box_count, frame_rate):
+        self.limits = limits
+        omegas = np.array([2.0 * np.pi / (period * frame_rate) for period in limits.periods_s])
+        weights = np.array([0.7, 0.3])
+        # Peak per-frame speed / acceleration of the weighted waves at unit amplitude.
+        speed = float(np.sum(weights * omegas))
+        accel = float(np.sum(weights * omegas ** 2))
+        self.max_step = limits.max_speed / frame_rate
+        self.max_dv = limits.max_accel / frame_rate ** 2
+        # Tracking hands over to the intent once every box is this close to it (a quarter frame of max accel),
+        # so the switch itself stays inside the acceleration limit.
+        self.tolerance = 0.25 * self.max_dv
+        amplitude = min(limits.amplitude, 0.95 * self.max_step / speed, 0.95 * self.max_dv / accel)
+        self.amplitudes = weights * amplitude
+        self.omegas = omegas
+        self.phases = np.linspace(0.0, 2.0 * np.pi, box_count, endpoint=False)
+        # sin(w t + p) = sin(w t) cos(p) + cos(w t) sin(p): a chunk is one (frames, 4) @ (4, boxes) product.
+        self._basis = np.concatenate([amplitude_k * np.stack((np.cos(self.phases), np.sin(self.phases)))
+                                      for amplitude_k in self.amplitudes])
+        self.position = np.zeros(box_count)
+        self.velocity = np.zeros(box_count)
+        self.converged = False
+
+    def intent(self, frames, out, hold_mask=None, hold_value=0.0):
+        """Closed-form intent for the absolute animation frames 'frames' ((N, 1) array) into out (N, boxes)."""
+        angles = frames * self.omegas                      # (N, 2)
+        waves = np.empty((angles.shape[0], 4))
+        np.sin(angles, out=waves[:, 0::2])
+        np.cos(angles, out=waves[:, 1::2])
+        np.matmul(waves, self._basis, out=out)
+        out += self.limits.center
+        if hold_mask is not None:
+            out[:, hold_mask] = hold_value
+
+    def track(self, intent, out, previous):
+        """
+        Follows 'intent' row by row with limited speed/acceleration, writing into 'out'
+        ('previous' is the intent one frame before intent[0]). Returns the number of
+        rows tracked before every box converged; the remaining rows are copied
+        straight from the intent and later fills skip tracking.
+        """
+        position, velocity = self.position, self.velocity
+        # The float32 ring rounds each setpoint by up to half an ulp, which moves a played
+        # step by up to one ulp and a step change by up to two: keep that much headroom.
+        ulp = float(np.spacing(np.float32(max(np.abs(position).max(), np.abs(intent).max(), np.abs(previous).max()))))
+        max_step, max_dv, tolerance = self.max_step - ulp, self.max_dv - 2.0 * ulp, self.tolerance
+        for row in range(intent.shape[0]):
+            target = intent[row]
+            feed_forward = target - previous
+            previous = target
+            # Residual error after following the intent's own step this frame, closed at the
+            # fastest rate that can still brake in time (discrete braking curve: equals the
+            # residual itself once it is within one step).
+            error = target - position - feed_forward
+            desired = feed_forward + np.sign(error) * (np.sqrt(0.25 * max_dv * max_dv + 2.0 * max_dv * np.abs(error))
+                                                       - 0.5 * max_dv)
+            np.clip(desired, velocity - max_dv, velocity + max_dv, out=desired)
+            np.clip(desired, -max_step, max_step, out=velocity)
+            position += velocity
+            out[row] = position
+            if (np.abs(target - position) < tolerance).all() and (np.abs(velocity - feed_forward) < tolerance).all():
+                out[row + 1:] = intent[row + 1:]
+                position[:] = intent[-1]
+                velocity[:] = feed_forward if row + 1 == len(intent) else intent[-1] - intent[-2]
+                self.converged = True
+                return row + 1
+        return intent.shape[0]
+
+
+class TrajectoryGenerator:
+    """
+    Ring-buffered setpoint stream for all boxes.
+
+    A preallocated ring of two chunks ('chunk_frames' rows each) holds the rotation
+    and linear setpoints ahead of playback, and next_frame() returns row views.
+    Once the actuators follow the intent, a whole chunk is generated in one
+    vectorized step whenever a chunk's worth of rows has been played out, so there
+    is no per-frame trajectory math. While they are still catching up (after
+    start() or a lock change) the sequential tracker runs only
+    'track_rows_per_frame' rows per frame, staying ahead of playback, so neither
+    start() nor any single frame pays for tracking a whole chunk. Locked-at-max
+    actuators are held at LINEAR_MAX (rotation keeps moving). Playback starts at
+    an absolute animation frame, so the Attract motion resumes where it left off
+    ('frame' after stop()).
+    """
+
+    def __init__(self, box_count, frame_rate=60, chunk_frames=60, track_rows_per_frame=4,
+                 rotation_limits=ROTATION_LIMITS, linear_limits=LINEAR_LIMITS):
+        if chunk_frames < 3:
+            # Two ring rows stay reserved for playback, so a converged refill needs chunk_frames >= 3.
+            raise ValueError(f"chunk_frames must be at least 3, got {chunk_frames}")
+        self.box_count = box_count
+        self.chunk_frames = chunk_frames
+        self.track_rows_per_frame = min(max(2, track_rows_per_frame), chunk_frames)
+        self.rotation = _Axis(rotation_limits, box_count, frame_rate)
+        self.linear = _Axis(linear_limits, box_count, frame_rate)
+
+        rows = 2 * chunk_frames
+        self.rotation_setpoints = np.zeros((rows, box_count), dtype=np.float32)
+        self.linear_setpoints = np.zeros((rows, box_count), dtype=np.float32)
+        # Intent rows start one frame before the generated rows (the tracker's feed-forward).
+        self._intent = np.zeros((chunk_frames + 1, box_count))
+        self._tracked = np.zeros((chunk_frames, box_count))
+        self._chunk_range = np.arange(-1, chunk_frames, dtype=np.float64)[:, None]
+        self.lock_mask = np.zeros(box_count, dtype=bool)
+
+        self.active = False
+        self.frame = 0            # absolute animation frame of the next setpoint
+        self._read = 0            # next ring row to play
+        self._write = 0           # next ring row to generate
+        self._next_fill = 0       # animation frame the next generated row starts at
+        self._played = 0          # frames played since the last (re)plan
+        self._generated = 0       # rows generated since the last (re)plan
+        self.chunks_generated = 0
+        self.tracked_frames = 0
+
+    # --- Control ---
+
+    def start(self, frame_offset, rotation, linear, lock_mask=None):
+        """Begins autonomous motion at animation frame 'frame_offset' from the current actuator positions."""
+        self.rotation.position[:] = rotation
+        self.linear.position[:] = linear
+        self.rotation.velocity.fill(0.0)
+        self.linear.velocity.fill(0.0)
+        if lock_mask is not None:
+            self.lock_mask[:] = lock_mask
+        self.active = True
+        self._replan(frame_offset)
+
+    def stop(self):
+        self.active = False
+        return self.frame
+
+    def set_lock_mask(self, lock_mask):
+        """Updates the locked actuators and re-plans from the frame about to play."""
+        if np.array_equal(lock_mask, self.lock_mask):
+            return
+        self.lock_mask[:] = lock_mask
+        if self.active:
+            self._sync_from_playback()
+            self._replan(self.frame)
+
+    # --- Playback ---
+
+    def next_frame(self):
+        """
+        (rotation, linear) float32 row views for the current frame (valid until the
+        next call); advances playback.
+        """
+        row = self._read
+        self._read = (row + 1) % (2 * self.chunk_frames)
+        self.frame += 1
+        self._played += 1
+        self._top_up()
+        return self.rotation_setpoints[row], self.linear_setpoints[row]
+
+    # --- Generation ---
+
+    def _replan(self, frame):
+        self.frame = frame
+        self._read = self._write = 0
+        self._played = self._generated = 0
+        self._next_fill = frame
+        self._origin = [(axis.position.copy(), axis.velocity.copy()) for axis in (self.rotation, self.linear)]
+        self.rotation.converged = self.linear.converged = False
+        # Only the first few rows now; next_frame() keeps generating ahead of playback.
+        self._top_up()
+
+    def _top_up(self):
+        """
+        Generates rows ahead of playback: a chunk at a time once converged (when that
+        many rows are free), otherwise up to track_rows_per_frame tracked rows. The
+        row just returned and the one before it (used by _sync_from_playback) are kept.
+        """
+        rows = 2 * self.chunk_frames
+        free = rows - (self._generated - self._played) - 2
+        if self.converged:
+            if free < self.chunk_frames:
+                return
+            count = self.chunk_frames
+        else:
+            count = min(self.track_rows_per_frame, free)
+        count = min(count, rows - self._write)
+        if count > 0:
+            self._fill(self._write, count)
+
+    def _sync_from_playback(self):
+        """Tracker state = the last played setpoint and its per-frame velocity."""
+        rows = 2 * self.chunk_frames
+        last, before = (self._read - 1) % rows, (self._read - 2) % rows
+        for axis, setpoints, (position, velocity) in ((self.rotation, self.rotation_setpoints, self._origin[0]),
+                                                      (self.linear, self.linear_setpoints, self._origin[1])):
+            if self._played == 0:
+                axis.position[:], axis.velocity[:] = position, velocity
+            else:
+                previous = setpoints[before] if self._played > 1 else position
+                axis.position[:] = setpoints[last]
+                axis.velocity[:] = setpoints[last] - previous
+
+    def _fill(self, start_row, count):
+        frames = self._chunk_range[:count + 1] + self._next_fill
+        intent = self._intent[:count + 1]
+        rows = slice(start_row, start_row + count)
+        for axis, setpoints, hold in ((self.rotation, self.rotation_setpoints, None),
+                                      (self.linear, self.linear_setpoints, self.lock_mask)):
+            axis.intent(frames, intent, hold, LINEAR_MAX)
+            if axis.converged:
+                setpoints[rows] = intent[1:]
+            else:
+                self.tracked_frames += axis.track(intent[1:], self._tracked[:count], intent[0])
+                setpoints[rows] = self._tracked[:count]
+        self._next_fill += count
+        self._generated += count
+        self._write = (start_row + count) % (2 * self.chunk_frames)
+        self.chunks_generated += 1
+
+    @property
+    def converged(self):
+        return self.rotation.converged and self.linear.converged
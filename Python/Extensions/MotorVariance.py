@@ -0,0 +1,102 @@
+# MotorVariance.py
+# Streaming min-travel variance evaluator for the LinearCheck POST stage.
+import numpy as np
+
+# Mermaid diagram: linear_check_failure fires when Min Variance > 3%
+DEFAULT_VARIANCE_THRESHOLD = 0.03
+DEFAULT_MIN_SAMPLES = 2
+
+
+class MotorVarianceMonitor:
+    """
+    Online per-actuator mean/variance (Welford) over min-travel samples.
+
+    All actuators are sampled together at controller rate, so update() takes
+    one array of 'count' readings and folds it into the running statistics in
+    place; nothing is allocated per sample and the history is never re-scanned.
+
+    An actuator trips when its relative standard deviation (std / |mean|)
+    exceeds the threshold. Failures reported directly by the hardware layer
+    are latched with report_failure() and count as tripped until cleared.
+    The check only passes once min_samples readings have arrived: with no
+    travel data there is nothing to vouch for the actuators.
+    """
+
+    def __init__(self, count, threshold=DEFAULT_VARIANCE_THRESHOLD, min_samples=DEFAULT_MIN_SAMPLES):
+        self.count = count
+        self.threshold = threshold
+        self.min_samples = min_samples
+
+        self.samples = 0
+        self.mean = np.zeros(count, dtype=np.float64)
+        self.m2 = np.zeros(count, dtype=np.float64)
+        self.latched = np.zeros(count, dtype=bool)
+
+        # Scratch buffers reused by update()/tripped_mask()
+        self._delta = np.zeros(count, dtype=np.float64)
+        self._scratch = np.zeros(count, dtype=np.float64)
+        self._tripped = np.zeros(count, dtype=bool)
+        self._over = np.zeros(count, dtype=bool)
+
+    def reset(self):
+        """Clears the running statistics and latched failures (start of a new LinearCheck)."""
+        self.samples = 0
+        self.mean.fill(0.0)
+        self.m2.fill(0.0)
+        self.latched.fill(False)
+
+    def update(self, travel):
+        """Folds one min-travel reading per actuator (float64 array of length 'count')."""
+        self.samples += 1
+        np.subtract(travel, self.mean, out=self._delta)
+        np.divide(self._delta, self.samples, out=self._scratch)
+        np.add(self.mean, self._scratch, out=self.mean)
+        np.subtract(travel, self.mean, out=self._scratch)
+        np.multiply(self._delta, self._scratch, out=self._scratch)
+        np.add(self.m2, self._scratch, out=self.m2)
+
+    def update_block(self, block):
+        """Folds a (samples, count) block of readings row by row."""
+        for row in block:
+            self.update(row)
+
+    def relative_std(self):
+        """Per-actuator std / |mean| (zero until min_samples readings have arrived)."""
+        if self.samples < self.min_samples:
+            return np.zeros(self.count, dtype=np.float64)
+        variance = self.m2 / (self.samples - 1)
+        magnitude = np.abs(self.mean)
+        return np.divide(np.sqrt(variance), magnitude, out=np.zeros(self.count), where=magnitude > 0)
+
+    def report_failure(self, box_id):
+        """Latches a failure reported by the hardware layer for a 1-based box ID (ValueError outside 1..count)."""
+        if not 1 <= box_id <= self.count:
+            raise ValueError(f"Box ID must be in 1..{self.count}, got {box_id}.")
+        self.latched[box_id - 1] = True
+
+    def clear_mask(self, mask):
+        """Clears the latches selected by 'mask' once the curator has resolved them."""
+        self.latched[mask] = False
+
+    def tripped_mask(self):
+        """Boolean mask of actuators over the threshold or latched as failed."""
+        np.copyto(self._tripped, self.latched)
+        if self.samples >= self.min_samples:
+            # threshold test on variance avoids the sqrt: var > (threshold * mean)^2
+            np.divide(self.m2, self.samples - 1, out=self._delta)
+            np.multiply(self.mean, self.threshold, out=self._scratch)
+            np.multiply(self._scratch, self._scratch, out=self._scratch)
+            np.greater(self._delta, self._scratch, out=self._over)
+            np.logical_or(self._tripped, self._over, out=self._tripped)
+        return self._tripped
+
+    def passes(self):
+        """Guard value: True once min_samples readings have arrived and no actuator has tripped."""
+        return self.samples >= self.min_samples and not self.tripped_mask().any()
+
+    def tripped_box_id(self):
+        """1-based ID of the first tripped box, or None."""
+        tripped = self.tripped_mask()
+        if not tripped.any():
+            return None
+        return int(np.argmax(tripped)) + 1
@@ -0,0 +1,83 @@
+# PathIndex.py
+# All-pairs shortest trigger paths and reachability over the FSM transition graph.
+from collections import deque
+
+
+class TriggerPathIndex:
+    """
+    For every (source, dest) pair, the shortest sequence of triggers that moves
+    the machine from source to dest, found by one BFS per state.
+
+    The index is built once and cached; add_transition() invalidates it and the
+    next query rebuilds it. Auto 'to_<State>' transitions are not part of the
+    graph (they are jumps, not replayable history). Conditional transitions are
+    included as edges, so a replayed path can still be blocked by a guard.
+    """
+
+    def __init__(self, states, transitions):
+        self.states = list(states)
+        self.transitions = [dict(transition) for transition in transitions]
+        self._paths = None
+        self.builds = 0
+
+    def add_transition(self, transition):
+        self.transitions.append(dict(transition))
+        self.invalidate()
+
+    def invalidate(self):
+        self._paths = None
+
+    def rebuild(self):
+        edges = {state: [] for state in self.states}
+        for transition in self.transitions:
+            sources = transition['source']
+            if sources == '*':
+                sources = self.states
+            elif isinstance(sources, str):
+                sources = [sources]
+            for source in sources:
+                dest = source if transition['dest'] == '=' else transition['dest']
+                if dest != source:
+                    edges[source].append((transition['trigger'], dest))
+
+        paths = {}
+        for origin in self.states:
+            found = {origin: ()}
+            frontier = deque([origin])
+            while frontier:
+                state = frontier.popleft()
+                for trigger, dest in edges[state]:
+                    if dest not in found:
+                        found[dest] = found[state] + ((trigger, dest),)
+                        frontier.append(dest)
+            paths[origin] = found
+
+        self._paths = paths
+        self.builds += 1
+        return paths
+
+    def _index(self):
+        return self._paths if self._paths is not None else self.rebuild()
+
+    # --- QUERIES ---
+
+    def path(self, source, dest):
+        """Shortest trigger tuple from source to dest ('()' if equal), or None if unreachable."""
+        route = self.route(source, dest)
+        return None if route is None else tuple(trigger for trigger, _ in route)
+
+    def route(self, source, dest):
+        """
+        The shortest path as ((trigger, state it should land in), ...), so a replay
+        can tell when a guarded trigger went elsewhere; None if unreachable.
+        """
+        return self._index()[source].get(dest)
+
+    def reachable_from(self, source):
+        """States reachable from 'source' (including itself)."""
+        return set(self._index()[source])
+
+    def dead_states(self, initial):
+        """States that can never be entered from 'initial' through triggers."""
+        reachable = self._index()[initial]
+        return [state for state in self.states if state not in reachable]
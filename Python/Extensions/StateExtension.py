@@ -1,11 +1,86 @@
 # StateExtension.py
-from transitions import Machine
+import time
+
+_IMPORT_START = time.perf_counter()
+
+from transitions import Machine, MachineError
+import numpy as np
+from BoxFleet import BoxFleet, DEFAULT_BOX_COUNT, FAULT
+from GestureDetector import ActivityDetector, InputStage, SequenceDetector
+from GuardCache import GuardCache
+from HardwareIO import HardwareIO
+from Instrumentation import Instrumentation
+from LEDPatterns import LEDPatternEngine
+from MachineSpec import load_machine_spec
+from MotionTrajectory import TrajectoryGenerator
+from MotorVariance import MotorVarianceMonitor
+from PathIndex import TriggerPathIndex
+from TimerWheel import TimerWheel
+from TransitionJournal import TransitionJournal
+from TransitionTable import CompiledMachine
+from TriggerQueue import TriggerQueue
+import hashlib
+import json
+import os
+import pickle
 import sys
 
+# Dependency + helper-module import cost, reported in the startup profile.
+_IMPORT_MS = (time.perf_counter() - _IMPORT_START) * 1000.0
+
 
 # Note: TouchDesigner built-in objects like 'op', 'absTime', and 'debug' are
 # automatically available without explicit import in DAT scripts.
 
+# The machine (states, transitions and timed states) is defined once in the declarative
+# spec Python/Spec/maestro_fsm.json, shared with the headless scripts and the generated
+# MermaidDiagram.md. It is validated at load and its compiled form is cached on disk by
+# content hash, so an unchanged spec loads without being parsed or compiled again.
+_SPEC_START = time.perf_counter()
+MACHINE_SPEC = load_machine_spec()
+_SPEC_MS = (time.perf_counter() - _SPEC_START) * 1000.0
+
+STATES = MACHINE_SPEC.states
+TRANSITIONS = MACHINE_SPEC.transitions
+
+# Timed states: 'timeout' in seconds, 'on_timeout' is the trigger fired when it expires.
+# Timers are armed on entry and cancelled automatically on exit.
+STATE_TIMEOUTS = MACHINE_SPEC.timeouts
+
+def snapshot_spec_key(spec):
+    """Identity of the states/transitions and state timeouts a snapshot depends on (labels/notes excluded)."""
+    timeouts = json.dumps(spec.timeouts, sort_keys=True)
+    return hashlib.sha1(f"{spec.table['key']}:{timeouts}".encode('utf-8')).hexdigest()
+
+
+# Computed once: hashing the definition on every state change would cost more than the transition.
+SPEC_KEY = snapshot_spec_key(MACHINE_SPEC)
+
+# LED pattern shown in each state (LEDPatterns.LED_PATTERNS). In TouchDesignerInteractiveChecks the
+# pattern follows the gesture sequence cue; in FaultMode faulted boxes blink on top of it.
+STATE_LED_PATTERNS = {
+    'Attract': 'AttractRainbow',
+    'PowerOff': 'Off',
+    'WarmUpCycle': 'SlowPulseRainbow',
+    'ExtensionMode': 'SlowPulseWhite',
+    'RotationCheck': 'SlowPulseWhite',
+    'LinearCheck': 'SlowPulseWhite',
+    'TouchDesignerInteractiveChecks': 'SlowPulseBlue',
+    'FaultMode': 'FaultIdle',
+    'Attract_Intervention': 'SlowPulseOrange',
+    'GameMode': 'DimWhite',
+}
+FAULT_LED_OVERLAY = 'FaultBlink'
+
+# TouchDesignerInteractiveChecks: poses to hold, in order, while each LED cue shows.
+# 'target' is in input channel space (joystick X/Y or the normalized Kinect hand X/Y).
+INTERACTIVE_CHECK_SEQUENCE = [
+    {'name': 'SlowPulseBlue', 'target': (-0.8, 0.0), 'tolerance': 0.25, 'hold_s': 0.5},
+    {'name': 'SlowPulseOrange', 'target': (0.8, 0.0), 'tolerance': 0.25, 'hold_s': 0.5},
+    {'name': 'SlowPulseGreen', 'target': (0.0, 0.8), 'tolerance': 0.25, 'hold_s': 0.5},
+]
+
+
 class StateExtension:
     """
     Maestro FSM (TestStateModel) controlling high-level application flow for
@@ -15,6 +90,56 @@ class StateExtension:
     prevent the silent initialization failure during Extension bootstrapping.
     """
 
+    # Set to True to dispatch triggers through TransitionTable.CompiledMachine
+    # instead of the stock transitions.Machine event pipeline. Only the compiled
+    # engine reuses the cached spec table; the stock Machine rebuilds its events
+    # from MACHINE_SPEC's lists on every onInitTD.
+    USE_COMPILED_ENGINE = False
+
+    # Queued dispatch: ring buffer size, per-frame drain budget and triggers safe to coalesce.
+    TRIGGER_QUEUE_CAPACITY = 256
+    TRIGGER_FRAME_BUDGET_US = 2000
+    IDEMPOTENT_TRIGGERS = ('start_interaction',)
+
+    BOX_COUNT = DEFAULT_BOX_COUNT
+
+    # Joystick/Kinect input stage: sample rate of the blocks passed to process_input, the block
+    # columns the detectors read (None uses the block as given, e.g. a 2-axis joystick; (33, 34)
+    # is the right-hand X/Y of a 25-joint, joint-major x/y/z Kinect skeleton), seconds allowed
+    # between sequence steps, and mean motion per sample that counts as interaction.
+    INPUT_SAMPLE_RATE = 30
+    INPUT_CHANNELS = None
+    INTERACTIVE_STEP_TIMEOUT_S = 10.0
+    INTERACTION_MOTION_THRESHOLD = 0.02
+
+    # LED pattern engine (lookup tables are built in onInitTD at the project cook rate)
+    LED_ENABLED = True
+    LEDS_PER_BOX = 60
+    LED_CROSSFADE_S = 0.5
+
+    # Attract-mode autonomous motion: setpoints are generated this many frames ahead, per chunk
+    MOTION_CHUNK_FRAMES = 60
+
+    # Set to True to start hot-path timing in onInitTD (toggle later with enable/disable_instrumentation)
+    INSTRUMENTATION_ENABLED = False
+
+    # Guards memoized until their inputs change (box fleet / motor variance samples)
+    GUARD_CACHE_ENABLED = True
+    CACHED_GUARDS = ('check_all_aligned', '_check_motor_variance')
+
+    # Live-state snapshot kept in ownerComp storage across Re-Init Extensions / .toe reloads
+    SNAPSHOT_ENABLED = True
+    SNAPSHOT_KEY = 'fsm_snapshot'
+    SNAPSHOT_VERSION = 2
+
+    # Per-phase startup timings; start_state_machine.onStart stores its phases under this key first
+    STARTUP_PROFILE_KEY = 'startup_profile'
+
+    # Binary trigger journal for post-mortems (path relative to project.folder)
+    JOURNAL_ENABLED = False
+    JOURNAL_FILE = os.path.join('Logs', 'transition_journal.bin')
+    JOURNAL_CAPACITY = 65536
+
     def __init__(self, ownerComp):
         """
         Initializes essential attributes only, minimizing logic that might 
@@ -26,9 +151,68 @@ class StateExtension:
         self.animation_frame_offset = 0
         self.td_system_frame_start = 0
 
+        # Box fleet arrays (state codes, actuator position, rotation, locks) and per-box sub-machines
+        self.box_fleet = BoxFleet(self.BOX_COUNT)
+        self.box_models = self.box_fleet.models()
+        self.motor_variance = MotorVarianceMonitor(self.BOX_COUNT)
+
+        # Guard memoization; box transitions mark check_all_aligned dirty
+        self.guard_cache = GuardCache()
+        self.box_fleet.listeners.append(self._on_box_changed)
+
+        # Frame-clock timers for timed states (STATE_TIMEOUTS)
+        self.timer_wheel = TimerWheel()
+        self.state_timer = None
+        self.frame_rate = 60
+
+        # Hot-path timing (inactive and zero-overhead until enabled)
+        self.instrumentation = Instrumentation()
+
+        # Last state written to the snapshot (snapshots are only rewritten on a real state change)
+        self._snapshot_state = None
+
+        # Memory-mapped trigger journal (opened in onInitTD when JOURNAL_ENABLED)
+        self.journal = None
+
+        # Off-cook-thread device workers (started with start_hardware_io)
+        self.hardware_io = None
+
+        # Joystick/Kinect blocks -> interactive-check sequence and GameMode activity triggers
+        channels = None if self.INPUT_CHANNELS is None else list(self.INPUT_CHANNELS)
+        self._input_width_warned = None
+        self.input_stage = InputStage()
+        self.gesture_sequence = self.input_stage.add(
+            ['TouchDesignerInteractiveChecks'],
+            SequenceDetector(INTERACTIVE_CHECK_SEQUENCE, self.INPUT_SAMPLE_RATE, trigger='post_interactive_complete',
+                             channels=channels, max_gap_s=self.INTERACTIVE_STEP_TIMEOUT_S))
+        self.gesture_sequence.listeners.append(self._on_gesture_step)
+        self.activity_detector = self.input_stage.add(
+            ['Attract', 'GameMode'],
+            ActivityDetector(self.INPUT_SAMPLE_RATE, self.INTERACTION_MOTION_THRESHOLD,
+                             trigger='start_interaction', channels=channels))
+
+        # Per-state LED patterns rendered into led_engine.buffer by process_frame (built in onInitTD)
+        self.led_engine = None
+
+        # Attract autonomous motion; process_frame copies its setpoints into the box fleet (built in onInitTD)
+        self.motion = None
+
         # Initialize machine object to None
         self.machine = None
 
+        # Startup phase timings in ms (completed by onInitTD)
+        self.startup_profile = {}
+
+        # Shortest trigger paths between states (built in onInitTD, rebuilt after add_transition)
+        self.path_index = TriggerPathIndex(STATES, TRANSITIONS)
+
+        # Per-frame trigger queue (no TD dependencies, safe to build here)
+        self.trigger_queue = TriggerQueue(
+            capacity=self.TRIGGER_QUEUE_CAPACITY,
+            budget_us=self.TRIGGER_FRAME_BUDGET_US,
+            idempotent=self.IDEMPOTENT_TRIGGERS
+        )
+
         debug(f"StateExtension: Basic attributes initialized in __init__.")
 
     def onInitTD(self):
@@ -39,55 +223,494 @@ class StateExtension:
         pytransitions which dynamically decorate the model with attributes like '.state'.
         """
 
+        init_start = time.perf_counter()
+
         # --- 1. TD-Dependent Setup (Now Safe) ---
         # Accessing TD time objects like absTime.frame is now safe.
         self.td_system_frame_start = absTime.frame
+        self.frame_rate = project.cookRate
         debug(f"StateExtension: Deferred TD Initialization (onInitTD) started on Frame: {self.td_system_frame_start}")
 
         # --- 2. PyTransitions Machine Setup ---
 
-        # Define application states (Hierarchy/POST sequence checks)
-        states = [
-            'Attract', 'PowerOff', 'WarmUpCycle', 'ExtensionMode',
-            'RotationCheck', 'LinearCheck', 'TouchDesignerInteractiveChecks',
-            'FaultMode', 'Attract_Intervention', 'GameMode'
-        ]
+        # Guards are wrapped before the machine is built so the compiled engine binds the cached versions.
+        if self.GUARD_CACHE_ENABLED:
+            self.guard_cache.install(self, self.CACHED_GUARDS)
 
-        # Define transitions (Mandatory Power On Self Test (POST) flow and Fault handling)
-        transitions = [
-            {'trigger': 'power_on', 'source': 'Attract', 'dest': 'WarmUpCycle'},
-            {'trigger': 'warmup_complete', 'source': 'WarmUpCycle', 'dest': 'ExtensionMode'},
-            {'trigger': 'extension_check_complete', 'source': 'ExtensionMode', 'dest': 'RotationCheck'},
-            {'trigger': 'rotation_check_complete', 'source': 'RotationCheck', 'dest': 'LinearCheck'},
+        # Initialize the Hierarchical State Machine (HSM), binding dynamic methods/attributes to 'self'.
+        # The compiled engine keeps the same model surface but dispatches through a prebuilt table.
+        construct_start = time.perf_counter()
+        if self.USE_COMPILED_ENGINE:
+            self.machine = CompiledMachine(model=self, states=STATES, transitions=TRANSITIONS,
+                                           initial=MACHINE_SPEC.initial, after_state_change='_arm_state_timer',
+                                           spec=MACHINE_SPEC.table)
+        else:
+            self.machine = Machine(model=self, states=STATES, transitions=TRANSITIONS, initial=MACHINE_SPEC.initial,
+                                   after_state_change='_arm_state_timer')
+        construct_ms = (time.perf_counter() - construct_start) * 1000.0
 
-            # Linear Check Success/Failure Paths
-            {'trigger': 'linear_check_complete', 'source': 'LinearCheck', 'dest': 'TouchDesignerInteractiveChecks'},
-            {'trigger': 'linear_check_failure', 'source': 'LinearCheck', 'dest': 'FaultMode'},
+        debug(f"StateExtension: FSM Machine object created successfully in onInitTD. Initial state: {self.state}")
 
-            # Curator Intervention for Fault Mode
-            {'trigger': 'resume_from_fault', 'source': 'FaultMode', 'dest': 'Attract',
-             'before': 'set_box_locked_at_max'},
+        if self.SNAPSHOT_ENABLED:
+            self.restore_snapshot()
 
-            # Final POST stage complete
-            {'trigger': 'post_interactive_complete', 'source': 'TouchDesignerInteractiveChecks', 'dest': 'Attract'},
+        self.path_index.rebuild()
+        dead_states = self.path_index.dead_states('Attract')
+        if dead_states:
+            debug(f"WARNING: States unreachable from Attract: {dead_states}")
 
-            # Game Mode Interaction
-            {'trigger': 'start_interaction', 'source': 'Attract', 'dest': 'GameMode'},
-            {'trigger': 'start_interaction', 'source': 'GameMode', 'dest': 'GameMode', 'before': 'debug_reflexive'},
-        ]
+        # The journal wraps the trigger methods first; instrumentation then wraps (and later
+        # restores) the journaled methods, so both can be active at once.
+        if self.JOURNAL_ENABLED:
+            self.open_journal(os.path.join(project.folder, self.JOURNAL_FILE))
 
-        # Initialize the Hierarchical State Machine (HSM), binding dynamic methods/attributes to 'self'.
-        self.machine = Machine(model=self, states=states, transitions=transitions, initial='Attract')
+        if self.INSTRUMENTATION_ENABLED:
+            self.enable_instrumentation()
 
-        debug(f"StateExtension: FSM Machine object created successfully in onInitTD. Initial state: {self.state}")
+        if self.LED_ENABLED:
+            self.led_engine = LEDPatternEngine(self.BOX_COUNT, self.LEDS_PER_BOX, self.frame_rate,
+                                               crossfade_s=self.LED_CROSSFADE_S)
+            self._update_leds(crossfade=False)
 
+        self.motion = TrajectoryGenerator(self.BOX_COUNT, self.frame_rate, self.MOTION_CHUNK_FRAMES)
+        if self.state == 'Attract':
+            self._start_autonomous_motion()
+
+        self._record_startup(construct_ms, (time.perf_counter() - init_start) * 1000.0)
         return
 
+    def _record_startup(self, construct_ms, init_ms):
+        """Completes the startup profile begun in onStart and logs it."""
+        profile = dict(self.ownerComp.fetch(self.STARTUP_PROFILE_KEY, {}) or {})
+        profile['extension_import_ms'] = _IMPORT_MS
+        profile['machine_spec_ms'] = _SPEC_MS
+        profile['machine_spec_source'] = MACHINE_SPEC.source
+        profile['machine_construction_ms'] = construct_ms
+        profile['oninit_total_ms'] = init_ms
+        self.startup_profile = profile
+        self.ownerComp.store(self.STARTUP_PROFILE_KEY, profile)
+        debug("StartupProfile: " + ", ".join(f"{phase}={value:.2f}" if isinstance(value, float) else f"{phase}={value}"
+                                             for phase, value in profile.items()))
+
+    def onDestroyTD(self):
+        """TouchDesigner teardown hook (Re-Init Extensions / project close)."""
+        if self.SNAPSHOT_ENABLED and self.machine is not None:
+            self.save_snapshot()
+        self.stop_hardware_io()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    # --- Queued Trigger Dispatch ---
+
+    def queue_trigger(self, trigger_name, *args, **kwargs):
+        """
+        Queues a trigger for the next process_frame() instead of firing it
+        synchronously. Use from CHOP/DAT callbacks that can fire in bursts.
+        """
+        dropped = self.trigger_queue.dropped
+        self.trigger_queue.push(trigger_name, *args, **kwargs)
+        if self.trigger_queue.dropped != dropped:
+            debug(f"WARNING: Trigger queue full, dropped '{trigger_name}'.")
+
+    def process_frame(self):
+        """
+        Drains the trigger queue once per frame (keyed off absTime.frame), so it is
+        safe to call from several Execute DATs. Leftovers beyond the frame budget
+        are deferred to the next frame. Hardware events are moved into the trigger
+        queue first, and state timers advance after the queue, so a check that
+        completed this frame cancels its timeout before it can fire.
+        """
+        if self.machine is None:
+            return 0
+        if self.hardware_io is not None:
+            self.hardware_io.drain(self.queue_trigger)
+        # Safety net for guard inputs that change without an explicit invalidate()
+        self.guard_cache.invalidate_all()
+        processed = self.trigger_queue.drain(absTime.frame, self._fire_trigger)
+        self.timer_wheel.advance(absTime.frame - self.td_system_frame_start)
+        if self.motion is not None and self.motion.active:
+            rotation, linear = self.motion.next_frame()
+            np.copyto(self.box_fleet.rotation_angle, rotation)
+            np.copyto(self.box_fleet.actuator_position, linear)
+        if self.led_engine is not None:
+            self.led_engine.render(absTime.frame)
+        return processed
+
+    def _fire_trigger(self, trigger_name, *args, **kwargs):
+        # Resolved through the model attribute so instrumentation wrappers see queued triggers too.
+        return getattr(self, trigger_name)(*args, **kwargs)
+
+    # --- Snapshot / Restore ---
+
+    def capture_snapshot(self):
+        """Compact, picklable snapshot of the live FSM state (plain types and bytes only)."""
+        fleet = self.box_fleet
+        return {
+            'version': self.SNAPSHOT_VERSION,
+            'spec_key': SPEC_KEY,
+            'state': self.state,
+            'animation_frame_offset': self.motion.frame if self.motion is not None and self.motion.active
+            else self.animation_frame_offset,
+            'box_count': fleet.count,
+            'box_state_codes': fleet.state_codes.tobytes(),
+            'locked_at_max': fleet.locked_at_max.tobytes(),
+            'actuator_position': fleet.actuator_position.tobytes(),
+            'rotation_angle': fleet.rotation_angle.tobytes(),
+            'motor_latched': self.motor_variance.latched.tobytes(),
+            'motor_samples': self.motor_variance.samples,
+            'motor_mean': self.motor_variance.mean.tobytes(),
+            'motor_m2': self.motor_variance.m2.tobytes(),
+            'timer_remaining': self.timer_wheel.remaining(self.state_timer),
+        }
+
+    def save_snapshot(self, path=None):
+        """Stores the snapshot in ownerComp storage, or pickles it to 'path' when given."""
+        snapshot = self.capture_snapshot()
+        if path is None:
+            self.ownerComp.store(self.SNAPSHOT_KEY, snapshot)
+        else:
+            with open(path, 'wb') as handle:
+                pickle.dump(snapshot, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        self._snapshot_state = snapshot['state']
+        return snapshot
+
+    def restore_snapshot(self, path=None):
+        """
+        Restores a snapshot from ownerComp storage (or 'path') without running any
+        entry callbacks: the state is set directly, box/lock arrays are copied back
+        and the pending state timer is re-armed with its remaining frames.
+        Returns True when a compatible snapshot was applied.
+        """
+        if path is None:
+            snapshot = self.ownerComp.fetch(self.SNAPSHOT_KEY, None)
+        elif os.path.exists(path):
+            with open(path, 'rb') as handle:
+                snapshot = pickle.load(handle)
+        else:
+            snapshot = None
+
+        if not snapshot:
+            return False
+        if (snapshot.get('version') != self.SNAPSHOT_VERSION
+                or snapshot.get('spec_key') != SPEC_KEY
+                or snapshot.get('box_count') != self.box_fleet.count):
+            debug("WARNING: Stored FSM snapshot does not match the current spec; starting from Attract.")
+            return False
+
+        fleet = self.box_fleet
+        fleet.state_codes[:] = np.frombuffer(snapshot['box_state_codes'], dtype=fleet.state_codes.dtype)
+        fleet.locked_at_max[:] = np.frombuffer(snapshot['locked_at_max'], dtype=bool)
+        fleet.actuator_position[:] = np.frombuffer(snapshot['actuator_position'], dtype=fleet.actuator_position.dtype)
+        fleet.rotation_angle[:] = np.frombuffer(snapshot['rotation_angle'], dtype=fleet.rotation_angle.dtype)
+        fleet.recount()
+        motor_variance = self.motor_variance
+        motor_variance.latched[:] = np.frombuffer(snapshot['motor_latched'], dtype=bool)
+        motor_variance.samples = snapshot['motor_samples']
+        motor_variance.mean[:] = np.frombuffer(snapshot['motor_mean'], dtype=np.float64)
+        motor_variance.m2[:] = np.frombuffer(snapshot['motor_m2'], dtype=np.float64)
+        self.animation_frame_offset = snapshot['animation_frame_offset']
+
+        self.machine.set_state(snapshot['state'])
+        self.guard_cache.invalidate_all()
+        self.timer_wheel.cancel(self.state_timer)
+        self.state_timer = None
+        remaining = snapshot['timer_remaining']
+        spec = STATE_TIMEOUTS.get(self.state)
+        if spec is None:
+            remaining = None  # the state is no longer timed
+        if remaining is not None:
+            self.state_timer = self.timer_wheel.schedule(remaining, self._on_state_timeout, self.state,
+                                                         spec['on_timeout'])
+        self._snapshot_state = self.state
+        debug(f"StateExtension: Restored snapshot. State: {self.state}, timer: {remaining} frames remaining.")
+        return True
+
+    # --- Navigation / Recovery ---
+
+    def add_transition(self, trigger, source, dest, **kwargs):
+        """Adds a transition at runtime and invalidates the cached path index."""
+        self.machine.add_transition(trigger, source, dest, **kwargs)
+        self.path_index.add_transition(dict(kwargs, trigger=trigger, source=source, dest=dest))
+
+    def goto(self, state, mode='replay'):
+        """
+        Moves the machine to 'state'.
+        mode='replay' fires the shortest trigger sequence, running every callback, and
+        stops (returning False) as soon as a step is blocked or a guard sends the
+        machine somewhere other than the planned state.
+        mode='jump' sets the state directly without transition callbacks, then arms
+        the state's timer and starts/stops Attract's autonomous motion to match.
+        Returns True once the machine is in 'state'.
+        """
+        if mode == 'jump':
+            self.machine.set_state(state)
+            self._sync_autonomous_motion()
+            self._arm_state_timer()
+            debug(f"GOTO: Jumped to {state}.")
+            return True
+        if mode != 'replay':
+            raise ValueError(f"Unknown goto mode '{mode}' (expected 'replay' or 'jump').")
+
+        route = self.path_index.route(self.state, state)
+        if route is None:
+            debug(f"GOTO: {state} is unreachable from {self.state}.")
+            return False
+        for trigger_name, planned in route:
+            source = self.state
+            try:
+                getattr(self, trigger_name)()
+            except MachineError:
+                debug(f"GOTO: '{trigger_name}' is not valid in {source}.")
+                return False
+            if self.state != planned:
+                reason = "was blocked by a guard" if self.state == source else f"went to {self.state} instead"
+                debug(f"GOTO: '{trigger_name}' {reason} (planned {source} -> {planned}).")
+                return False
+        debug(f"GOTO: Replayed {[trigger for trigger, _ in route]} to reach {state}.")
+        return self.state == state
+
+    def reachable_states(self, source=None):
+        """States reachable through triggers from 'source' (default: the current state)."""
+        return self.path_index.reachable_from(source or self.state)
+
+    # --- Hardware I/O ---
+
+    def start_hardware_io(self, controllers):
+        """
+        Starts one DeviceWorker thread per controller. Their decoded events
+        (e.g. extension_check_complete, linear_check_failure(box_id=4)) are
+        drained into the trigger queue by process_frame() on the cook thread.
+        """
+        self.stop_hardware_io()
+        self.hardware_io = HardwareIO(controllers)
+        self.hardware_io.start()
+        debug(f"StateExtension: Hardware I/O started with {len(self.hardware_io.workers)} device workers.")
+
+    def stop_hardware_io(self):
+        """Stops the device workers (must run before the extension is re-initialised)."""
+        if self.hardware_io is not None:
+            self.hardware_io.stop()
+            self.hardware_io = None
+
+    # --- Joystick / Kinect Input ---
+
+    def process_input(self, block):
+        """
+        Feeds a (samples, channels) block of joystick axes or Kinect joint samples
+        (e.g. a CHOP's numpyArray().T) to the detectors for the current state.
+        Detected gestures are queued as triggers for the next process_frame().
+        """
+        if self.machine is None:
+            return 0
+        channels = self.INPUT_CHANNELS
+        if channels is not None:
+            width = np.shape(block)[-1]
+            if width <= max(channels):
+                if width != self._input_width_warned:
+                    self._input_width_warned = width
+                    debug(f"WARNING: {width}-channel input block has no columns {tuple(channels)} "
+                          f"(INPUT_CHANNELS); blocks of this width are ignored.")
+                return 0
+        return self.input_stage.process(self.state, block, self.queue_trigger)
+
+    def on_enter_TouchDesignerInteractiveChecks(self):
+        """Restarts the gesture sequence at the first LED cue."""
+        self.gesture_sequence.reset()
+        debug(f"CALLBACK: Interactive checks started. LED cue: {self.gesture_sequence.current_cue}")
+
+    def _on_gesture_step(self, step, name):
+        debug(f"CALLBACK: Interactive check step {step + 1} ({name}) completed.")
+        if self.led_engine is not None:
+            names = self.gesture_sequence.names
+            self.led_engine.set_pattern(names[(step + 1) % len(names)], absTime.frame)
+
+    # --- Attract Autonomous Motion ---
+
+    def on_enter_Attract(self):
+        """Motors set to autonomous motion, resuming the animation at animation_frame_offset."""
+        self._start_autonomous_motion()
+
+    def on_exit_Attract(self):
+        if self.motion is not None and self.motion.active:
+            self.animation_frame_offset = self.motion.stop()
+
+    def _sync_autonomous_motion(self):
+        """Starts/stops autonomous motion to match the state after set_state (which skips on_enter/on_exit)."""
+        if self.motion is None:
+            return
+        if self.state == 'Attract' and not self.motion.active:
+            self._start_autonomous_motion()
+        elif self.state != 'Attract' and self.motion.active:
+            self.on_exit_Attract()
+
+    def _start_autonomous_motion(self):
+        if self.motion is None:
+            return
+        fleet = self.box_fleet
+        self.motion.start(self.animation_frame_offset, fleet.rotation_angle, fleet.actuator_position,
+                          fleet.locked_at_max)
+        debug(f"CALLBACK: Autonomous motion started at animation frame {self.animation_frame_offset}.")
+
+    # --- LED Patterns ---
+
+    def _update_leds(self, crossfade=True):
+        """Selects the current state's pattern (and the fault overlay in FaultMode)."""
+        if self.led_engine is None:
+            return
+        pattern = STATE_LED_PATTERNS.get(self.state, 'Off')
+        if self.state == 'TouchDesignerInteractiveChecks':
+            pattern = self.gesture_sequence.current_cue
+        self.led_engine.set_pattern(pattern, absTime.frame, crossfade=crossfade)
+        self._update_fault_overlay()
+
+    def _update_fault_overlay(self):
+        if self.state == 'FaultMode':
+            self.led_engine.set_overlay(FAULT_LED_OVERLAY, self.box_fleet.in_state(FAULT))
+        else:
+            self.led_engine.set_overlay(None)
+
+    # --- Timed States ---
+
+    def _arm_state_timer(self, *args, **kwargs):
+        """after_state_change hook: cancels the previous state's timer and arms the new one."""
+        if self.instrumentation.enabled:
+            self.instrumentation.state_changed(self.state)
+        self._update_leds()
+        # Motion is measured from samples seen in this state, not from the last block of the previous one.
+        self.activity_detector.reset()
+        self.timer_wheel.cancel(self.state_timer)
+        self.state_timer = None
+        spec = STATE_TIMEOUTS.get(self.state)
+        if spec is not None:
+            delay_frames = round(spec['timeout'] * self.frame_rate)
+            self.state_timer = self.timer_wheel.schedule(delay_frames, self._on_state_timeout, self.state, spec['on_timeout'])
+        # Saved last, so the snapshot carries the new state's timer rather than the previous one.
+        if self.SNAPSHOT_ENABLED and self.state != self._snapshot_state:
+            self.save_snapshot()
+
+    def _on_state_timeout(self, state, trigger_name):
+        """Fires the state's on_timeout trigger (ignored if the state has already been left)."""
+        if self.state != state:
+            return
+        debug(f"TIMEOUT: {state} expired after {STATE_TIMEOUTS[state]['timeout']}s. Firing '{trigger_name}'.")
+        self.state_timer = None
+        # Resolved through the model attribute (as in _fire_trigger) so the journal and
+        # instrumentation wrappers record unattended timeouts too.
+        getattr(self, trigger_name)()
+
+    # --- Instrumentation ---
+
+    def enable_instrumentation(self):
+        """Starts timing every trigger and transition callback, plus time-in-state totals."""
+        triggers = list(dict.fromkeys(transition['trigger'] for transition in TRANSITIONS))
+        callbacks = []
+        for transition in TRANSITIONS:
+            for key in ('prepare', 'conditions', 'unless', 'before', 'after'):
+                names = transition.get(key) or []
+                callbacks.extend([names] if isinstance(names, str) else names)
+        for state in STATES:
+            callbacks.extend(name for name in ('on_enter_' + state, 'on_exit_' + state) if hasattr(self, name))
+        callbacks.append('_arm_state_timer')
+
+        self.instrumentation.enable(self, triggers, list(dict.fromkeys(callbacks)), STATES, self.state)
+        if isinstance(self.machine, CompiledMachine):
+            self.machine.refresh_callbacks()
+        debug(f"StateExtension: Instrumentation enabled ({len(self.instrumentation.names)} timed entries).")
+
+    def disable_instrumentation(self):
+        """Restores the unwrapped triggers/callbacks; collected data is kept."""
+        self.instrumentation.disable(self)
+        if isinstance(self.machine, CompiledMachine):
+            self.machine.refresh_callbacks()
+
+    def write_stats_tables(self, timing_dat=None, state_dat=None, transition_dat=None):
+        """Writes instrumentation tables into Table DATs (any argument may be omitted)."""
+        for dat, rows in ((timing_dat, self.instrumentation.timing_table),
+                          (state_dat, self.instrumentation.state_table),
+                          (transition_dat, self.instrumentation.transition_table)):
+            if dat is None:
+                continue
+            dat.clear()
+            for row in rows():
+                dat.appendRow(row)
+
+    # --- Transition Journal ---
+
+    def open_journal(self, path):
+        """Starts journaling every trigger call into a memory-mapped ring file at 'path'."""
+        triggers = list(dict.fromkeys(transition['trigger'] for transition in TRANSITIONS))
+        guards = list(dict.fromkeys(name for transition in TRANSITIONS for key in ('conditions', 'unless')
+                                    for name in ([transition[key]] if isinstance(transition.get(key), str)
+                                                 else transition.get(key) or [])))
+        self.journal = TransitionJournal(path, STATES, triggers, guards, capacity=self.JOURNAL_CAPACITY)
+        self.journal.attach(self, lambda: absTime.frame)
+        if isinstance(self.machine, CompiledMachine):
+            self.machine.refresh_callbacks()
+        debug(f"StateExtension: Transition journal open at {path} ({self.journal.count} records).")
+
+    # --- LinearCheck (Min Travel Variance) ---
+
+    def on_enter_LinearCheck(self):
+        """Starts a fresh min-travel variance run."""
+        self.motor_variance.reset()
+        self.guard_cache.invalidate('_check_motor_variance')
+
+    def update_motor_travel(self, travel):
+        """Feeds one min-travel reading per linear actuator (float64 array, controller rate)."""
+        self.motor_variance.update(travel)
+        self.guard_cache.invalidate('_check_motor_variance')
+
+    def evaluate_linear_check(self):
+        """Fires linear_check_complete, or linear_check_failure with the tripped box_id."""
+        box_id = self.motor_variance.tripped_box_id()
+        if box_id is None:
+            return self.linear_check_complete()
+        return self.linear_check_failure(box_id=box_id)
+
+    def _check_motor_variance(self, box_id=None):
+        """Guard for linear_check_complete/linear_check_failure: no actuator over the variance threshold."""
+        return self.motor_variance.passes()
+
+    def _report_linear_fault(self, box_id=None):
+        """Latches a failure reported with the trigger (linear_check_failure(box_id=...))."""
+        if box_id is not None:
+            self.motor_variance.report_failure(box_id)
+            self.guard_cache.invalidate('_check_motor_variance')
+
+    def _record_linear_fault(self, box_id=None):
+        """Marks every tripped box as faulted on the way into FaultMode."""
+        tripped = self.motor_variance.tripped_mask()
+        self.box_fleet.fault_mask(tripped)
+        debug(f"CALLBACK: LinearCheck failed. Min travel variance tripped on boxes: {self.box_fleet.box_ids_where(tripped)}")
+
     # --- Example Callback and Utility Methods ---
 
-    def set_box_locked_at_max(self):
-        """Action required to resume from FaultMode: locking the linear actuator."""
-        debug("CALLBACK: Curator action detected. Locking Linear Actuator at Max.")
+    def set_box_locked_at_max(self, box_id=None):
+        """
+        Action required to resume from FaultMode: locking the linear actuator.
+        Without a box_id (the resume_from_fault callback) every faulted box is locked.
+        """
+        fleet = self.box_fleet
+        mask = fleet.in_state(FAULT) if box_id is None else fleet.mask_for([box_id])
+        fleet.lock_set(mask)
+        fleet.clear_faults(mask)
+        if self.motion is not None:
+            # Locked actuators are excluded from linear movement (held at max).
+            self.motion.set_lock_mask(fleet.locked_at_max)
+        self.motor_variance.clear_mask(mask)
+        self.guard_cache.invalidate('_check_motor_variance')
+        debug(f"CALLBACK: Curator action detected. Locking Linear Actuator at Max: {fleet.box_ids_where(mask)}")
+
+    def _on_box_changed(self, box_id, source, dest):
+        """BoxFleet listener: any box transition can change the alignment guard (and the fault LEDs)."""
+        self.guard_cache.invalidate('check_all_aligned')
+        if self.led_engine is not None and self.machine is not None:
+            self._update_fault_overlay()
+
+    def check_all_aligned(self):
+        """Guard for leaving GameMode: every box Aligned (incrementally maintained count)."""
+        return self.box_fleet.all_aligned()
 
     def on_enter_GameMode(self):
         """Callback that fires when entering the GameMode state."""
@@ -106,6 +729,11 @@ class StateExtension:
 # 1. Ensure the pytransitions library is installed in your V-Env and the path is added to sys.path (as confirmed in your trace from the Execute DAT onStart).
 # 2. In your TouchDesigner network, ensure the Base COMP named 'State' contains a Text DAT named 'StateExtension'.
 # 3. Paste the entire content of this file into the 'StateExtension' DAT.
+#    Add sibling Text DATs for the helper modules in Python/Extensions (TransitionTable, TriggerQueue,
+#    BoxFleet, ...), each named after its file so the extension can import them by name.
+#    LED output: a Script CHOP whose onCook does
+#    scriptOp.copyNumpyArray(op('/project1/State').ext.StateExtension.led_engine.buffer)
+#    (r, g, b channels, one sample per pixel), cooked after the Execute DAT calls process_frame.
 # 4. On the 'State' COMP's Extension Parameters page, set the following clean values:
 #    a. Extension Object: StateExtension(me) 
 #    b. Extension Name: (Leave Blank, access via .ext.StateExtension)
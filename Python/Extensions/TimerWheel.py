@@ -0,0 +1,75 @@
+# TimerWheel.py
+# Hashed timer wheel driven by the TouchDesigner frame clock.
+
+
+class Timer:
+    """Handle returned by TimerWheel.schedule(); pass it to cancel()."""
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class TimerWheel:
+    """
+    Frame-based timers hashed into a fixed ring of slots by deadline.
+
+    advance() visits only the slot for each elapsed frame, so the per-frame cost
+    is O(1) amortized no matter how many timers are armed; cancel() just flags
+    the handle and the slot drops it the next time it comes round.
+
+    Frames are relative (the extension passes absTime.frame - td_system_frame_start).
+    """
+
+    def __init__(self, slots=512):
+        self.slot_count = slots
+        self._slots = [[] for _ in range(slots)]
+        self.frame = 0
+        self.armed = 0
+
+    def schedule(self, delay_frames, callback, *args):
+        """Arms a timer that calls callback(*args) after 'delay_frames' frames (minimum 1)."""
+        timer = Timer(self.frame + max(1, int(delay_frames)), callback, args)
+        self._slots[timer.deadline % self.slot_count].append(timer)
+        self.armed += 1
+        return timer
+
+    def cancel(self, timer):
+        """Disarms a timer. Safe to call with None or an already fired/cancelled timer."""
+        if timer is not None and not timer.cancelled:
+            timer.cancelled = True
+            self.armed -= 1
+
+    def advance(self, frame):
+        """Fires every timer due up to and including 'frame'. Returns the number fired."""
+        fired = 0
+        while self.frame < frame:
+            self.frame += 1
+            index = self.frame % self.slot_count
+            slot = self._slots[index]
+            if not slot:
+                continue
+
+            # Swap in a fresh list so callbacks can safely schedule into this slot.
+            self._slots[index] = []
+            for timer in slot:
+                if timer.cancelled:
+                    continue
+                if timer.deadline > self.frame:
+                    self._slots[index].append(timer)
+                    continue
+                timer.cancelled = True
+                self.armed -= 1
+                timer.callback(*timer.args)
+                fired += 1
+        return fired
+
+    def remaining(self, timer):
+        """Frames left before 'timer' fires, or None if it is no longer armed."""
+        if timer is None or timer.cancelled:
+            return None
+        return timer.deadline - self.frame
@@ -0,0 +1,182 @@
+# TransitionJournal.py
+# Memory-mapped, fixed-size binary journal of every FSM trigger.
+import json
+import mmap
+import os
+import struct
+
+from transitions.core import MachineError
+
+JOURNAL_MAGIC = b'EEJ1'
+JOURNAL_VERSION = 2
+HEADER_SIZE = 4096
+
+# magic, version, record size, capacity, records written (monotonic), name table length
+HEADER = struct.Struct('<4sHHIQI')
+COUNT_OFFSET = 12           # byte offset of 'records written' within HEADER
+
+# frame, source state id, dest state id, trigger id, payload (box_id or NO_PAYLOAD),
+# guards evaluated (bit per guard), guards that passed
+RECORD = struct.Struct('<qHHHhBB')
+MAX_GUARDS = 8
+
+NO_TRANSITION = 0xFFFE      # trigger was valid but its conditions blocked the transition
+INVALID_TRIGGER = 0xFFFF    # trigger raised MachineError in the source state
+NO_PAYLOAD = -1
+
+
+class TransitionJournal:
+    """
+    Append-only ring of 18-byte trigger records in a memory-mapped file.
+
+    Each record is (frame, source, dest, trigger, payload, guards) with states
+    and triggers stored as integer IDs; the ID -> name tables live in the file
+    header so a journal can be decoded without the extension. 'guards' are two
+    bit sets over the journaled guard names: which guards the trigger evaluated
+    and which of them passed, so a replay can reproduce guarded transitions
+    without the box alignment / travel inputs behind them. Appends are a
+    single struct.pack_into into the mapping, and the OS writes the pages back,
+    so the journal survives a TouchDesigner crash without any text logging.
+    """
+
+    def __init__(self, path, states, triggers, guards=(), capacity=65536):
+        self.path = path
+        self.states = list(states)
+        self.triggers = list(triggers)
+        self.guards = list(guards)
+        self.capacity = capacity
+        self.state_ids = {state: index for index, state in enumerate(self.states)}
+        self.trigger_ids = {trigger: index for index, trigger in enumerate(self.triggers)}
+        if len(self.guards) > MAX_GUARDS:
+            raise ValueError(f"At most {MAX_GUARDS} guards can be journaled.")
+
+        # Guard bits collected while the current trigger runs
+        self._evaluated = 0
+        self._passed = 0
+
+        names = json.dumps({'states': self.states, 'triggers': self.triggers,
+                            'guards': self.guards}).encode('utf-8')
+        if HEADER.size + len(names) > HEADER_SIZE:
+            raise ValueError("Journal name table does not fit in the header.")
+        self._names = names
+
+        size = HEADER_SIZE + capacity * RECORD.size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+        self._file = open(path, 'r+b')
+        if os.path.getsize(path) != size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        self.count = self._resume_count()
+        HEADER.pack_into(self._map, 0, JOURNAL_MAGIC, JOURNAL_VERSION, RECORD.size, capacity, self.count, len(names))
+        self._map[HEADER.size:HEADER.size + len(names)] = names
+
+    def _resume_count(self):
+        """Keeps appending to an existing journal with the same layout, otherwise starts fresh."""
+        magic, version, record_size, capacity, count, names_length = HEADER.unpack_from(self._map, 0)
+        if (magic, version, record_size, capacity) != (JOURNAL_MAGIC, JOURNAL_VERSION, RECORD.size, self.capacity):
+            return 0
+        if bytes(self._map[HEADER.size:HEADER.size + names_length]) != self._names:
+            return 0
+        return count
+
+    # --- 1. RECORDING ---
+
+    def append(self, frame, source_id, dest_id, trigger_id, payload=NO_PAYLOAD, evaluated=0, passed=0):
+        offset = HEADER_SIZE + (self.count % self.capacity) * RECORD.size
+        RECORD.pack_into(self._map, offset, frame, source_id, dest_id, trigger_id, payload, evaluated, passed)
+        self.count += 1
+        struct.pack_into('<Q', self._map, COUNT_OFFSET, self.count)
+
+    def attach(self, model, frame_source):
+        """
+        Wraps the model's trigger methods so every call is journaled, including
+        blocked and invalid triggers, and the guard methods so each record
+        carries the guard outcomes its trigger saw. 'frame_source' returns the
+        current frame. A CompiledMachine must refresh_callbacks() afterwards.
+        """
+        for trigger in self.triggers:
+            setattr(model, trigger, self._wrap(model, getattr(model, trigger), self.trigger_ids[trigger], frame_source))
+        for index, guard in enumerate(self.guards):
+            setattr(model, guard, self._wrap_guard(getattr(model, guard), 1 << index))
+
+    def _wrap(self, model, func, trigger_id, frame_source):
+        append = self.append
+        state_ids = self.state_ids
+
+        def journaled(*args, **kwargs):
+            source_id = state_ids[model.state]
+            payload = kwargs.get('box_id', args[0] if args and isinstance(args[0], int) else NO_PAYLOAD)
+            outer = self._evaluated, self._passed
+            self._evaluated = self._passed = 0
+            try:
+                result = func(*args, **kwargs)
+            except MachineError:
+                append(frame_source(), source_id, INVALID_TRIGGER, trigger_id, payload, self._evaluated, self._passed)
+                raise
+            finally:
+                guards = self._evaluated, self._passed
+                self._evaluated, self._passed = outer
+            append(frame_source(), source_id, state_ids[model.state] if result else NO_TRANSITION, trigger_id, payload,
+                   *guards)
+            return result
+
+        return journaled
+
+    def _wrap_guard(self, func, bit):
+        def journaled_guard(*args, **kwargs):
+            result = func(*args, **kwargs)
+            self._evaluated |= bit
+            if result:
+                self._passed |= bit
+            else:
+                self._passed &= ~bit
+            return result
+
+        return journaled_guard
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+
+def read_journal(path):
+    """
+    Decodes a journal file. Returns (states, triggers, records) with records in
+    append order as (frame, source, dest, trigger, payload, guards) tuples; dest is
+    None for blocked triggers and 'INVALID' for triggers that raised MachineError,
+    and guards maps each guard the trigger evaluated to its (last) outcome.
+    """
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    magic, version, record_size, capacity, count, names_length = HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or record_size != RECORD.size:
+        raise ValueError(f"Not a transition journal: {path}")
+    names = json.loads(data[HEADER.size:HEADER.size + names_length].decode('utf-8'))
+    states, triggers, guard_names = names['states'], names['triggers'], names['guards']
+
+    records = []
+    first = max(0, count - capacity)
+    for index in range(first, count):
+        frame, source_id, dest_id, trigger_id, payload, evaluated, passed = RECORD.unpack_from(
+            data, HEADER_SIZE + (index % capacity) * RECORD.size)
+        if dest_id == INVALID_TRIGGER:
+            dest = 'INVALID'
+        elif dest_id == NO_TRANSITION:
+            dest = None
+        else:
+            dest = states[dest_id]
+        guards = {guard: bool(passed >> bit & 1) for bit, guard in enumerate(guard_names) if evaluated >> bit & 1}
+        records.append((frame, states[source_id], dest, triggers[trigger_id],
+                        None if payload == NO_PAYLOAD else payload, guards))
+    return states, triggers, records
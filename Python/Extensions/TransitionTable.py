@@ -0,0 +1,279 @@
+# TransitionTable.py
+# Compiled (state x trigger) dispatch engine for the Maestro FSM.
+import hashlib
+
+from transitions.core import MachineError
+
+
+# Note: This module has no TouchDesigner dependencies so it can be imported by
+# the StateExtension DAT and by the headless scripts alike.
+
+CALLBACK_KEYS = ('prepare', 'conditions', 'unless', 'before', 'after')
+
+# Compiled specs by spec_key(), shared by every CompiledMachine built in this process
+_SPEC_CACHE = {}
+
+
+def spec_key(states, transitions, auto_transitions=True):
+    """Stable content hash of a states/transitions definition."""
+    canonical = repr((list(states), [sorted(transition.items()) for transition in transitions], auto_transitions))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def _as_tuple(callbacks):
+    if callbacks is None:
+        return ()
+    if isinstance(callbacks, str) or callable(callbacks):
+        return (callbacks,)
+    return tuple(callbacks)
+
+
+def _sources(source, states):
+    if source == '*':
+        return states
+    if isinstance(source, str):
+        return [source]
+    return list(source)
+
+
+def compile_spec(states, transitions, auto_transitions=True):
+    """
+    Compiles states/transitions into a model-independent spec made of plain
+    tuples and dicts: the trigger list and the dense (state x trigger) cell
+    table, with callbacks still as names. Specs are cached by content hash,
+    so rebuilding a machine from an unchanged definition skips this step.
+    """
+    key = spec_key(states, transitions, auto_transitions)
+    spec = _SPEC_CACHE.get(key)
+    if spec is not None:
+        return spec
+
+    states = list(states)
+    state_index = {state: index for index, state in enumerate(states)}
+    triggers = list(dict.fromkeys(transition['trigger'] for transition in transitions))
+    if auto_transitions:
+        triggers.extend('to_' + state for state in states if 'to_' + state not in triggers)
+    trigger_index = {trigger: index for index, trigger in enumerate(triggers)}
+    n_triggers = len(triggers)
+
+    cells = [[] for _ in range(len(states) * n_triggers)]
+    for transition in transitions:
+        trigger_idx = trigger_index[transition['trigger']]
+        entry = (state_index[transition['dest']],) + tuple(_as_tuple(transition.get(key)) for key in CALLBACK_KEYS)
+        for source in _sources(transition['source'], states):
+            cells[state_index[source] * n_triggers + trigger_idx].append(entry)
+
+    if auto_transitions:
+        for dest_idx, state in enumerate(states):
+            trigger_idx = trigger_index['to_' + state]
+            for source_idx in range(len(states)):
+                cell = cells[source_idx * n_triggers + trigger_idx]
+                if not cell:
+                    cell.append((dest_idx, (), (), (), (), ()))
+
+    spec = {
+        'key': key,
+        'states': tuple(states),
+        'triggers': tuple(triggers),
+        # Empty cells become None so an invalid trigger is a single identity check.
+        'cells': tuple(tuple(cell) if cell else None for cell in cells),
+    }
+    _SPEC_CACHE[key] = spec
+    return spec
+
+
+def register_spec(spec):
+    """Adds a spec compiled elsewhere (e.g. loaded from a disk cache) to the in-process cache."""
+    return _SPEC_CACHE.setdefault(spec['key'], spec)
+
+
+class CompiledMachine:
+    """
+    Optional drop-in replacement for transitions.Machine on the cook thread.
+
+    The 'states'/'transitions' lists are compiled once into a dense integer
+    table indexed by (state_index * trigger_count + trigger_index). Each cell
+    holds the candidate transitions with their callbacks already resolved to
+    bound callables, so a trigger is a list lookup plus direct calls instead of
+    building an EventData and resolving callbacks by name.
+
+    The model surface matches the stock Machine: '.state', 'is_<State>()',
+    one method per trigger, 'to_<State>()' auto transitions and 'trigger(name)'.
+
+    A precompiled 'spec' (from compile_spec) can be passed in to skip compilation,
+    e.g. MachineSpec's 'table', loaded from the content-hash cache next to the spec file;
+    it must have been compiled from the same states/transitions (ValueError otherwise).
+    """
+
+    def __init__(self, model, states, transitions, initial, auto_transitions=True, name='',
+                 after_state_change=None, spec=None):
+        self.model = model
+        self.name = name
+        self.auto_transitions = auto_transitions
+        self.after_state_change = after_state_change
+
+        self.states = list(states)
+        self.state_index = {state: index for index, state in enumerate(self.states)}
+        self.transitions = [dict(transition) for transition in transitions]
+        self._bound = set()
+        self._trigger_slots = {}
+
+        if spec is not None:
+            key = spec_key(self.states, self.transitions, auto_transitions)
+            if spec['key'] != key:
+                raise ValueError("Precompiled spec %s does not match the given states/transitions (%s)"
+                                 % (spec['key'][:12], key[:12]))
+        self.spec = spec if spec is not None else compile_spec(self.states, self.transitions, auto_transitions)
+        self._bind_spec()
+
+        # Bind the initial state without firing entry callbacks (matches Machine).
+        self.state_idx = self.state_index[initial]
+        self.model.state = initial
+        self._bind_model()
+
+    # --- 1. BINDING ---
+
+    def _bind_spec(self):
+        """Resolves the spec's callback names against the model into the dispatch table."""
+        self.triggers = list(self.spec['triggers'])
+        self.trigger_index = {trigger: index for index, trigger in enumerate(self.triggers)}
+        self._n_triggers = len(self.triggers)
+
+        resolved = {}
+        table = []
+        for cell in self.spec['cells']:
+            if cell is None:
+                table.append(None)
+                continue
+            entries = []
+            for entry in cell:
+                if entry not in resolved:
+                    resolved[entry] = (entry[0],) + tuple(self._resolve(callbacks) for callbacks in entry[1:])
+                entries.append(resolved[entry])
+            table.append(tuple(entries))
+        self._table = table
+
+        self._on_enter = [self._resolve(self._model_callback('on_enter_' + state)) for state in self.states]
+        self._on_exit = [self._resolve(self._model_callback('on_exit_' + state)) for state in self.states]
+        self._after_state_change = self._resolve(self.after_state_change)
+
+    def _model_callback(self, name):
+        return name if callable(getattr(self.model, name, None)) else None
+
+    def _resolve(self, callbacks):
+        """Resolves callback names against the model once, at bind time."""
+        return tuple(getattr(self.model, cb) if isinstance(cb, str) else cb for cb in _as_tuple(callbacks))
+
+    def _bind_model(self):
+        """
+        Adds trigger and 'is_<State>' methods to the model, never overriding existing ones.
+        Triggers bound by an earlier compile keep their method (and any journal,
+        instrumentation or guard wrapper installed around it); only the table index
+        it dispatches to is updated, since indices may have moved.
+        """
+        for trigger, trigger_idx in self.trigger_index.items():
+            slot = self._trigger_slots.get(trigger)
+            if slot is not None:
+                slot[0] = trigger_idx
+            else:
+                self._checked_assignment(trigger, self._make_trigger(trigger, trigger_idx))
+        for state, state_idx in self.state_index.items():
+            self._checked_assignment('is_' + state, self._make_is_state(state_idx))
+        self._checked_assignment('trigger', self.trigger)
+
+    def _checked_assignment(self, name, func):
+        if name not in self._bound and getattr(self.model, name, None) is None:
+            setattr(self.model, name, func)
+            self._bound.add(name)
+
+    def _make_trigger(self, name, trigger_idx):
+        dispatch = self._dispatch
+        # One-element list so a recompile can move the index without replacing the method.
+        slot = self._trigger_slots[name] = [trigger_idx]
+
+        def trigger(*args, **kwargs):
+            return dispatch(slot[0], args, kwargs)
+
+        return trigger
+
+    def _make_is_state(self, state_idx):
+        def is_state():
+            return self.state_idx == state_idx
+
+        return is_state
+
+    # --- 2. DISPATCH ---
+
+    def _dispatch(self, trigger_idx, args, kwargs):
+        source_idx = self.state_idx
+        candidates = self._table[source_idx * self._n_triggers + trigger_idx]
+        if candidates is None:
+            raise MachineError("Can't trigger event %s from state %s!"
+                               % (self.triggers[trigger_idx], self.states[source_idx]))
+
+        for dest_idx, prepare, conditions, unless, before, after in candidates:
+            for callback in prepare:
+                callback(*args, **kwargs)
+            if not self._guards_pass(conditions, unless, args, kwargs):
+                continue
+            for callback in before:
+                callback(*args, **kwargs)
+            for callback in self._on_exit[source_idx]:
+                callback(*args, **kwargs)
+            self.state_idx = dest_idx
+            self.model.state = self.states[dest_idx]
+            for callback in self._on_enter[dest_idx]:
+                callback(*args, **kwargs)
+            for callback in after:
+                callback(*args, **kwargs)
+            for callback in self._after_state_change:
+                callback(*args, **kwargs)
+            return True
+        return False
+
+    @staticmethod
+    def _guards_pass(conditions, unless, args, kwargs):
+        for condition in conditions:
+            if not condition(*args, **kwargs):
+                return False
+        for condition in unless:
+            if condition(*args, **kwargs):
+                return False
+        return True
+
+    # --- 3. MACHINE API ---
+
+    def trigger(self, trigger_name, *args, **kwargs):
+        """Fires a trigger by name (mirrors Machine model.trigger)."""
+        try:
+            trigger_idx = self.trigger_index[trigger_name]
+        except KeyError:
+            raise AttributeError("Do not know event named '%s'." % trigger_name)
+        return self._dispatch(trigger_idx, args, kwargs)
+
+    def add_transition(self, trigger, source, dest, **kwargs):
+        """Adds a transition and recompiles the table (init-time only, not a hot path)."""
+        transition = dict(kwargs, trigger=trigger, source=source, dest=dest)
+        self.transitions.append(transition)
+        self.spec = compile_spec(self.states, self.transitions, self.auto_transitions)
+        self._bind_spec()
+        self._bind_model()
+
+    def get_triggers(self, state):
+        """Returns the triggers valid from 'state' (mirrors Machine.get_triggers)."""
+        offset = self.state_index[state] * self._n_triggers
+        return [trigger for trigger, index in self.trigger_index.items()
+                if self._table[offset + index] is not None]
+
+    def refresh_callbacks(self):
+        """
+        Re-resolves callbacks against the model after its attributes have been
+        swapped (e.g. by Instrumentation). Trigger indices are unchanged, so the
+        trigger methods already bound to the model stay valid.
+        """
+        self._bind_spec()
+
+    def set_state(self, state):
+        """Moves to 'state' without firing any callbacks (mirrors Machine.set_state)."""
+        self.state_idx = self.state_index[state]
+        self.model.state = state
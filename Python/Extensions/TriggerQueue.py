@@ -0,0 +1,139 @@
+# TriggerQueue.py
+# Bounded per-frame trigger queue with coalescing and a frame-time budget.
+import time
+
+from transitions.core import MachineError
+
+
+class TriggerQueue:
+    """
+    Ring buffer of pending FSM triggers, drained at most once per frame.
+
+    CHOP/DAT callbacks push triggers instead of firing them synchronously. The
+    queue is drained from the frame tick; once the microsecond budget is spent
+    the remaining triggers are deferred to the next frame, so an input burst
+    never stacks dozens of transitions into a single cook.
+
+    Triggers listed as idempotent are coalesced: pushing one that is already
+    pending with the same arguments is counted but not queued again.
+    'deferred' counts triggers pushed past at least one drain by the budget,
+    each once however many frames it waits.
+    """
+
+    def __init__(self, capacity=256, budget_us=2000, idempotent=()):
+        self.capacity = capacity
+        self.budget_us = budget_us
+        self.idempotent = frozenset(idempotent)
+
+        # Preallocated slots; head/count index into them so pushes never grow the buffer.
+        self._triggers = [None] * capacity
+        self._args = [None] * capacity
+        self._kwargs = [None] * capacity
+        self._keys = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self._pending = {}
+        self._last_frame = None
+        self._counted = 0   # pending triggers at the head already counted as deferred
+
+        # Counters
+        self.queued = 0
+        self.coalesced = 0
+        self.deferred = 0
+        self.dropped = 0
+        self.dispatched = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, trigger, *args, **kwargs):
+        """Queues a trigger. Returns False if it was coalesced or the buffer is full."""
+        key = None
+        if trigger in self.idempotent:
+            try:
+                key = (trigger, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                key = None
+            if key is not None and key in self._pending:
+                self.coalesced += 1
+                return False
+
+        if self._count == self.capacity:
+            self.dropped += 1
+            return False
+
+        slot = (self._head + self._count) % self.capacity
+        self._triggers[slot] = trigger
+        self._args[slot] = args
+        self._kwargs[slot] = kwargs
+        self._keys[slot] = key
+        if key is not None:
+            self._pending[key] = slot
+        self._count += 1
+        self.queued += 1
+        return True
+
+    def drain(self, frame, dispatch):
+        """
+        Dispatches pending triggers through 'dispatch(trigger, *args, **kwargs)'.
+        Only the first call per frame does any work. Returns the number dispatched.
+        """
+        if frame == self._last_frame:
+            return 0
+        self._last_frame = frame
+
+        deadline = time.perf_counter() + self.budget_us * 1e-6
+        processed = 0
+        while self._count:
+            slot = self._head
+            trigger = self._triggers[slot]
+            args = self._args[slot]
+            kwargs = self._kwargs[slot]
+            key = self._keys[slot]
+
+            self._triggers[slot] = self._args[slot] = self._kwargs[slot] = self._keys[slot] = None
+            self._head = (slot + 1) % self.capacity
+            self._count -= 1
+            if self._counted:
+                self._counted -= 1
+            if key is not None:
+                del self._pending[key]
+
+            try:
+                dispatch(trigger, *args, **kwargs)
+                self.dispatched += 1
+            except MachineError:
+                # The caller is gone by now; an invalid trigger is counted, not raised.
+                self.rejected += 1
+            processed += 1
+
+            if time.perf_counter() >= deadline:
+                break
+
+        # Pending triggers are FIFO, so the ones counted on earlier frames are still at the head.
+        self.deferred += self._count - self._counted
+        self._counted = self._count
+        return processed
+
+    def clear(self):
+        """Discards all pending triggers."""
+        for slot in range(self.capacity):
+            self._triggers[slot] = self._args[slot] = self._kwargs[slot] = self._keys[slot] = None
+        self._head = 0
+        self._count = 0
+        self._counted = 0
+        self._pending.clear()
+
+    def stats(self):
+        """Counter snapshot for the textport or a Table DAT."""
+        return {
+            'pending': self._count,
+            'queued': self.queued,
+            'coalesced': self.coalesced,
+            'deferred': self.deferred,
+            'dropped': self.dropped,
+            'dispatched': self.dispatched,
+            'rejected': self.rejected,
+        }
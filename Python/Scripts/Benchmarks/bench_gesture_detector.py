@@ -0,0 +1,142 @@
+# bench_gesture_detector.py
+# Frames per second of the GestureDetector input stage (sequence + activity) vs. a
+# per-sample Python loop doing the same work, on a recorded (or synthesized) Kinect
+# skeleton stream, at the 1-2 sample blocks a 30 Hz sensor gives a 60 fps cook and larger.
+#
+#   python bench_gesture_detector.py
+#   python bench_gesture_detector.py --recording kinect_session.npy --hand 33 34
+#
+# A recording is a .npy array of shape (frames, channels) - e.g. a Record CHOP
+# saved with numpyArray().T. Without one, a 10-minute 30 fps, 25-joint (75 channel)
+# session with noisy gesture attempts is synthesized from a fixed seed.
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import td_stubs
+
+td_stubs.install()
+
+from GestureDetector import VECTORIZE_MIN_ROWS, ActivityDetector, SequenceDetector
+from StateExtension import INTERACTIVE_CHECK_SEQUENCE, StateExtension
+
+SAMPLE_RATE = StateExtension.INPUT_SAMPLE_RATE
+JOINTS = 25
+HAND_CHANNELS = (33, 34)  # right-hand X/Y in a joint-major (x, y, z) layout
+BLOCK_SIZES = (1, 2, 8, 64, 1024)
+ACTIVITY_WINDOW_S = 0.25
+
+
+def synthesize_recording(minutes=10, seed=7):
+    """Idle sway plus, every few seconds, an attempt at the interactive-check sequence."""
+    rng = np.random.default_rng(seed)
+    frames = int(minutes * 60 * SAMPLE_RATE)
+    data = rng.normal(0.0, 0.02, (frames, JOINTS * 3)).astype(np.float32)
+    position = 0
+    hold = int(0.7 * SAMPLE_RATE)
+    while position < frames - 6 * hold:
+        position += int(rng.integers(SAMPLE_RATE, 4 * SAMPLE_RATE))
+        steps = INTERACTIVE_CHECK_SEQUENCE if rng.random() < 0.6 else INTERACTIVE_CHECK_SEQUENCE[:2]
+        for step in steps:
+            data[position:position + hold, HAND_CHANNELS] += np.asarray(step['target'], dtype=np.float32)
+            position += hold + int(rng.integers(0, SAMPLE_RATE // 2))
+    return data
+
+
+def reference_loop(data, channels, steps=INTERACTIVE_CHECK_SEQUENCE, max_gap_s=StateExtension.INTERACTIVE_STEP_TIMEOUT_S):
+    """
+    Per-sample Python loop with the same semantics as SequenceDetector + ActivityDetector
+    (the approach they replace). Returns (sequence completions, per-sample flags of a
+    motion window over the activity threshold).
+    """
+    holds = [max(1, round(step['hold_s'] * SAMPLE_RATE)) for step in steps]
+    max_gap = max(1, round(max_gap_s * SAMPLE_RATE))
+    window = max(1, round(ACTIVITY_WINDOW_S * SAMPLE_RATE))
+    threshold = StateExtension.INTERACTION_MOTION_THRESHOLD * window
+    runs = [0] * len(steps)
+    step, last, completions = 0, None, 0
+    motions, exceeded = [], []
+    samples = data[:, channels].tolist()
+    previous = samples[0]
+    for index, sample in enumerate(samples):
+        for k, definition in enumerate(steps):
+            dx = sample[0] - definition['target'][0]
+            dy = sample[1] - definition['target'][1]
+            runs[k] = runs[k] + 1 if dx * dx + dy * dy <= definition['tolerance'] ** 2 else 0
+        if step and index > last + max_gap:
+            step, last = 0, None
+        if runs[step] >= holds[step]:
+            step, last = step + 1, index
+            if step == len(steps):
+                step, last = 0, None
+                completions += 1
+
+        motions.append(abs(sample[0] - previous[0]) + abs(sample[1] - previous[1]))
+        previous = sample
+        exceeded.append(len(motions) >= window and sum(motions[-window:]) > threshold)
+        if len(motions) > window:
+            del motions[0]
+    return completions, exceeded
+
+
+def expected_detections(exceeded, block_size):
+    """ActivityDetector dispatches at most once per block."""
+    return sum(any(exceeded[offset:offset + block_size]) for offset in range(0, len(exceeded), block_size))
+
+
+def run_stream(data, channels, block_size):
+    """The same work as reference_loop through the detectors, fed 'block_size' samples at a time."""
+    sequence = SequenceDetector(INTERACTIVE_CHECK_SEQUENCE, SAMPLE_RATE, channels=list(channels),
+                                max_gap_s=StateExtension.INTERACTIVE_STEP_TIMEOUT_S)
+    activity = ActivityDetector(SAMPLE_RATE, StateExtension.INTERACTION_MOTION_THRESHOLD, channels=list(channels),
+                                window_s=ACTIVITY_WINDOW_S)
+    dispatched = []
+    blocks = [data[offset:offset + block_size] for offset in range(0, data.shape[0], block_size)]
+    start = time.perf_counter()
+    for block in blocks:
+        sequence.process(block, dispatched.append)
+        activity.process(block, dispatched.append)
+    elapsed = time.perf_counter() - start
+    return sequence.completions, activity.detections, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture input stage throughput.")
+    parser.add_argument('--recording', default=None, help=".npy array of shape (frames, channels)")
+    parser.add_argument('--hand', type=int, nargs=2, default=HAND_CHANNELS, metavar=('X', 'Y'))
+    args = parser.parse_args()
+
+    data = (np.load(args.recording) if args.recording else synthesize_recording()).astype(np.float32)
+    frames = data.shape[0]
+    print("=" * 80)
+    print(f"Recording: {frames:,} frames x {data.shape[1]} channels "
+          f"({frames / SAMPLE_RATE / 60:.1f} min at {SAMPLE_RATE} fps), hand channels {tuple(args.hand)}")
+
+    start = time.perf_counter()
+    expected, exceeded = reference_loop(data, list(args.hand))
+    loop_elapsed = time.perf_counter() - start
+    print(f"Both rows run the interactive-check sequence and the activity window; blocks shorter than "
+          f"{VECTORIZE_MIN_ROWS}\nsamples take the detectors' per-sample path.")
+    print("-" * 80)
+    print(f"{'stage (seq + activity)':<26}{'block':>8}{'sequences':>11}{'activity':>10}{'frames/s':>14}{'x realtime':>11}")
+    print(f"{'per-sample loop':<26}{'-':>8}{expected:>11}{'-':>10}{frames / loop_elapsed:>14,.0f}"
+          f"{frames / loop_elapsed / SAMPLE_RATE:>11,.0f}")
+
+    mismatches = 0
+    for block_size in BLOCK_SIZES:
+        completions, detections, elapsed = run_stream(data, args.hand, block_size)
+        mismatches += completions != expected or detections != expected_detections(exceeded, block_size)
+        print(f"{'detectors':<26}{block_size:>8}{completions:>11}{detections:>10}{frames / elapsed:>14,.0f}"
+              f"{frames / elapsed / SAMPLE_RATE:>11,.0f}")
+    print("=" * 80)
+    if mismatches:
+        print("FAIL: the detectors disagree with the per-sample reference.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
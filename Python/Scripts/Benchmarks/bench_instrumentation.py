@@ -0,0 +1,87 @@
+# bench_instrumentation.py
+# Overhead of StateExtension hot-path instrumentation: never enabled vs. enabled
+# vs. disabled again, per engine, as the median of interleaved rounds with its
+# spread. Disabled should match never-enabled.
+
+import time
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+
+ITERATIONS = 10000
+ROUNDS = 9
+MODES = ('never', 'enabled', 'disabled')
+
+
+def create_extension(compiled):
+    ext = td_stubs.create_extension(compiled)
+    ext.start_interaction()
+    return ext
+
+
+def per_trigger_us(ext, iterations=ITERATIONS):
+    """Mean cost of the reflexive GameMode 'start_interaction' trigger over one round."""
+    trigger = ext.start_interaction
+    start = time.perf_counter()
+    for _ in range(iterations):
+        trigger()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def run():
+    """
+    One extension per mode (never enabled, enabled, enabled then disabled), measured in
+    interleaved rounds - the order alternates every round - so clock drift and scheduler
+    noise hit all three alike. Returns per-engine round times and the enabled extension.
+    """
+    results = {}
+    for engine, compiled in (('machine', False), ('compiled', True)):
+        extensions = {mode: create_extension(compiled) for mode in MODES}
+        extensions['enabled'].enable_instrumentation()
+        extensions['disabled'].enable_instrumentation()
+        extensions['disabled'].disable_instrumentation()
+        for ext in extensions.values():
+            per_trigger_us(ext, 1000)   # warm-up
+        rounds = {mode: [] for mode in MODES}
+        for index in range(ROUNDS):
+            for mode in (MODES if index % 2 == 0 else MODES[::-1]):
+                rounds[mode].append(per_trigger_us(extensions[mode]))
+        results[engine] = (rounds, extensions['enabled'])
+    return results
+
+
+def overhead(rounds, mode):
+    """Per-round cost of 'mode' relative to never-enabled: (median, min, max)."""
+    ratios = [value / baseline - 1 for value, baseline in zip(rounds[mode], rounds['never'])]
+    return median(ratios), min(ratios), max(ratios)
+
+
+if __name__ == '__main__':
+    results = run()
+    print("=" * 96)
+    print(f"Median of {ROUNDS} interleaved rounds of {ITERATIONS:,} reflexive triggers; overhead vs. never "
+          f"enabled per round (spread = min..max)")
+    print("-" * 96)
+    print(f"{'engine':<10}{'never (us)':>12}{'enabled (us)':>14}{'disabled (us)':>15}"
+          f"{'enabled overhead':>20}{'disabled overhead':>25}")
+    for engine, (rounds, _) in results.items():
+        enabled, disabled = overhead(rounds, 'enabled'), overhead(rounds, 'disabled')
+        print(f"{engine:<10}{median(rounds['never']):>12.3f}{median(rounds['enabled']):>14.3f}"
+              f"{median(rounds['disabled']):>15.3f}{enabled[0]:>10.1%} ({enabled[1]:+.0%}..{enabled[2]:+.0%})"
+              f"{disabled[0]:>12.1%} ({disabled[1]:+.1%}..{disabled[2]:+.1%})")
+    print("=" * 96)
+
+    print("\nTiming table (compiled engine, while enabled):")
+    for row in results['compiled'][1].instrumentation.timing_table():
+        print("  " + "  ".join(f"{cell!s:>14}" for cell in row))
+    print("\nTransition counts:")
+    for row in results['compiled'][1].instrumentation.transition_table():
+        print("  " + "  ".join(f"{cell!s:>14}" for cell in row))
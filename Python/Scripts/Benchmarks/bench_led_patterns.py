@@ -0,0 +1,78 @@
+# bench_led_patterns.py
+# Per-frame cost of the LED pattern engine (precomputed lookup tables into a
+# preallocated buffer) vs. computing each pixel in Python, at several LED counts.
+
+import colorsys
+import math
+import time
+import tracemalloc
+
+import td_stubs
+
+td_stubs.install()
+
+from LEDPatterns import LED_PATTERNS, LEDPatternEngine
+
+FRAME_RATE = 60
+FRAMES = 600
+LAYOUTS = ((6, 60), (6, 300), (24, 300))
+
+
+def python_rainbow_pulse(frame, pixel_count, period_frames):
+    """Per-pixel reference: what a Script CHOP would compute each frame without tables."""
+    phase = (frame % period_frames) / period_frames
+    level = 0.5 - 0.5 * math.cos(2.0 * math.pi * phase)
+    return [[channel * level for channel in colorsys.hsv_to_rgb((pixel / pixel_count + phase) % 1.0, 1.0, 1.0)]
+            for pixel in range(pixel_count)]
+
+
+def time_engine(engine, frames, crossfade):
+    engine.set_pattern('SlowPulseRainbow', 0, crossfade=False)
+    if crossfade:
+        # Re-arm a crossfade every 30 frames so half of the frames blend two tables.
+        def step(frame):
+            if frame % 30 == 0:
+                engine.set_pattern('SlowPulseBlue' if engine.pattern == 'SlowPulseRainbow' else 'SlowPulseRainbow', frame)
+            engine.render(frame)
+    else:
+        step = engine.render
+    for frame in range(10):
+        step(frame)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for frame in range(10, 10 + frames):
+        step(frame)
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+    return elapsed / frames * 1e6, allocated
+
+
+if __name__ == '__main__':
+    print("=" * 92)
+    print(f"{'boxes x LEDs':>14}{'pixels':>8}{'tables (kB)':>13}{'python (us)':>13}"
+          f"{'engine (us)':>13}{'fade (us)':>11}{'speedup':>9}{'alloc (B)':>11}")
+    print("-" * 92)
+    for boxes, leds in LAYOUTS:
+        start = time.perf_counter()
+        engine = LEDPatternEngine(boxes, leds, FRAME_RATE)
+        build_ms = (time.perf_counter() - start) * 1000
+        table_kb = sum(table.nbytes for table in engine.tables.values()) / 1e3
+
+        period = round(LED_PATTERNS['SlowPulseRainbow']['period_s'] * FRAME_RATE)
+        reference_frames = 20
+        start = time.perf_counter()
+        for frame in range(reference_frames):
+            python_rainbow_pulse(frame, engine.pixel_count, period)
+        python_us = (time.perf_counter() - start) / reference_frames * 1e6
+
+        engine_us, allocated = time_engine(engine, FRAMES, crossfade=False)
+        fade_us, fade_allocated = time_engine(engine, FRAMES, crossfade=True)
+        print(f"{f'{boxes} x {leds}':>14}{engine.pixel_count:>8}{table_kb:>13.1f}{python_us:>13.0f}"
+              f"{engine_us:>13.1f}{fade_us:>11.1f}{python_us / engine_us:>8.0f}x"
+              f"{max(allocated, fade_allocated):>11}")
+        print(f"{'':>14}  (tables built in {build_ms:.1f} ms; buffer {engine.buffer.shape}, "
+              f"C-contiguous={engine.buffer.flags['C_CONTIGUOUS']})")
+    print("=" * 92)
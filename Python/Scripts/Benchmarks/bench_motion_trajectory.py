@@ -0,0 +1,89 @@
+# bench_motion_trajectory.py
+# Attract-mode trajectory generation for 6 to 500 boxes: chunked, ring-buffered
+# TrajectoryGenerator vs. evaluating the trajectory every frame, the cost of start()
+# (which runs inside on_enter_Attract), and a check that the played setpoints stay
+# inside the speed/acceleration limits (exits non-zero if any box exceeds them).
+
+import sys
+import time
+
+import numpy as np
+
+import td_stubs
+
+td_stubs.install()
+
+from MotionTrajectory import LINEAR_LIMITS, LINEAR_MAX, ROTATION_LIMITS, TrajectoryGenerator
+
+FRAME_RATE = 60
+FRAMES = 3600
+BOX_COUNTS = (6, 24, 60, 120, 250, 500)
+CHUNK_FRAMES = 60
+
+
+def play(generator, frames, lock_at=None):
+    """Plays 'frames' setpoints; returns per-frame cost (us) and the played rotation/linear arrays."""
+    costs = np.empty(frames)
+    rotation = np.empty((frames, generator.box_count), dtype=np.float32)
+    linear = np.empty_like(rotation)
+    for frame in range(frames):
+        start = time.perf_counter()
+        rotation_row, linear_row = generator.next_frame()
+        costs[frame] = time.perf_counter() - start
+        rotation[frame] = rotation_row
+        linear[frame] = linear_row
+        if frame == lock_at:
+            mask = np.zeros(generator.box_count, dtype=bool)
+            mask[::3] = True
+            generator.set_lock_mask(mask)
+    return costs * 1e6, rotation, linear
+
+
+def per_frame_reference(box_count, frames):
+    """The same closed-form intent evaluated for one frame at a time (no chunking, no tracking)."""
+    generator = TrajectoryGenerator(box_count, FRAME_RATE, 3)    # only its axes are used
+    out = np.zeros((1, box_count))
+    frame_index = np.zeros((1, 1))
+    start = time.perf_counter()
+    for frame in range(frames):
+        frame_index[0, 0] = frame
+        generator.rotation.intent(frame_index, out)
+        generator.linear.intent(frame_index, out, generator.lock_mask, LINEAR_MAX)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def limit_ratio(setpoints, limits):
+    """Peak speed and acceleration of the played setpoints relative to the limits."""
+    velocity = np.diff(setpoints.astype(np.float64), axis=0) * FRAME_RATE
+    accel = np.diff(velocity, axis=0) * FRAME_RATE
+    return max(np.abs(velocity).max() / limits.max_speed, np.abs(accel).max() / limits.max_accel)
+
+
+if __name__ == '__main__':
+    print("=" * 100)
+    print(f"{FRAMES} frames at {FRAME_RATE} fps, chunks of {CHUNK_FRAMES} frames; "
+          f"start from rest, one third of the boxes locked at frame {FRAMES // 2}")
+    print("-" * 100)
+    print(f"{'boxes':>6}{'per-frame (us)':>16}{'start (us)':>12}{'chunked mean (us)':>19}{'p99 (us)':>10}"
+          f"{'max (us)':>10}{'fills':>8}{'tracked':>9}{'peak/limit':>12}{'converged':>11}")
+    worst = 0.0
+    for box_count in BOX_COUNTS:
+        reference_us = per_frame_reference(box_count, FRAMES)
+        generator = TrajectoryGenerator(box_count, FRAME_RATE, CHUNK_FRAMES)
+        start = time.perf_counter()
+        generator.start(0, np.zeros(box_count), np.zeros(box_count))
+        start_us = (time.perf_counter() - start) * 1e6
+        costs, rotation, linear = play(generator, FRAMES, lock_at=FRAMES // 2)
+        peak = max(limit_ratio(rotation, ROTATION_LIMITS), limit_ratio(linear, LINEAR_LIMITS))
+        worst = max(worst, peak)
+        print(f"{box_count:>6}{reference_us:>16.1f}{start_us:>12.0f}{costs.mean():>19.2f}"
+              f"{np.percentile(costs, 99):>10.1f}{costs.max():>10.0f}{generator.chunks_generated:>8}{generator.tracked_frames:>9}"
+              f"{peak:>12.3f}{str(generator.converged):>11}")
+    print("-" * 100)
+    print("per-frame: closed-form intent evaluated every frame (tracking excluded); chunked: next_frame() cost,")
+    print("with a chunk generated once per chunk of frames when converged, and a few tracked rows per frame")
+    print("while converging (after start() and the lock change).")
+    print("=" * 100)
+    if worst > 1.0:
+        print(f"FAIL: played setpoints exceed the speed/acceleration limits (peak/limit {worst:.6f})")
+        sys.exit(1)
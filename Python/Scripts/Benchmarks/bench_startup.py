@@ -0,0 +1,122 @@
+# bench_startup.py
+# Headless startup budget check: runs start_state_machine.onStart and the StateExtension
+# onInitTD in fresh interpreters and fails (exit code 1) when the median startup time
+# goes over budget. In bundle mode the child runs isolated ('-I -S': no site-packages),
+# seeing only the standard library, the packages TouchDesigner ships itself (TD_PACKAGES)
+# and whatever onStart puts on sys.path, so a bundle missing a dependency fails here.
+#
+#   python bench_startup.py                      # bundle mode (builds the bundle if missing)
+#   python bench_startup.py --mode venv --runs 9
+#   python bench_startup.py --budget-ms 150
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_SCRIPTS_DIR = os.path.normpath(os.path.join(HERE, '..', 'State'))
+sys.path.insert(0, STATE_SCRIPTS_DIR)
+
+import build_dependency_bundle
+
+PHASES = ('path_setup_ms', 'dependency_import_ms', 'extension_import_ms', 'machine_spec_ms',
+          'machine_construction_ms', 'oninit_total_ms')
+DEFAULT_BUDGET_MS = 250.0
+
+# Packages TouchDesigner's own Python provides (not part of the bundle)
+TD_PACKAGES = ('numpy',)
+
+# Executed in a fresh interpreter so every import is cold.
+CHILD = r'''
+import json, os, runpy, sys, time
+sys.path[1:1] = [{here!r}] + {td_site!r}
+import td_stubs
+stubs = td_stubs.install()
+stubs.project.folder = {root!r}
+start = time.perf_counter()
+startup = runpy.run_path(os.path.join({state_dir!r}, 'start_state_machine.py'))
+startup['onStart'].__globals__['STARTUP_MODE'] = {mode!r}
+startup['onStart']()
+from StateExtension import StateExtension
+ext = StateExtension(op('/project1/State'))
+ext.onInitTD()
+profile = dict(ext.startup_profile)
+profile['startup_total_ms'] = (time.perf_counter() - start) * 1000.0
+print(json.dumps(profile))
+'''
+
+
+def td_site_dir(scratch):
+    """Stand-in for TD's bundled site-packages: links to just the TD_PACKAGES in 'scratch'."""
+    for name in TD_PACKAGES:
+        package_dir = os.path.dirname(importlib.util.find_spec(name).origin)
+        for path in (package_dir, package_dir + '.libs'):
+            if os.path.isdir(path):
+                os.symlink(path, os.path.join(scratch, os.path.basename(path)), target_is_directory=True)
+    return scratch
+
+
+def run_once(mode, td_site):
+    code = CHILD.format(here=HERE, td_site=[td_site] if td_site else [], root=build_dependency_bundle.PROJECT_ROOT,
+                        state_dir=STATE_SCRIPTS_DIR, mode=mode)
+    # The venv layout is found through site-packages, so only bundle mode can run isolated.
+    flags = ['-I', '-S'] if td_site else []
+    result = subprocess.run([sys.executable, *flags, '-c', code], capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Startup child failed ({mode}):\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless TD startup timing and budget check.")
+    parser.add_argument('--mode', choices=('bundle', 'venv'), default='bundle')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum median startup time (onStart through onInitTD).")
+    args = parser.parse_args()
+
+    if args.mode == 'bundle':
+        bundle = os.path.join(build_dependency_bundle.BUNDLE_DIR, build_dependency_bundle.bundle_name())
+        if not os.path.isfile(bundle):
+            print(f"Building dependency bundle: {build_dependency_bundle.build_bundle()}")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        td_site = td_site_dir(scratch) if args.mode == 'bundle' else None
+        try:
+            profiles = [run_once(args.mode, td_site) for _ in range(args.runs)]
+        except RuntimeError as error:
+            print(f"FAIL: {error}")
+            return 1
+
+    print("=" * 64)
+    print(f"Startup phases, mode '{profiles[0]['mode']}', {args.runs} cold runs")
+    print(f"  transitions loaded from: {profiles[0].get('dependency_origin')}")
+    print(f"  machine spec loaded from: {', '.join(profile['machine_spec_source'] for profile in profiles)}")
+    print("-" * 64)
+    print(f"{'phase':<28}{'median (ms)':>12}{'min (ms)':>12}{'max (ms)':>12}")
+    for phase in PHASES + ('startup_total_ms',):
+        values = [profile[phase] for profile in profiles]
+        print(f"{phase:<28}{statistics.median(values):>12.2f}{min(values):>12.2f}{max(values):>12.2f}")
+    print("=" * 64)
+
+    if args.mode == 'bundle' and profiles[0]['mode'] != 'bundle':
+        print("FAIL: startup fell back to the venv (no bundle for this Python/requirements.txt).")
+        return 1
+    if args.mode == 'bundle' and not str(profiles[0].get('dependency_origin')).startswith(build_dependency_bundle.BUNDLE_DIR):
+        print("FAIL: transitions did not load from the bundle.")
+        return 1
+    total = statistics.median(profile['startup_total_ms'] for profile in profiles)
+    if total > args.budget_ms:
+        print(f"FAIL: median startup {total:.1f} ms exceeds the {args.budget_ms:.0f} ms budget.")
+        return 1
+    print(f"OK: median startup {total:.1f} ms within the {args.budget_ms:.0f} ms budget.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# bench_state_extension.py
+# Headless benchmark of StateExtension: POST sequence, fault/resume path and
+# GameMode trigger storms at simulated 60/120 Hz, for both dispatch engines.
+#
+# Usage:
+#   python bench_state_extension.py                  # run and compare against the saved baseline
+#   python bench_state_extension.py --save-baseline  # run and record a new baseline
+#   python bench_state_extension.py --ci --baseline <path>  # CI: a missing baseline is a failure
+#
+# Exits with status 1 when a metric regresses past the tolerance. Baselines are
+# machine-specific and not committed; CI records one on its runner and passes it in.
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_state_extension.json')
+DEFAULT_TOLERANCE = 0.5
+ENGINES = (('machine', False), ('compiled', True))
+
+# Metrics compared against the baseline (lower is better), with the absolute slack allowed on
+# top of the relative tolerance (allocation counts are small and can be zero). Tail percentiles
+# are reported but not gated: at microsecond scale they mostly measure scheduler noise.
+GATED_METRICS = {'p50_us': 0.0, 'construct_us': 0.0, 'alloc_blocks': 16, 'alloc_peak_bytes': 4096}
+
+
+# --- 1. HARNESS HELPERS ---
+
+def percentiles(samples_ns):
+    ordered = sorted(samples_ns)
+    count = len(ordered)
+
+    def pick(fraction):
+        return ordered[min(count - 1, int(fraction * count))] / 1000.0
+
+    return {'p50_us': pick(0.50), 'p95_us': pick(0.95), 'p99_us': pick(0.99), 'max_us': ordered[-1] / 1000.0}
+
+
+def timed_triggers(ext, triggers, samples):
+    """Fires (name, kwargs) triggers in order, timing each one."""
+    clock = time.perf_counter_ns
+    for name, kwargs in triggers:
+        start = clock()
+        ext.trigger(name, **kwargs)
+        samples.append(clock() - start)
+
+
+# --- 2. SCENARIOS ---
+
+POST_SEQUENCE = [
+    ('power_on', {}), ('warmup_complete', {}), ('extension_check_complete', {}),
+    ('rotation_check_complete', {}), ('linear_check_complete', {}), ('post_interactive_complete', {}),
+]
+LINEAR_CHECK_STEP = 4
+
+FAULT_SEQUENCE = [
+    ('power_on', {}), ('warmup_complete', {}), ('extension_check_complete', {}),
+    ('rotation_check_complete', {}), ('linear_check_failure', {'box_id': 4}), ('resume_from_fault', {}),
+]
+
+
+def scenario_post(ext, iterations):
+    samples = []
+    # LinearCheck passes only after min-travel readings; they arrive between triggers (not timed).
+    travel = [np.full(ext.BOX_COUNT, reading) for reading in (1.0, 1.01)]
+    for _ in range(iterations):
+        timed_triggers(ext, POST_SEQUENCE[:LINEAR_CHECK_STEP], samples)
+        for reading in travel:
+            ext.update_motor_travel(reading)
+        timed_triggers(ext, POST_SEQUENCE[LINEAR_CHECK_STEP:], samples)
+    return samples
+
+
+def scenario_fault_resume(ext, iterations):
+    samples = []
+    for _ in range(iterations):
+        timed_triggers(ext, FAULT_SEQUENCE, samples)
+    return samples
+
+
+def make_storm(rate, burst):
+    """GameMode storm: 'burst' queued start_interaction triggers per frame, drained by process_frame()."""
+
+    def scenario_storm(ext, iterations):
+        stubs.clock.rate = rate
+        ext.start_interaction()
+        samples = []
+        clock = time.perf_counter_ns
+        for _ in range(iterations):
+            stubs.clock.tick()
+            start = clock()
+            for _ in range(burst):
+                ext.queue_trigger('start_interaction')
+            ext.process_frame()
+            samples.append(clock() - start)
+        return samples
+
+    return scenario_storm
+
+
+SCENARIOS = (
+    ('post_sequence', scenario_post, 2000),
+    ('fault_resume', scenario_fault_resume, 2000),
+    ('storm_60hz', make_storm(60, 8), 3600),
+    ('storm_120hz', make_storm(120, 16), 7200),
+)
+
+
+def count_allocations(compiled, scenario, iterations):
+    """Net allocated blocks and peak traced bytes for one scenario run."""
+    ext = td_stubs.create_extension(compiled)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    scenario(ext, iterations)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return blocks, peak
+
+
+# --- 3. RUN / REPORT ---
+
+def run(scale=1.0):
+    results = {}
+    for engine, compiled in ENGINES:
+        construct = []
+        for _ in range(50):
+            start = time.perf_counter_ns()
+            td_stubs.create_extension(compiled)
+            construct.append(time.perf_counter_ns() - start)
+        results[f'{engine}.construct'] = {'construct_us': sorted(construct)[len(construct) // 2] / 1000.0}
+
+        for name, scenario, iterations in SCENARIOS:
+            iterations = max(1, int(iterations * scale))
+            ext = td_stubs.create_extension(compiled)
+            start = time.perf_counter()
+            samples = scenario(ext, iterations)
+            elapsed = time.perf_counter() - start
+
+            row = percentiles(samples)
+            dispatched = ext.trigger_queue.dispatched if name.startswith('storm') else len(samples)
+            row['transitions_per_sec'] = dispatched / elapsed
+            row['alloc_blocks'], row['alloc_peak_bytes'] = count_allocations(compiled, scenario, max(1, iterations // 10))
+            results[f'{engine}.{name}'] = row
+    return results
+
+
+def print_report(results):
+    print("=" * 100)
+    print(f"{'scenario':<28}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'max us':>10}"
+          f"{'trans/s':>14}{'blocks':>9}{'peak B':>9}")
+    print("-" * 100)
+    for key, row in results.items():
+        if 'construct_us' in row:
+            print(f"{key:<28}  onInitTD construction: {row['construct_us']:.1f} us")
+            continue
+        print(f"{key:<28}{row['p50_us']:>10.2f}{row['p95_us']:>10.2f}{row['p99_us']:>10.2f}{row['max_us']:>10.1f}"
+              f"{row['transitions_per_sec']:>14,.0f}{row['alloc_blocks']:>9}{row['alloc_peak_bytes']:>9}")
+    print("=" * 100)
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages (metrics more than 'tolerance' worse than baseline)."""
+    regressions = []
+    for key, row in results.items():
+        for metric, slack in GATED_METRICS.items():
+            if metric not in row or metric not in baseline.get(key, {}):
+                continue
+            limit = baseline[key][metric] + abs(baseline[key][metric]) * tolerance + slack
+            if row[metric] > limit:
+                regressions.append(f"{key}.{metric}: {row[metric]:.2f} > {limit:.2f} (baseline {baseline[key][metric]:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless StateExtension benchmark.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON path.')
+    parser.add_argument('--save-baseline', action='store_true', help='Record this run as the new baseline.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed slowdown (0.5 = 50%%).')
+    parser.add_argument('--scale', type=float, default=1.0, help='Iteration multiplier (e.g. 0.1 for a quick run).')
+    parser.add_argument('--ci', action='store_true', help='Fail when there is no baseline to compare against.')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        if args.ci:
+            print(f"FAIL: No baseline at {args.baseline}; the regression gate cannot run.")
+            return 1
+        print(f"INFO: No baseline at {args.baseline}. Run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("REGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print(f"SUCCESS: No regressions beyond {args.tolerance:.0%} of baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
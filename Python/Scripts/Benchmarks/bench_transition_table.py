@@ -0,0 +1,95 @@
+# bench_transition_table.py
+# Per-trigger cost of the stock transitions.Machine vs. TransitionTable.CompiledMachine,
+# measured against the 60 fps frame budget of the TouchDesigner cook thread.
+
+import os
+import sys
+import time
+
+# Make the extension modules importable outside TouchDesigner.
+EXTENSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Extensions')
+sys.path.insert(0, os.path.normpath(EXTENSIONS_DIR))
+
+from transitions import Machine
+from StateExtension import STATES, TRANSITIONS
+from TransitionTable import CompiledMachine
+
+FRAME_BUDGET_US = 1e6 / 60
+ITERATIONS = 100000
+
+
+class BenchModel:
+    """Stand-in model exposing the StateExtension callbacks as no-ops (guards pass)."""
+
+    def on_enter_GameMode(self, *args, **kwargs):
+        pass
+
+
+def _passing_callback(self, *args, **kwargs):
+    return True
+
+
+for _transition in TRANSITIONS:
+    for _key in ('prepare', 'conditions', 'unless', 'before', 'after'):
+        _names = _transition.get(_key) or []
+        for _name in [_names] if isinstance(_names, str) else _names:
+            setattr(BenchModel, _name, _passing_callback)
+
+
+def build(engine):
+    model = BenchModel()
+    engine(model=model, states=STATES, transitions=TRANSITIONS, initial='Attract')
+    return model
+
+
+def bench_reflexive(model, iterations):
+    """GameMode -> GameMode 'start_interaction' ticks (Kinect/joystick interaction rate)."""
+    model.start_interaction()
+    trigger = model.start_interaction
+    start = time.perf_counter()
+    for _ in range(iterations):
+        trigger()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_post_cycle(model, iterations):
+    """Full POST success cycle (6 triggers) starting and ending in Attract."""
+    model.to_Attract()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        model.power_on()
+        model.warmup_complete()
+        model.extension_check_complete()
+        model.rotation_check_complete()
+        model.linear_check_complete()
+        model.post_interactive_complete()
+    return (time.perf_counter() - start) / (iterations * 6) * 1e6
+
+
+def run_benchmarks(iterations=ITERATIONS):
+    results = {}
+    for label, engine in (('Machine', Machine), ('CompiledMachine', CompiledMachine)):
+        start = time.perf_counter()
+        model = build(engine)
+        construct_us = (time.perf_counter() - start) * 1e6
+        results[label] = {
+            'construct_us': construct_us,
+            'reflexive_us': bench_reflexive(model, iterations),
+            'post_us': bench_post_cycle(model, iterations // 6),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run_benchmarks()
+    print("=" * 74)
+    print(f"{'engine':<18}{'construct (us)':>16}{'reflexive (us)':>16}{'POST (us/trig)':>16}")
+    print("-" * 74)
+    for label, row in results.items():
+        print(f"{label:<18}{row['construct_us']:>16.1f}{row['reflexive_us']:>16.3f}{row['post_us']:>16.3f}")
+    print("-" * 74)
+    speedup = results['Machine']['reflexive_us'] / results['CompiledMachine']['reflexive_us']
+    per_frame = FRAME_BUDGET_US / results['CompiledMachine']['reflexive_us']
+    print(f"Reflexive speedup: {speedup:.1f}x")
+    print(f"CompiledMachine triggers per 60 fps frame budget ({FRAME_BUDGET_US:.0f} us): {per_frame:,.0f}")
+    print("=" * 74)
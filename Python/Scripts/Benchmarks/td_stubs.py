@@ -0,0 +1,117 @@
+# td_stubs.py
+# Headless stand-ins for the TouchDesigner globals StateExtension relies on
+# ('debug', 'absTime', 'op', 'project'), so the extension can run outside TD.
+
+import builtins
+import os
+import sys
+
+EXTENSIONS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Extensions'))
+
+
+class FrameClock:
+    """Stand-in for absTime: a frame counter advanced by the harness."""
+
+    def __init__(self, rate=60, frame=1):
+        self.rate = rate
+        self.frame = frame
+
+    @property
+    def seconds(self):
+        return self.frame / self.rate
+
+    def tick(self, frames=1):
+        self.frame += frames
+        return self.frame
+
+
+class StubPar:
+    """Stand-in for a COMP's .par collection (attribute access, no parameters defined)."""
+
+    def __getattr__(self, name):
+        return None
+
+
+class StubComp:
+    """Stand-in for the 'State' Base COMP (ownerComp): path, par and storage."""
+
+    def __init__(self, path='/project1/State'):
+        self.path = path
+        self.name = path.rsplit('/', 1)[-1]
+        self.par = StubPar()
+        self.storage = {}
+
+    def store(self, key, value):
+        self.storage[key] = value
+        return value
+
+    def fetch(self, key, default=None, search=False, storeDefault=False):
+        if key not in self.storage and storeDefault:
+            self.storage[key] = default
+        return self.storage.get(key, default)
+
+    def unstore(self, keys):
+        self.storage.pop(keys, None)
+
+
+class StubProject:
+    """Stand-in for the 'project' global."""
+
+    def __init__(self, cook_rate=60, folder=None):
+        self.cookRate = cook_rate
+        self.folder = folder or os.getcwd()
+
+
+class TDStubs:
+    """Holds the installed stand-ins so a harness can drive the clock and read the debug log."""
+
+    def __init__(self, rate=60, echo=False):
+        self.clock = FrameClock(rate)
+        self.project = StubProject(rate)
+        self.comps = {}
+        self.messages = []
+        self.echo = echo
+
+    def debug(self, *args):
+        if self.echo:
+            print(*args)
+        else:
+            self.messages.append(args)
+            if len(self.messages) > 1000:
+                del self.messages[:500]
+
+    def op(self, path):
+        if path not in self.comps:
+            self.comps[path] = StubComp(path)
+        return self.comps[path]
+
+
+def install(rate=60, echo=False):
+    """
+    Injects the stand-ins into builtins (where TD's DAT globals would be) and
+    makes Python/Extensions importable. Returns the TDStubs instance.
+    """
+    stubs = TDStubs(rate, echo)
+    builtins.debug = stubs.debug
+    builtins.absTime = stubs.clock
+    builtins.op = stubs.op
+    builtins.project = stubs.project
+    if EXTENSIONS_DIR not in sys.path:
+        sys.path.insert(0, EXTENSIONS_DIR)
+    return stubs
+
+
+def create_extension(compiled=False, path='/project1/State'):
+    """
+    Builds and initialises a StateExtension on the stub COMP at 'path', from a cold
+    start: any snapshot a previous run left in its storage is discarded first.
+    Call install() before this.
+    """
+    from StateExtension import StateExtension
+
+    StateExtension.USE_COMPILED_ENGINE = compiled
+    owner = op(path)
+    owner.unstore(StateExtension.SNAPSHOT_KEY)
+    ext = StateExtension(owner)
+    ext.onInitTD()
+    return ext
@@ -0,0 +1,391 @@
+# fuzz_fsm.py
+# Randomized transition fuzzer / soak test for the Maestro FSM.
+#
+# Long random sequences of triggers (valid and invalid) and environment events
+# (box alignment changes, actuator travel readings, curator locks, frame ticks)
+# are run against test_fsm_init.TestStateModel ('model') or the StateExtension spec
+# ('extension' = transitions.Machine, 'compiled' = TransitionTable.CompiledMachine),
+# checking invariants after every step. Shards run in a process pool; shard i uses
+# seed + i, so any violation can be replayed exactly with --replay.
+#
+#   python fuzz_fsm.py --target model --steps 2000000
+#   python fuzz_fsm.py --target compiled --jobs 8 --shards 32
+#   python fuzz_fsm.py --target extension --replay 1007 --steps 5000
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from transitions.core import MachineError
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS_DIR = os.path.normpath(os.path.join(HERE, '..', 'Benchmarks'))
+
+TARGETS = ('model', 'extension', 'compiled')
+GUARDS = ('check_all_aligned', '_check_motor_variance')
+MAX_REPORTED = 5
+
+# Relative weights of the step kinds; 'trigger_any' mostly picks triggers that are
+# invalid in the current state (they must raise MachineError and change nothing).
+STEP_WEIGHTS = {
+    'trigger_valid': 45, 'trigger_any': 20, 'box_trigger': 10, 'align': 5, 'misalign': 5,
+    'travel': 8, 'lock': 3, 'evaluate': 2, 'frame': 2,
+}
+
+
+# --- 1. TARGETS AND SPECS ---
+
+def _names(value):
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def spec_from_definitions(transitions):
+    """{(trigger, source): [(dest, conditions, unless)]} from the TRANSITIONS dict list."""
+    spec = defaultdict(list)
+    for transition in transitions:
+        for source in _names(transition['source']):
+            dest = source if transition['dest'] == '=' else transition['dest']
+            spec[(transition['trigger'], source)].append(
+                (dest, _names(transition.get('conditions')), _names(transition.get('unless'))))
+    return dict(spec)
+
+
+def spec_from_machine(machine):
+    """Same format, read back from a transitions.Machine (auto 'to_<State>' triggers left out)."""
+    spec = {}
+    for trigger, event in machine.events.items():
+        if trigger.startswith('to_'):
+            continue
+        for source, transitions in event.transitions.items():
+            spec[(trigger, source)] = [
+                (transition.dest or source,
+                 [condition.func for condition in transition.conditions if condition.target],
+                 [condition.func for condition in transition.conditions if not condition.target])
+                for transition in transitions
+            ]
+    return spec
+
+
+class Target:
+    """A model under test plus the spec the invariants are checked against."""
+
+    def __init__(self, name):
+        self.name = name
+        self.clock = None
+        self.timeouts = {}
+        if name == 'model':
+            import test_fsm_init
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.model = test_fsm_init.create_fsm_instance()
+            self.spec = spec_from_machine(self.model.machine)
+            self.states = list(test_fsm_init.TestStateModel.states)
+        else:
+            if BENCHMARKS_DIR not in sys.path:
+                sys.path.insert(0, BENCHMARKS_DIR)
+            import td_stubs
+            stubs = td_stubs.install()
+            from StateExtension import STATES, STATE_TIMEOUTS, TRANSITIONS
+            # Every shard starts cold, whichever worker runs it.
+            self.model = td_stubs.create_extension(compiled=name == 'compiled')
+            self.spec = spec_from_definitions(TRANSITIONS)
+            self.states = list(STATES)
+            self.clock = stubs.clock
+            self.timeouts = STATE_TIMEOUTS
+        self.triggers = sorted({trigger for trigger, _ in self.spec})
+
+    def absorbing_states(self):
+        """Enterable states no trigger ever leaves (a soak run that reaches one stops exploring)."""
+        exits, entries = set(), set()
+        for (_, source), options in self.spec.items():
+            for dest, _, _ in options:
+                if dest != source:
+                    exits.add(source)
+                    entries.add(dest)
+        return [state for state in self.states if state in entries and state not in exits]
+
+    def fresh_guard(self, name):
+        """Evaluates a guard through the class, bypassing the GuardCache wrapper on the instance."""
+        return bool(getattr(type(self.model), name)(self.model))
+
+    def feed_travel(self, travel):
+        if hasattr(self.model, 'update_motor_travel'):
+            self.model.update_motor_travel(travel)
+        else:
+            self.model.motor_variance.update(travel)
+            self.model.guard_cache.invalidate('_check_motor_variance')
+
+
+# --- 2. SHARD RUNNER ---
+
+class Shard:
+    """Runs one deterministic random sequence and records invariant violations."""
+
+    def __init__(self, target, seed, trace=False):
+        self.target = target
+        self.model = target.model
+        self.fleet = target.model.box_fleet
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.trace = trace
+        self.step_index = 0
+        self.entered_frame = target.clock.frame if target.clock else 0
+        self.counts = defaultdict(int)
+        self.violations = []
+        self.violation_count = 0
+        kinds = [kind for kind in STEP_WEIGHTS if kind != 'frame' or target.clock is not None]
+        self.kinds = kinds
+        self.weights = [STEP_WEIGHTS[kind] for kind in kinds]
+
+    def fail(self, message):
+        self.violation_count += 1
+        if len(self.violations) < MAX_REPORTED:
+            self.violations.append(f"seed {self.seed} step {self.step_index}: {message}")
+
+    def run(self, steps):
+        kinds = self.rng.choices(self.kinds, self.weights, k=steps)
+        for self.step_index, kind in enumerate(kinds):
+            source = self.model.state
+            getattr(self, 'step_' + kind)()
+            self.counts[kind] += 1
+            if self.model.state != source:
+                self.counts['state_changes'] += 1
+                if self.target.clock is not None:
+                    self.entered_frame = self.target.clock.frame
+            self.check_global()
+
+    # --- Trigger steps ---
+
+    def step_trigger_valid(self):
+        state = self.model.state
+        valid = [trigger for trigger in self.target.triggers if (trigger, state) in self.target.spec]
+        self.fire(self.rng.choice(valid) if valid else self.rng.choice(self.target.triggers))
+
+    def step_trigger_any(self):
+        self.fire(self.rng.choice(self.target.triggers))
+
+    def step_evaluate(self):
+        if hasattr(self.model, 'evaluate_linear_check') and self.model.state == 'LinearCheck':
+            source = self.model.state
+            self.model.evaluate_linear_check()
+            self.check_outcome(source, 'linear_check_complete' if self.model.state != 'FaultMode'
+                               else 'linear_check_failure')
+        else:
+            self.fire('linear_check_complete')
+
+    def fire(self, trigger):
+        kwargs = {}
+        if trigger == 'linear_check_failure' and self.rng.random() < 0.5:
+            kwargs['box_id'] = self.rng.randint(1, self.fleet.count)
+        source = self.model.state
+        options = self.target.spec.get((trigger, source))
+        if self.trace:
+            print(f"[{self.step_index}] {source}: {trigger}({kwargs})")
+        try:
+            getattr(self.model, trigger)(**kwargs)
+        except MachineError:
+            self.counts['invalid'] += 1
+            if options:
+                self.fail(f"'{trigger}' is defined from {source} but raised MachineError")
+            if self.model.state != source:
+                self.fail(f"invalid '{trigger}' moved {source} -> {self.model.state}")
+            return
+        self.counts['fired'] += 1
+        if not options:
+            self.fail(f"'{trigger}' is not defined from {source} but was accepted")
+            return
+        self.check_outcome(source, trigger)
+
+    def guards_pass(self, conditions, unless):
+        return (all(self.target.fresh_guard(name) for name in conditions)
+                and not any(self.target.fresh_guard(name) for name in unless))
+
+    def check_outcome(self, source, trigger):
+        """
+        The destination must belong to a transition whose guards hold, and staying
+        put is only allowed if it was reflexive or every guarded option was blocked.
+        Guards are re-evaluated fresh after the trigger (prepare callbacks can latch
+        failures the guards then see).
+        """
+        dest = self.model.state
+        options = self.target.spec.get((trigger, source), ())
+        if dest == source:
+            blocked = [option for option in options if option[0] != source and self.guards_pass(option[1], option[2])]
+            if blocked:
+                self.fail(f"'{trigger}' stayed in {source} although the guards of -> {blocked[0][0]} hold")
+        elif not any(option[0] == dest and self.guards_pass(option[1], option[2]) for option in options):
+            self.fail(f"'{trigger}' moved {source} -> {dest}, not allowed by the spec and guards")
+
+        # Named safety properties
+        if source in ('GameMode', 'Attract_Intervention') and dest == 'Attract' and not self.fleet.all_aligned():
+            self.fail(f"left {source} for Attract while boxes were not all aligned")
+        if source == 'GameMode' and dest == 'Attract_Intervention' and self.fleet.all_aligned():
+            self.fail("GameMode went to Attract_Intervention although every box is aligned")
+        if source == 'LinearCheck' and dest == 'TouchDesignerInteractiveChecks' and not self.model.motor_variance.passes():
+            self.fail("LinearCheck passed with an actuator over the variance threshold")
+
+    # --- Environment steps ---
+
+    def random_mask(self):
+        return self.np_rng.random(self.fleet.count) < 0.5
+
+    def step_box_trigger(self):
+        index = self.rng.randrange(self.fleet.count)
+        spec = self.fleet.spec
+        trigger_idx = self.rng.randrange(len(spec.triggers))
+        expected = spec.dest(int(self.fleet.state_codes[index]), trigger_idx)
+        try:
+            getattr(self.model.box_models[index + 1], spec.triggers[trigger_idx])()
+        except MachineError:
+            if expected >= 0:
+                self.fail(f"box {index + 1} rejected valid '{spec.triggers[trigger_idx]}'")
+            return
+        if expected < 0:
+            self.fail(f"box {index + 1} accepted invalid '{spec.triggers[trigger_idx]}'")
+        elif self.fleet.state_codes[index] != expected:
+            self.fail(f"box {index + 1} '{spec.triggers[trigger_idx]}' landed in the wrong state")
+
+    def step_align(self):
+        self.fleet.align_all(None if self.rng.random() < 0.5 else self.random_mask())
+
+    def step_misalign(self):
+        self.fleet.misalign(self.random_mask())
+
+    def step_travel(self):
+        travel = 1.0 + self.np_rng.normal(0.0, 0.05 if self.rng.random() < 0.2 else 0.005, self.fleet.count)
+        self.target.feed_travel(travel)
+
+    def step_lock(self):
+        self.model.set_box_locked_at_max(self.rng.randint(1, self.fleet.count))
+
+    def step_frame(self):
+        """Advances the frame clock; a timed state may only time out once its timeout elapsed."""
+        source = self.model.state
+        self.target.clock.tick(self.rng.choice((1, 60, 600, 1200)))
+        self.model.process_frame()
+        if self.model.state != source:
+            timeout = self.target.timeouts.get(source)
+            if timeout is None:
+                self.fail(f"process_frame moved untimed {source} -> {self.model.state}")
+                return
+            elapsed = (self.target.clock.frame - self.entered_frame) / self.model.frame_rate
+            if elapsed + 1e-9 < timeout['timeout']:
+                self.fail(f"{source} timed out after {elapsed:.2f}s (timeout {timeout['timeout']}s)")
+            self.check_outcome(source, timeout['on_timeout'])
+
+    # --- Global invariants ---
+
+    def check_global(self):
+        if self.model.state not in self.target.states:
+            self.fail(f"unknown state {self.model.state}")
+        counts = np.bincount(self.fleet.state_codes, minlength=len(self.fleet.spec.states)).tolist()
+        if list(self.fleet.state_counts) != counts:
+            self.fail(f"box state counts {self.fleet.state_counts} != actual {counts}")
+        for guard in GUARDS:
+            if bool(getattr(self.model, guard)()) != self.target.fresh_guard(guard):
+                self.fail(f"cached guard {guard} is stale")
+
+
+def run_shard(target_name, seed, steps):
+    """Process-pool entry point: builds its own target so shards share nothing."""
+    target = Target(target_name)
+    shard = Shard(target, seed)
+    start = time.perf_counter()
+    shard.run(steps)
+    return {
+        'seed': seed,
+        'pid': os.getpid(),
+        'steps': steps,
+        'elapsed': time.perf_counter() - start,
+        'counts': dict(shard.counts),
+        'violations': shard.violations,
+        'violation_count': shard.violation_count,
+        'final_state': target.model.state,
+        'absorbing': target.absorbing_states(),
+    }
+
+
+# --- 3. DRIVER ---
+
+def report(results, wall, jobs):
+    steps = sum(result['steps'] for result in results)
+    totals = defaultdict(int)
+    for result in results:
+        for key, value in result['counts'].items():
+            totals[key] += value
+    triggers = totals['fired'] + totals['invalid']
+
+    print("=" * 72)
+    print(f"{len(results)} shards, {steps:,} steps in {wall:.1f}s wall on {jobs} workers")
+    print(f"  triggers {triggers:,} (accepted {totals['fired']:,}, MachineError {totals['invalid']:,}), "
+          f"state changes {totals['state_changes']:,}")
+    print("-" * 72)
+    print(f"{'worker pid':>12}{'shards':>8}{'steps':>12}{'busy (s)':>10}{'steps/s':>12}{'triggers/s':>13}")
+    per_worker = defaultdict(lambda: [0, 0, 0.0, 0])
+    for result in results:
+        row = per_worker[result['pid']]
+        row[0] += 1
+        row[1] += result['steps']
+        row[2] += result['elapsed']
+        row[3] += result['counts'].get('fired', 0) + result['counts'].get('invalid', 0)
+    for pid, (shards, worker_steps, busy, worker_triggers) in sorted(per_worker.items()):
+        print(f"{pid:>12}{shards:>8}{worker_steps:>12,}{busy:>10.2f}{worker_steps / busy:>12,.0f}"
+              f"{worker_triggers / busy:>13,.0f}")
+    print("-" * 72)
+    print(f"Aggregate: {steps / wall:,.0f} steps/s, {triggers / wall:,.0f} triggers/s "
+          f"({triggers / wall / jobs:,.0f} triggers/s per core)")
+
+    if results[0]['absorbing']:
+        stuck = sum(result['final_state'] in result['absorbing'] for result in results)
+        print(f"WARNING: absorbing states in the spec: {', '.join(results[0]['absorbing'])} "
+              f"({stuck}/{len(results)} shards ended in one)")
+    violations = sum(result['violation_count'] for result in results)
+    if violations:
+        print(f"FAIL: {violations} invariant violations. First reported (replay with --replay <seed>):")
+        for result in results:
+            for message in result['violations']:
+                print("  " + message)
+    else:
+        print("OK: no invariant violations.")
+    print("=" * 72)
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel randomized FSM fuzzer and soak test.")
+    parser.add_argument('--target', choices=TARGETS, default='model')
+    parser.add_argument('--steps', type=int, default=1000000, help="Total steps across all shards.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shards', type=int, default=None, help="Defaults to 4 per job.")
+    parser.add_argument('--seed', type=int, default=1000, help="Shard i runs with seed + i.")
+    parser.add_argument('--replay', type=int, default=None, metavar='SEED',
+                        help="Run a single shard in-process with a trace of every trigger.")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        shard = Shard(Target(args.target), args.replay, trace=True)
+        shard.run(args.steps)
+        for message in shard.violations:
+            print("VIOLATION: " + message)
+        return 1 if shard.violation_count else 0
+
+    shards = args.shards or args.jobs * 4
+    per_shard = max(1, args.steps // shards)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_shard, args.target, args.seed + index, per_shard) for index in range(shards)]
+        results = [future.result() for future in futures]
+    return 1 if report(results, time.perf_counter() - start, args.jobs) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
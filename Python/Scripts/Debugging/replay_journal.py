@@ -0,0 +1,81 @@
+# replay_journal.py
+# Replays a StateExtension transition journal through test_fsm_init.TestStateModel
+# headlessly, at full speed, to reproduce the recorded state history. Guards return
+# the outcomes journaled with each trigger, since their inputs (box alignment,
+# actuator travel) are not part of the journal.
+#
+# Usage: python replay_journal.py <path to transition_journal.bin> [--verbose]
+
+import sys
+import time
+
+import test_fsm_init
+from TransitionJournal import read_journal  # importable once test_fsm_init has set up sys.path
+from transitions.core import MachineError
+
+
+def replay(path, verbose=False):
+    """
+    Fires every journaled trigger at a fresh TestStateModel and compares the
+    resulting state with the recorded destination. On a divergence the model is
+    resynchronised to the recorded state so the rest of the history still replays.
+    Returns the list of divergences as (index, record, replayed_dest).
+    """
+    states, triggers, records = read_journal(path)
+    fsm = test_fsm_init.create_fsm_instance()
+    divergences = []
+
+    # Guards answer with the recorded outcome; ones the record did not evaluate fall back to the model.
+    recorded = {}
+    for guard in {name for record in records for name in record[5]}:
+        setattr(fsm, guard, _replayed_guard(guard, getattr(fsm, guard), recorded))
+
+    start = time.perf_counter()
+    for index, record in enumerate(records):
+        frame, source, dest, trigger, box_id, guards = record
+        recorded.clear()
+        recorded.update(guards)
+
+        if fsm.state != source:
+            fsm.machine.set_state(source)
+
+        kwargs = {} if box_id is None else {'box_id': box_id}
+        try:
+            replayed = fsm.state if fsm.trigger(trigger, **kwargs) else None
+        except MachineError:
+            replayed = 'INVALID'
+        except AttributeError:
+            # Trigger not defined on TestStateModel (the two specs have drifted)
+            replayed = 'UNKNOWN'
+
+        if replayed != dest:
+            divergences.append((index, record, replayed))
+            if dest not in (None, 'INVALID') and dest in fsm.machine.states:
+                fsm.machine.set_state(dest)
+        if verbose:
+            print(f"[{frame:>8}] {source:>30} --{trigger}--> {dest}  (replayed: {replayed})")
+
+    elapsed = time.perf_counter() - start
+    rate = len(records) / elapsed if elapsed else 0.0
+    print(f"\nREPLAY: {len(records)} records in {elapsed * 1000:.1f} ms ({rate:,.0f} records/s), "
+          f"{len(divergences)} divergences. Final state: {fsm.state}")
+    return divergences
+
+
+def _replayed_guard(name, original, recorded):
+    def guard(*args, **kwargs):
+        return recorded[name] if name in recorded else original(*args, **kwargs)
+    return guard
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python replay_journal.py <journal path> [--verbose]")
+        sys.exit(2)
+
+    divergences = replay(sys.argv[1], verbose='--verbose' in sys.argv)
+    for index, record, replayed in divergences:
+        frame, source, dest, trigger, box_id, guards = record
+        print(f"DIVERGENCE #{index} frame {frame}: {source} --{trigger}(box_id={box_id})--> "
+              f"recorded {dest}, replayed {replayed}")
+    sys.exit(1 if divergences else 0)
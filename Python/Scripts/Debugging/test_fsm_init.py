@@ -4,112 +4,99 @@
 # FIX: Added the create_fsm_instance() wrapper function for interactive access.
 # ==============================================================================
 
+import os
+import sys
+
 from transitions import Machine
 
+# Share the extension modules (Python/Extensions) with the TouchDesigner runtime.
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Extensions')))
+
+from BoxFleet import BoxFleet, DEFAULT_BOX_COUNT, FAULT
+from GuardCache import GuardCache
+from MachineSpec import load_machine_spec
+from MotorVariance import MotorVarianceMonitor
+
+# The same declarative machine definition the StateExtension runs (Python/Spec/maestro_fsm.json)
+MACHINE_SPEC = load_machine_spec()
+
 
 class TestStateModel(object):
     """
     The Maestro FSM Model. Controls the high-level application flow.
     """
 
-    # --- 1. STATE DEFINITIONS ---
-    states = [
-        'Attract',
-        'GameMode',
-        'Calibration',
-        'WarmUpCycle',
-        'ExtensionMode',
-        'RotationCheck',
-        'LinearCheck',
-        'TouchDesignerInteractiveChecks',
-        'FaultMode',
-        'Attract_Intervention'
-    ]
+    # --- 1. STATE DEFINITIONS (from the shared spec) ---
+    states = MACHINE_SPEC.states
 
     # --- 2. INITIALIZATION ---
     def __init__(self):
         print("DEBUG 1: Initializing custom attributes.")
         # Non-TD dependent custom attributes
         self.animation_frame_offset = 0  # Initialized safely to 0 [3]
-        self.boxes = []
+        self.box_fleet = BoxFleet(DEFAULT_BOX_COUNT)
+        self.box_models = self.box_fleet.models()
+        self.motor_variance = MotorVarianceMonitor(DEFAULT_BOX_COUNT)
+
+        # Guard memoization: box transitions invalidate check_all_aligned
+        self.guard_cache = GuardCache()
+        self.guard_cache.install(self, ['check_all_aligned', '_check_motor_variance'])
+        self.box_fleet.listeners.append(lambda *change: self.guard_cache.invalidate('check_all_aligned'))
 
         # --- CRITICAL POINT OF FAILURE TEST ---
         # If this crashes, the traceback will appear immediately in the console.
+        # Deliberately the stock Machine (built from the spec lists, not the cached table):
+        # it is the reference engine the replay and fuzz scripts compare the extension against.
         print("DEBUG 2: Attempting to instantiate pytransitions Machine.")
         self.machine = Machine(
             model=self,
             states=TestStateModel.states,
-            initial='Attract',
-            auto_transitions=True,
-            name='Maestro_FSM'
+            transitions=MACHINE_SPEC.transitions,
+            initial=MACHINE_SPEC.initial,
+            auto_transitions=MACHINE_SPEC.auto_transitions,
+            name=MACHINE_SPEC.name
         )
         print("DEBUG 3: Machine instantiation SUCCESS.")
-
-        self._add_application_transitions()
-        print("DEBUG 4: Transitions added successfully.")
+        print(f"DEBUG 4: {len(MACHINE_SPEC.transitions)} transitions loaded from spec "
+              f"({MACHINE_SPEC.source}, {MACHINE_SPEC.key[:12]}).")
 
         # This confirms pytransitions bound the state attribute to the model
         print(f"DEBUG 5: FSM successfully bound. Current state: {self.state}")
 
-    # --- 3. TRANSITION DEFINITIONS ---
-    def _add_application_transitions(self):
-        # Power On Self Test (POST) Sequence
-        self.machine.add_transition(trigger='power_on', source='Attract', dest='WarmUpCycle')
-        self.machine.add_transition('warmup_complete', 'WarmUpCycle', 'ExtensionMode')
-        self.machine.add_transition('extension_check_complete', 'ExtensionMode', 'RotationCheck')
-        self.machine.add_transition('rotation_check_complete', 'RotationCheck', 'LinearCheck')
-
-        # Linear Check Paths
-        self.machine.add_transition(
-            trigger='linear_check_complete',
-            source='LinearCheck',
-            dest='TouchDesignerInteractiveChecks',
-            conditions=['_check_motor_variance']
-        )
-        self.machine.add_transition(
-            trigger='linear_check_failure',
-            source='LinearCheck',
-            dest='FaultMode',
-            unless=['_check_motor_variance']
-        )
-
-        self.machine.add_transition('post_interactive_complete', 'TouchDesignerInteractiveChecks', 'Attract')
-        self.machine.add_transition('resume_from_fault', 'FaultMode', 'Attract')
+    # --- 3. CALLBACKS AND CONDITIONS (Placeholders) ---
+    def check_all_aligned(self):
+        return self.box_fleet.all_aligned()
 
-        # Game Mode Entry
-        self.machine.add_transition(
-            trigger='start_interaction',
-            source=['Attract', 'GameMode'],
-            dest='GameMode',
-            before='_log_interaction_start'
-        )
+    def _check_motor_variance(self, box_id=None):
+        return self.motor_variance.passes()
 
-        # Conditional Exit from Game Mode
-        self.machine.add_transition(
-            trigger='return_to_attract',
-            source='GameMode',
-            dest='Attract',
-            conditions=['check_all_aligned']
-        )
-        self.machine.add_transition(
-            trigger='return_to_attract',
-            source='GameMode',
-            dest='Attract_Intervention',
-            unless=['check_all_aligned']
-        )
-        self.machine.add_transition('force_system_ready', 'Attract_Intervention', 'Attract',
-                                    conditions=['check_all_aligned'])
+    def update_motor_travel(self, travel):
+        self.motor_variance.update(travel)
+        self.guard_cache.invalidate('_check_motor_variance')
 
-    # --- 4. CALLBACKS AND CONDITIONS (Placeholders) ---
-    def check_all_aligned(self):
-        return True
+    def _report_linear_fault(self, box_id=None):
+        if box_id is not None:
+            self.motor_variance.report_failure(box_id)
+            self.guard_cache.invalidate('_check_motor_variance')
 
-    def _check_motor_variance(self):
-        return True
+    def _record_linear_fault(self, box_id=None):
+        self.box_fleet.fault_mask(self.motor_variance.tripped_mask())
 
-    def _log_interaction_start(self):
+    def debug_reflexive(self):
         pass  # Placeholder for actual action
 
+    # Box fleet actions (curator / sensor input)
+    def set_box_locked_at_max(self, box_id=None):
+        # Without a box_id (the resume_from_fault callback) every faulted box is locked.
+        mask = self.box_fleet.in_state(FAULT) if box_id is None else self.box_fleet.mask_for([box_id])
+        self.box_fleet.lock_set(mask)
+        self.box_fleet.clear_faults(mask)
+        self.motor_variance.clear_mask(mask)
+        self.guard_cache.invalidate('_check_motor_variance')
+
+    def provoke_misalignment(self, box_id):
+        self.box_fleet.misalign(self.box_fleet.mask_for([box_id]))
+
     # State Entry Callbacks (Now empty/passive, deferring TD-dependent logic)
     def on_enter_Attract(self):
         pass
@@ -117,7 +104,7 @@ class TestStateModel(object):
     def on_enter_GameMode(self):
         pass
 
-    # --- 5. REQUIRED WRAPPER FUNCTION ---
+    # --- 4. REQUIRED WRAPPER FUNCTION ---
 
 
 def create_fsm_instance():
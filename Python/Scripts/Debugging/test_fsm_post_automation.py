@@ -2,6 +2,9 @@
 # Automated test script based on [Power On Self Test - Equilateral Expedition] requirements.
 
 import sys
+
+import numpy as np
+
 import test_fsm_init
 from transitions.core import MachineError  # Used to confirm expected FSM errors [2]
 
@@ -56,6 +59,10 @@ def run_post_tests():
     print("SUCCESS: Rotation check passed. Moving to LinearCheck (Min Travel Check).")
 
     # 4. Linear check completion (All LAs pass Min travel/variance check)
+    assert not fsm.linear_check_complete() and fsm.state == 'LinearCheck', \
+        f"1.5a FAILED: LinearCheck passed before any min-travel readings, now in {fsm.state}"
+    for reading in (1.0, 1.01):
+        fsm.update_motor_travel(np.full(fsm.box_fleet.count, reading))
     fsm.linear_check_complete()
     assert fsm.state == 'TouchDesignerInteractiveChecks', f"1.5 FAILED: Expected TouchDesignerInteractiveChecks, got {fsm.state}"
     print("SUCCESS: All LAs passed Min check. Starting TD Controller Checks.")
@@ -123,6 +130,8 @@ def run_post_tests():
     assert fsm.state == 'Attract', f"3.2 FAILED: Expected Attract, got {fsm.state}"
     print("SUCCESS: Fault resolved and Maestro FSM returned to Attract mode.")
 
+    print(f"\nINFO: Guard cache stats: {fsm.guard_cache.stats()}")
+
     print("\n==========================================================")
     print("= ALL AUTOMATED TESTS COMPLETED SUCCESSFULLY!            =")
     print("==========================================================")
@@ -0,0 +1,95 @@
+# test_goto_navigation.py
+# Automated checks for StateExtension.goto: a replay that a guard diverts stops and
+# returns False (no MachineError), a jump out of Attract stops autonomous motion, and
+# a runtime add_transition keeps the instrumented trigger methods (on both engines);
+# a precompiled spec that does not match the definition is rejected.
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, '..', 'Benchmarks')))
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+from StateExtension import MACHINE_SPEC, STATES, TRANSITIONS
+from TransitionTable import CompiledMachine
+
+
+def run_goto_tests(compiled):
+    engine = 'compiled' if compiled else 'machine'
+    print(f"\n--- goto ({engine} engine) ---")
+
+    # 1. Replay diverted by a guard: GameMode -> WarmUpCycle plans return_to_attract, power_on.
+    ext = td_stubs.create_extension(compiled)
+    ext.start_interaction()
+    assert not ext.box_fleet.all_aligned(), "1.0 SETUP FAILED: expected a misaligned fleet"
+    reached = ext.goto('WarmUpCycle')
+    assert reached is False, f"1.1 FAILED: goto returned {reached} after a diverted step"
+    assert ext.state == 'Attract_Intervention', f"1.2 FAILED: expected Attract_Intervention, got {ext.state}"
+    print("SUCCESS: Diverted replay stopped in Attract_Intervention and returned False.")
+
+    # 2. The same replay with the fleet aligned reaches the target.
+    ext.box_fleet.align_all()
+    ext.force_system_ready()
+    ext.start_interaction()
+    assert ext.goto('WarmUpCycle') is True and ext.state == 'WarmUpCycle', f"2.1 FAILED: state {ext.state}"
+    print("SUCCESS: Aligned replay reached WarmUpCycle.")
+
+    # 3. A replay blocked by a guard returns False and stays put.
+    ext = td_stubs.create_extension(compiled)
+    ext.goto('Attract_Intervention', mode='jump')
+    assert ext.goto('Attract') is False and ext.state == 'Attract_Intervention', f"3.1 FAILED: state {ext.state}"
+    print("SUCCESS: Blocked replay returned False without leaving Attract_Intervention.")
+
+    # 4. Jumping out of Attract stops autonomous motion; jumping back restarts it.
+    ext = td_stubs.create_extension(compiled)
+    assert ext.motion.active, "4.0 SETUP FAILED: motion not running in Attract"
+    ext.goto('LinearCheck', mode='jump')
+    assert not ext.motion.active, "4.1 FAILED: autonomous motion still active after jumping out of Attract"
+    before = ext.box_fleet.actuator_position.copy()
+    stubs.clock.tick()
+    ext.process_frame()
+    assert (ext.box_fleet.actuator_position == before).all(), "4.2 FAILED: setpoints still copied outside Attract"
+    ext.goto('Attract', mode='jump')
+    assert ext.motion.active, "4.3 FAILED: autonomous motion not restarted after jumping into Attract"
+    print("SUCCESS: Jumps stop and restart autonomous motion with the state.")
+
+    # 5. A trigger added at runtime leaves the existing (instrumented) trigger methods in place.
+    ext = td_stubs.create_extension(compiled)
+    ext.enable_instrumentation()
+    ext.add_transition('service_shortcut', 'Attract', 'LinearCheck')
+    ext.start_interaction()
+    counts = {row[0]: row[2] for row in ext.instrumentation.timing_table()[1:]}
+    assert counts.get('start_interaction') == 1, f"5.1 FAILED: trigger wrapper dropped by add_transition: {counts}"
+    ext.to_Attract()
+    assert ext.service_shortcut() and ext.state == 'LinearCheck', f"5.2 FAILED: new trigger led to {ext.state}"
+    assert ext.goto('Attract', mode='jump') and ext.goto('LinearCheck') and ext.state == 'LinearCheck', \
+        f"5.3 FAILED: replay through the added transition ended in {ext.state}"
+    print("SUCCESS: Runtime add_transition keeps instrumented triggers; the new trigger dispatches.")
+
+
+def test_spec_mismatch():
+    edited = [dict(transition) for transition in TRANSITIONS]
+    edited[0]['dest'] = 'FaultMode'
+    try:
+        CompiledMachine(model=type('Model', (), {})(), states=STATES, transitions=edited,
+                        initial=MACHINE_SPEC.initial, spec=MACHINE_SPEC.table)
+    except ValueError:
+        print("SUCCESS: A precompiled spec that does not match the transitions is rejected.")
+    else:
+        raise AssertionError("6.1 FAILED: mismatched precompiled spec accepted")
+
+
+if __name__ == '__main__':
+    print("==========================================================")
+    print("= Starting goto Navigation Test Suite                    =")
+    print("==========================================================")
+    for compiled in (False, True):
+        run_goto_tests(compiled)
+    test_spec_mismatch()
+    print("\n==========================================================")
+    print("= ALL GOTO TESTS COMPLETED SUCCESSFULLY!                 =")
+    print("==========================================================")
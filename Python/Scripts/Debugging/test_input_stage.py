@@ -0,0 +1,107 @@
+# test_input_stage.py
+# Automated checks for StateExtension.process_input with Kinect-width (samples, 75) blocks:
+# the detectors read only INPUT_CHANNELS, the interactive-check sequence completes from the
+# hand channels, and activity is not carried across a state change; 2-column joystick blocks
+# work with the default INPUT_CHANNELS and are ignored (not raised on) under a Kinect layout
+# (on both engines).
+
+import os
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, '..', 'Benchmarks')))
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+from StateExtension import INTERACTIVE_CHECK_SEQUENCE, StateExtension
+
+KINECT_CHANNELS = 75
+KINECT_HAND = (33, 34)
+RATE = StateExtension.INPUT_SAMPLE_RATE
+
+
+def kinect_block(hand, samples=RATE):
+    """(samples, 75) skeleton block at rest, with the hand X/Y channels set to 'hand' ((samples, 2) or (2,))."""
+    block = np.zeros((samples, KINECT_CHANNELS), dtype=np.float32)
+    block[:, list(KINECT_HAND)] = hand
+    return block
+
+
+def create_kinect_extension(compiled):
+    """An extension configured for Kinect skeleton blocks (INPUT_CHANNELS is read in __init__)."""
+    default = StateExtension.INPUT_CHANNELS
+    StateExtension.INPUT_CHANNELS = KINECT_HAND
+    try:
+        return td_stubs.create_extension(compiled)
+    finally:
+        StateExtension.INPUT_CHANNELS = default
+
+
+def hand_sweep():
+    sweep = np.zeros((RATE, 2), dtype=np.float32)
+    sweep[:, 0] = np.linspace(0.0, 1.0, RATE)
+    return sweep
+
+
+def flush(ext):
+    stubs.clock.tick()
+    ext.process_frame()
+
+
+def run_input_tests(compiled):
+    engine = 'compiled' if compiled else 'machine'
+    print(f"\n--- Input stage ({engine} engine) ---")
+
+    # 1. A still Kinect block in Attract is accepted and dispatches nothing.
+    ext = create_kinect_extension(compiled)
+    assert ext.process_input(kinect_block((0.0, 0.0))) == 0, "1.1 FAILED: a still block dispatched a trigger"
+    # Motion outside INPUT_CHANNELS is ignored.
+    noisy = kinect_block((0.0, 0.0))
+    noisy[:, 0] = np.linspace(0.0, 3.0, RATE)
+    assert ext.process_input(noisy) == 0, "1.2 FAILED: motion on a non-hand channel counted as interaction"
+    print("SUCCESS: Kinect-width blocks are read through INPUT_CHANNELS.")
+
+    # 2. A hand sweep starts the interaction.
+    assert ext.process_input(kinect_block(hand_sweep())) == 1, "2.1 FAILED: hand sweep not detected"
+    flush(ext)
+    assert ext.state == 'GameMode', f"2.2 FAILED: expected GameMode after the sweep, got {ext.state}"
+    print("SUCCESS: Hand sweep queued start_interaction into GameMode.")
+
+    # 3. The interactive-check sequence completes from the hand channels.
+    ext.goto('TouchDesignerInteractiveChecks', mode='jump')
+    hold = round(INTERACTIVE_CHECK_SEQUENCE[0]['hold_s'] * RATE) + 2
+    poses = np.concatenate([np.tile(step['target'], (hold, 1)) for step in INTERACTIVE_CHECK_SEQUENCE])
+    assert ext.process_input(kinect_block(poses, len(poses))) == 1, "3.1 FAILED: sequence not completed"
+    flush(ext)
+    assert ext.state == 'Attract', f"3.2 FAILED: expected Attract after the sequence, got {ext.state}"
+    print("SUCCESS: Interactive-check sequence completed from a Kinect block.")
+
+    # 4. The last sample of the previous state does not count as motion in the next one.
+    ext = create_kinect_extension(compiled)
+    assert ext.process_input(kinect_block((0.8, 0.0))) == 0, "4.0 SETUP FAILED: a held pose dispatched a trigger"
+    ext.goto('GameMode', mode='jump')
+    assert ext.process_input(kinect_block((0.0, 0.0))) == 0, "4.1 FAILED: activity carried across the state change"
+    print("SUCCESS: Activity detection restarts on a state change.")
+
+    # 5. Joystick blocks: used as given by default, ignored (not raised on) under the Kinect layout.
+    ext = td_stubs.create_extension(compiled)
+    assert ext.process_input(hand_sweep()) == 1, "5.1 FAILED: joystick sweep not detected with the default channels"
+    ext = create_kinect_extension(compiled)
+    assert ext.process_input(hand_sweep()) == 0, "5.2 FAILED: narrow block dispatched under the Kinect layout"
+    assert ext.process_input(kinect_block(hand_sweep())) == 1, "5.3 FAILED: Kinect block rejected after a narrow one"
+    print("SUCCESS: 2-column joystick blocks work by default and are skipped under a Kinect layout.")
+
+
+if __name__ == '__main__':
+    print("==========================================================")
+    print("= Starting Input Stage Test Suite                        =")
+    print("==========================================================")
+    for compiled in (False, True):
+        run_input_tests(compiled)
+    print("\n==========================================================")
+    print("= ALL INPUT STAGE TESTS COMPLETED SUCCESSFULLY!          =")
+    print("==========================================================")
@@ -0,0 +1,129 @@
+# test_snapshot_restore.py
+# Automated checks for StateExtension snapshot/restore: the snapshot written on a
+# state change must hold the new state's timer, and a re-initialised extension
+# must resume in the same state with the same countdown (on both engines). The
+# snapshot key covers the state timeouts, and a state that is no longer timed
+# restores without a timer.
+
+import os
+import sys
+import types
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, '..', 'Benchmarks')))
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+import StateExtension as extension_module
+from StateExtension import MACHINE_SPEC, SPEC_KEY, STATE_TIMEOUTS, StateExtension, snapshot_spec_key
+
+
+def timeout_frames(state):
+    return round(STATE_TIMEOUTS[state]['timeout'] * stubs.project.cookRate)
+
+
+def tick(ext, frames):
+    stubs.clock.tick(frames)
+    ext.process_frame()
+
+
+def reinit(ext):
+    """Re-Init Extensions without a clean onDestroyTD: only the snapshot stored on state change survives."""
+    fresh = StateExtension(ext.ownerComp)
+    fresh.onInitTD()
+    return fresh
+
+
+def run_snapshot_tests(compiled):
+    engine = 'compiled' if compiled else 'machine'
+    print(f"\n--- Snapshot / restore ({engine} engine) ---")
+    ext = td_stubs.create_extension(compiled)
+
+    # 1. The snapshot stored by the state change carries the new state's full timer.
+    ext.power_on()
+    stored = ext.ownerComp.fetch(StateExtension.SNAPSHOT_KEY)
+    assert stored['state'] == 'WarmUpCycle', f"1.1 FAILED: stored state {stored['state']}"
+    assert stored['timer_remaining'] == timeout_frames('WarmUpCycle'), \
+        f"1.2 FAILED: stored timer {stored['timer_remaining']}, expected {timeout_frames('WarmUpCycle')}"
+    print(f"SUCCESS: power_on stored WarmUpCycle with {stored['timer_remaining']} frames on its timer.")
+
+    # 2. The next state's snapshot does not inherit WarmUpCycle's leftover countdown.
+    tick(ext, 600)
+    ext.warmup_complete()
+    stored = ext.ownerComp.fetch(StateExtension.SNAPSHOT_KEY)
+    assert stored['state'] == 'ExtensionMode', f"2.1 FAILED: stored state {stored['state']}"
+    assert stored['timer_remaining'] == timeout_frames('ExtensionMode'), \
+        f"2.2 FAILED: stored timer {stored['timer_remaining']}, expected {timeout_frames('ExtensionMode')}"
+    print(f"SUCCESS: ExtensionMode stored with its own {stored['timer_remaining']}-frame timer.")
+
+    # 3. Capture mid-state, restore into a re-initialised extension: same state, same countdown.
+    tick(ext, 300)
+    remaining = ext.timer_wheel.remaining(ext.state_timer)
+    ext.save_snapshot()
+    ext = reinit(ext)
+    assert ext.state == 'ExtensionMode', f"3.1 FAILED: restored state {ext.state}"
+    assert ext.timer_wheel.remaining(ext.state_timer) == remaining, \
+        f"3.2 FAILED: restored timer {ext.timer_wheel.remaining(ext.state_timer)}, expected {remaining}"
+    print(f"SUCCESS: Restored ExtensionMode with {remaining} frames remaining.")
+
+    # 4. The restored timer still fires: the unattended limit-switch timeout reaches FaultMode.
+    tick(ext, remaining)
+    assert ext.state == 'FaultMode', f"4.1 FAILED: expected FaultMode after the timeout, got {ext.state}"
+    print("SUCCESS: Restored timer expired into FaultMode.")
+
+    # 5. A re-init straight after a state change (no explicit save) resumes that state's timer.
+    ext = td_stubs.create_extension(compiled)
+    ext.power_on()
+    ext = reinit(ext)
+    assert ext.state == 'WarmUpCycle', f"5.1 FAILED: restored state {ext.state}"
+    assert ext.timer_wheel.remaining(ext.state_timer) == timeout_frames('WarmUpCycle'), \
+        f"5.2 FAILED: restored timer {ext.timer_wheel.remaining(ext.state_timer)}"
+    tick(ext, timeout_frames('WarmUpCycle'))
+    assert ext.state == 'ExtensionMode', f"5.3 FAILED: WarmUpCycle did not time out (state {ext.state})"
+    print("SUCCESS: WarmUpCycle restored after re-init and timed out into ExtensionMode.")
+
+    # 6. A restore in the middle of LinearCheck keeps the min-travel variance accumulators.
+    ext.extension_check_complete()
+    ext.rotation_check_complete()
+    for reading in (10.0, 10.1, 9.9):
+        ext.update_motor_travel(np.full(ext.BOX_COUNT, reading))
+    expected = (ext.motor_variance.samples, ext.motor_variance.mean.copy(), ext.motor_variance.m2.copy())
+    ext.save_snapshot()
+    ext = reinit(ext)
+    restored = ext.motor_variance
+    assert ext.state == 'LinearCheck', f"6.1 FAILED: restored state {ext.state}"
+    assert restored.samples == expected[0], f"6.2 FAILED: restored {restored.samples} samples, expected {expected[0]}"
+    assert np.array_equal(restored.mean, expected[1]) and np.array_equal(restored.m2, expected[2]), \
+        "6.3 FAILED: restored mean/m2 differ"
+    print(f"SUCCESS: LinearCheck restored with its {restored.samples} variance samples.")
+
+    # 7. Dropping a state's timeout changes the snapshot key; if a matching snapshot still names
+    #    a state that is no longer timed, the restore drops its timer instead of raising.
+    untimed = {state: spec for state, spec in STATE_TIMEOUTS.items() if state != 'WarmUpCycle'}
+    edited = types.SimpleNamespace(table=MACHINE_SPEC.table, timeouts=untimed)
+    assert snapshot_spec_key(edited) != SPEC_KEY, "7.1 FAILED: snapshot key ignores the state timeouts"
+    ext = td_stubs.create_extension(compiled)
+    ext.power_on()
+    extension_module.STATE_TIMEOUTS = untimed
+    try:
+        ext = reinit(ext)
+    finally:
+        extension_module.STATE_TIMEOUTS = STATE_TIMEOUTS
+    assert ext.state == 'WarmUpCycle' and ext.state_timer is None, \
+        f"7.2 FAILED: restored {ext.state} with timer {ext.state_timer}"
+    print("SUCCESS: Timeouts are part of the snapshot key; an untimed state restores without a timer.")
+
+
+if __name__ == '__main__':
+    print("==========================================================")
+    print("= Starting Snapshot / Restore Test Suite                 =")
+    print("==========================================================")
+    for compiled in (False, True):
+        run_snapshot_tests(compiled)
+    print("\n==========================================================")
+    print("= ALL SNAPSHOT TESTS COMPLETED SUCCESSFULLY!             =")
+    print("==========================================================")
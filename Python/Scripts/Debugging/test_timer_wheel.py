@@ -0,0 +1,118 @@
+# test_timer_wheel.py
+# Automated checks for TimerWheel expiry: timers fire on their deadline frame (also
+# past one ring revolution and when several frames elapse at once), cancelled timers
+# never fire, and StateExtension's timed states expire and cancel on exit (both engines).
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, '..', 'Benchmarks')))
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+from StateExtension import STATE_TIMEOUTS
+from TimerWheel import TimerWheel
+
+
+def test_expiry():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    timer = wheel.schedule(3, fired.append, 'a')
+    assert wheel.advance(2) == 0 and not fired and wheel.remaining(timer) == 1, "1.1 FAILED: fired early"
+    assert wheel.advance(3) == 1 and fired == ['a'], f"1.2 FAILED: not fired on its deadline: {fired}"
+    assert wheel.armed == 0 and wheel.remaining(timer) is None, "1.3 FAILED: fired timer still armed"
+
+    wheel.schedule(0, fired.append, 'minimum')
+    wheel.advance(4)
+    assert fired[-1] == 'minimum', "1.4 FAILED: zero delay did not fire on the next frame"
+    print("SUCCESS: Timers fire on their deadline frame, not before.")
+
+
+def test_wraparound_and_catch_up():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    wheel.schedule(20, fired.append, 'late')    # same slot as frames 4 and 12
+    wheel.schedule(4, fired.append, 'early')
+    wheel.advance(12)
+    assert fired == ['early'], f"2.1 FAILED: a timer fired a revolution early: {fired}"
+    wheel.advance(19)
+    assert fired == ['early'], f"2.2 FAILED: {fired}"
+    wheel.advance(20)
+    assert fired == ['early', 'late'], f"2.3 FAILED: wrapped timer did not fire at frame 20: {fired}"
+
+    # Several frames elapsing in one advance() fire every timer due in between, in deadline order.
+    for delay in (5, 2, 9):
+        wheel.schedule(delay, fired.append, delay)
+    assert wheel.advance(40) == 3 and fired[2:] == [2, 5, 9], f"2.4 FAILED: catch-up order {fired}"
+
+    # A callback can re-arm into the slot being visited.
+    ticks = []
+
+    def periodic():
+        ticks.append(wheel.frame)
+        if len(ticks) < 3:
+            wheel.schedule(8, periodic)
+
+    wheel.schedule(8, periodic)
+    wheel.advance(80)
+    assert ticks == [48, 56, 64], f"2.5 FAILED: periodic re-arm fired at {ticks}"
+    print("SUCCESS: Timers past one revolution and catch-up frames fire exactly once, in order.")
+
+
+def test_cancel():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    keep = wheel.schedule(5, fired.append, 'keep')
+    drop = wheel.schedule(5, fired.append, 'drop')
+    wheel.cancel(drop)
+    wheel.cancel(drop)
+    wheel.cancel(None)
+    assert wheel.armed == 1, f"3.1 FAILED: armed count {wheel.armed} after cancels"
+    wheel.advance(10)
+    assert fired == ['keep'] and wheel.armed == 0, f"3.2 FAILED: {fired}, armed {wheel.armed}"
+    wheel.cancel(keep)
+    assert wheel.armed == 0, "3.3 FAILED: cancelling a fired timer changed the armed count"
+    print("SUCCESS: Cancelled timers never fire and the armed count stays exact.")
+
+
+def test_extension_timeouts(compiled):
+    engine = 'compiled' if compiled else 'machine'
+    ext = td_stubs.create_extension(compiled)
+    frames = round(STATE_TIMEOUTS['WarmUpCycle']['timeout'] * stubs.project.cookRate)
+
+    ext.power_on()
+    stubs.clock.tick(frames - 1)
+    ext.process_frame()
+    assert ext.state == 'WarmUpCycle', f"4.1 FAILED ({engine}): WarmUpCycle expired early, now {ext.state}"
+    stubs.clock.tick()
+    ext.process_frame()
+    assert ext.state == 'ExtensionMode', f"4.2 FAILED ({engine}): WarmUpCycle did not expire, still {ext.state}"
+
+    # Leaving a timed state cancels its timer: past ExtensionMode's deadline (but before
+    # RotationCheck's own) the machine is still in RotationCheck.
+    extension_frames = round(STATE_TIMEOUTS['ExtensionMode']['timeout'] * stubs.project.cookRate)
+    stubs.clock.tick(extension_frames // 2)
+    ext.process_frame()
+    ext.extension_check_complete()
+    stubs.clock.tick(extension_frames - extension_frames // 2)
+    ext.process_frame()
+    assert ext.state == 'RotationCheck', f"4.3 FAILED ({engine}): ExtensionMode timer fired after exit: {ext.state}"
+    assert ext.timer_wheel.armed == 1, f"4.4 FAILED ({engine}): {ext.timer_wheel.armed} timers armed"
+    print(f"SUCCESS: Timed states expire on their frame and cancel on exit ({engine} engine).")
+
+
+if __name__ == '__main__':
+    print("==========================================================")
+    print("= Starting Timer Wheel Test Suite                        =")
+    print("==========================================================")
+    test_expiry()
+    test_wraparound_and_catch_up()
+    test_cancel()
+    for compiled in (False, True):
+        test_extension_timeouts(compiled)
+    print("\n==========================================================")
+    print("= ALL TIMER WHEEL TESTS COMPLETED SUCCESSFULLY!          =")
+    print("==========================================================")
@@ -0,0 +1,120 @@
+# test_trigger_queue.py
+# Automated checks for TriggerQueue: coalescing of idempotent triggers, dispatch order
+# within and across frames, the frame budget (each deferred trigger counted once),
+# capacity and rejected triggers, plus queued dispatch through StateExtension.
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, '..', 'Benchmarks')))
+
+import td_stubs
+
+stubs = td_stubs.install()
+
+from transitions.core import MachineError
+from TriggerQueue import TriggerQueue
+
+
+class Recorder:
+    """dispatch() stand-in that records calls and rejects 'invalid'."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, trigger, *args, **kwargs):
+        if trigger == 'invalid':
+            raise MachineError("invalid trigger")
+        self.calls.append((trigger, args, kwargs))
+
+
+def test_coalescing():
+    queue = TriggerQueue(idempotent=('start_interaction',))
+    assert queue.push('start_interaction') is True, "1.1 FAILED: first push not queued"
+    assert queue.push('start_interaction') is False and queue.push('start_interaction') is False, \
+        "1.2 FAILED: pending idempotent trigger queued again"
+    assert queue.push('start_interaction', box_id=3) is True, "1.3 FAILED: different arguments were coalesced"
+    assert queue.push('power_on') and queue.push('power_on'), "1.4 FAILED: non-idempotent trigger coalesced"
+    assert (len(queue), queue.queued, queue.coalesced) == (4, 4, 2), f"1.5 FAILED: {queue.stats()}"
+
+    recorder = Recorder()
+    queue.drain(1, recorder)
+    assert queue.push('start_interaction') is True, "1.6 FAILED: trigger still coalesced after it was dispatched"
+    print("SUCCESS: Idempotent triggers coalesce only while an identical one is pending.")
+
+
+def test_dispatch_order():
+    queue = TriggerQueue()
+    recorder = Recorder()
+    for trigger in ('power_on', 'warmup_complete', 'extension_check_complete'):
+        queue.push(trigger)
+    queue.push('linear_check_failure', box_id=4)
+    assert queue.drain(1, recorder) == 4, "2.1 FAILED: not every trigger dispatched within the budget"
+    assert [call[0] for call in recorder.calls] == ['power_on', 'warmup_complete', 'extension_check_complete',
+                                                     'linear_check_failure'], f"2.2 FAILED: order {recorder.calls}"
+    assert recorder.calls[-1][2] == {'box_id': 4}, "2.3 FAILED: keyword arguments not passed through"
+    queue.push('power_on')
+    assert queue.drain(1, recorder) == 0 and len(queue) == 1, "2.4 FAILED: second drain in the same frame did work"
+    print("SUCCESS: Triggers dispatch in push order, with their arguments, once per frame.")
+
+
+def test_budget_and_deferred():
+    # A zero budget dispatches exactly one trigger per frame.
+    queue = TriggerQueue(budget_us=0)
+    recorder = Recorder()
+    for index in range(3):
+        queue.push('step', index)
+    assert queue.drain(1, recorder) == 1 and queue.deferred == 2, f"3.1 FAILED: {queue.stats()}"
+    assert queue.drain(2, recorder) == 1 and queue.deferred == 2, \
+        f"3.2 FAILED: a trigger was counted as deferred again: {queue.stats()}"
+    queue.push('step', 3)
+    assert queue.drain(3, recorder) == 1 and queue.deferred == 3, f"3.3 FAILED: {queue.stats()}"
+    assert queue.drain(4, recorder) == 1 and queue.deferred == 3 and len(queue) == 0, f"3.4 FAILED: {queue.stats()}"
+    assert [call[1][0] for call in recorder.calls] == [0, 1, 2, 3], f"3.5 FAILED: order {recorder.calls}"
+
+    queue.push('step', 4)
+    queue.push('step', 5)
+    queue.clear()
+    queue.push('step', 6)
+    queue.push('step', 7)
+    queue.drain(5, recorder)
+    assert queue.deferred == 4, f"3.6 FAILED: clear() left stale deferred bookkeeping: {queue.stats()}"
+    print("SUCCESS: Budget defers the tail in order; each deferred trigger is counted once.")
+
+
+def test_capacity_and_rejects():
+    queue = TriggerQueue(capacity=2)
+    recorder = Recorder()
+    assert queue.push('invalid') and queue.push('power_on'), "4.1 FAILED: push into a free slot failed"
+    assert queue.push('power_on') is False and queue.dropped == 1, f"4.2 FAILED: {queue.stats()}"
+    assert queue.drain(1, recorder) == 2, "4.3 FAILED: drain stopped at the rejected trigger"
+    assert (queue.rejected, queue.dispatched) == (1, 1), f"4.4 FAILED: {queue.stats()}"
+    print("SUCCESS: Full buffer drops, invalid triggers are counted as rejected.")
+
+
+def test_extension_dispatch(compiled):
+    engine = 'compiled' if compiled else 'machine'
+    ext = td_stubs.create_extension(compiled)
+    ext.queue_trigger('power_on')
+    ext.queue_trigger('warmup_complete')
+    assert ext.state == 'Attract', f"5.1 FAILED ({engine}): queued trigger fired synchronously"
+    stubs.clock.tick()
+    ext.process_frame()
+    assert ext.state == 'ExtensionMode', f"5.2 FAILED ({engine}): expected ExtensionMode, got {ext.state}"
+    print(f"SUCCESS: Queued triggers fired in order on the next frame ({engine} engine).")
+
+
+if __name__ == '__main__':
+    print("==========================================================")
+    print("= Starting Trigger Queue Test Suite                      =")
+    print("==========================================================")
+    test_coalescing()
+    test_dispatch_order()
+    test_budget_and_deferred()
+    test_capacity_and_rejects()
+    for compiled in (False, True):
+        test_extension_dispatch(compiled)
+    print("\n==========================================================")
+    print("= ALL TRIGGER QUEUE TESTS COMPLETED SUCCESSFULLY!        =")
+    print("==========================================================")
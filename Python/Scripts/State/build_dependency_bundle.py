@@ -0,0 +1,148 @@
+# build_dependency_bundle.py
+# Run OUTSIDE TouchDesigner, with the same Python minor version TD ships (3.11):
+#
+#     python Python/Scripts/State/build_dependency_bundle.py
+#
+# Packs the pinned requirements (requirements.txt) and everything they require into
+# a bytecode-only zip that start_state_machine.onStart puts on sys.path instead of
+# the whole .venv site-packages folder. The zip holds only those packages' modules, compiled
+# to unchecked-hash .pyc (no source stat, no timestamps) and written in sorted
+# order with fixed zip dates, so the same requirements always give the same bytes.
+
+import argparse
+import hashlib
+import importlib.metadata
+import os
+import py_compile
+import re
+import sys
+import tempfile
+import zipfile
+
+try:
+    from packaging.markers import Marker
+except ImportError:
+    Marker = None
+
+# Folded into the bundle name. Defined in the startup DAT, which is cheap to import here,
+# whereas importing this module during TouchDesigner startup would cost ~130 ms.
+from start_state_machine import BUNDLE_LAYOUT
+
+PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+REQUIREMENTS_FILE = os.path.join(PROJECT_ROOT, 'requirements.txt')
+BUNDLE_DIR = os.path.join(PROJECT_ROOT, 'Bundle')
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def bundle_name(requirements_path=REQUIREMENTS_FILE, cache_tag=None):
+    """
+    'deps-<cache_tag>-<layout + requirements hash>.zip'. start_state_machine.onStart
+    derives the same name, so a changed pin or a different Python simply finds no bundle.
+    """
+    with open(requirements_path, 'rb') as handle:
+        digest = hashlib.sha1(b'%d:' % BUNDLE_LAYOUT + handle.read()).hexdigest()[:10]
+    return f"deps-{cache_tag or sys.implementation.cache_tag}-{digest}.zip"
+
+
+def read_pins(requirements_path=REQUIREMENTS_FILE):
+    """[(name, version)] for every 'name==version' line; anything else is rejected."""
+    pins = []
+    with open(requirements_path) as handle:
+        for line in handle:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            name, sep, version = line.partition('==')
+            if not sep:
+                raise ValueError(f"Unpinned requirement '{line}': the bundle needs exact '==' pins")
+            pins.append((name.strip(), version.strip()))
+    return pins
+
+
+def resolve_requirements(pins):
+    """
+    [(name, version)] for the pins plus every distribution they require,
+    recursively (e.g. transitions -> six). Transitive requirements are bundled at
+    their installed version (None); extras and requirements whose environment
+    marker does not match this interpreter are skipped.
+    """
+    resolved = {_canonical(name): (name, version) for name, version in pins}
+    pending = [name for name, _ in pins]
+    while pending:
+        for requirement in importlib.metadata.requires(pending.pop(0)) or ():
+            spec, _, marker = requirement.partition(';')
+            marker = marker.strip()
+            if 'extra' in marker or (marker and Marker is not None and not Marker(marker).evaluate()):
+                continue
+            name = re.match(r'[A-Za-z0-9._-]+', spec.strip()).group(0)
+            if _canonical(name) not in resolved:
+                resolved[_canonical(name)] = (name, None)
+                pending.append(name)
+    return list(resolved.values())
+
+
+def _canonical(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def module_files(name, version=None):
+    """(absolute path, archive path) of every .py module the installed distribution ships."""
+    dist = importlib.metadata.distribution(name)
+    if version is not None and dist.version != version:
+        raise RuntimeError(f"{name} {dist.version} is installed but requirements.txt pins {version}")
+    files = []
+    for entry in dist.files or ():
+        path = entry.as_posix()
+        if not path.endswith('.py') or path.startswith('..') or '.dist-info/' in path:
+            continue
+        files.append((str(entry.locate()), path[:-3] + '.pyc'))
+    if not files:
+        raise RuntimeError(f"{name} has no pure-Python modules to bundle")
+    return sorted(files, key=lambda item: item[1])
+
+
+def build_bundle(requirements_path=REQUIREMENTS_FILE, out_dir=BUNDLE_DIR):
+    """Writes the bundle into 'out_dir' and returns its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    target = os.path.join(out_dir, bundle_name(requirements_path))
+    entries = []
+    for name, version in resolve_requirements(read_pins(requirements_path)):
+        entries.extend(module_files(name, version))
+
+    with tempfile.TemporaryDirectory() as scratch:
+        partial = target + '.tmp'
+        with zipfile.ZipFile(partial, 'w', zipfile.ZIP_DEFLATED) as bundle:
+            for index, (source, arcname) in enumerate(entries):
+                compiled = os.path.join(scratch, f'{index}.pyc')
+                py_compile.compile(source, cfile=compiled, dfile=arcname, doraise=True,
+                                   invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+                info = zipfile.ZipInfo(arcname, date_time=ZIP_DATE)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(compiled, 'rb') as handle:
+                    bundle.writestr(info, handle.read())
+        os.replace(partial, target)
+
+    # Older bundles for other pins / Python versions are never picked up again.
+    for stale in os.listdir(out_dir):
+        if stale.startswith('deps-') and stale.endswith('.zip') and stale != os.path.basename(target):
+            os.remove(os.path.join(out_dir, stale))
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the bytecode-only dependency bundle for TD startup.")
+    parser.add_argument('--requirements', default=REQUIREMENTS_FILE)
+    parser.add_argument('--out-dir', default=BUNDLE_DIR)
+    args = parser.parse_args()
+
+    target = build_bundle(args.requirements, args.out_dir)
+    with zipfile.ZipFile(target) as bundle:
+        count = len(bundle.namelist())
+    with open(target, 'rb') as handle:
+        digest = hashlib.sha1(handle.read()).hexdigest()
+    print(f"Bundle: {target}")
+    print(f"  {count} modules, {os.path.getsize(target):,} bytes, sha1 {digest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# generate_mermaid_diagram.py
+# Run OUTSIDE TouchDesigner after editing the machine spec:
+#
+#     python Python/Scripts/State/generate_mermaid_diagram.py
+#     python Python/Scripts/State/generate_mermaid_diagram.py --check   # exit 1 if out of date
+#
+# Regenerates MermaidDiagram.md from Python/Spec/maestro_fsm.json (the definition
+# StateExtension and test_fsm_init load), so the diagram cannot drift from the
+# machine that actually runs. Sections become '%%' comments, 'label' is appended
+# to the trigger name and section notes become 'note right of' blocks.
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+DIAGRAM_FILE = os.path.join(PROJECT_ROOT, 'MermaidDiagram.md')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'Python', 'Extensions'))
+
+from MachineSpec import SPEC_FILE, load_machine_spec
+
+
+def render_mermaid(definition):
+    """stateDiagram-v2 markdown for a MachineDefinition."""
+    spec_file = SPEC_FILE.replace(os.sep, '/')
+    lines = ['```mermaid', 'stateDiagram-v2', '    direction LR', '',
+             f"    %% Generated from {spec_file} by generate_mermaid_diagram.py - edit the spec, not this file.",
+             '',
+             '    %% Define States']
+    lines += [f"    state {state}" for state in definition.states]
+    lines += ['', '    %% Initial State', f"    [*] --> {definition.initial}"]
+
+    for number, section in enumerate(definition.sections, 1):
+        lines += ['', f"    %% {number}. {section['title']}"]
+        for transition in section['transitions']:
+            source = transition['source']
+            sources = definition.states if source == '*' else [source] if isinstance(source, str) else source
+            label = f" {transition['label']}" if transition.get('label') else ''
+            lines += [f"    {state} --> {transition['dest']} : {transition['trigger']}{label}" for state in sources]
+        for state, note in section['notes'].items():
+            lines += [f"    note right of {state}"] + [f"        {line}" for line in note] + ['    end note']
+
+    timed = [f"{state} {spec['timeout']:g}s -> {spec['on_timeout']}" for state, spec in definition.timeouts.items()]
+    if timed:
+        lines += ['', f"    %% Timed states: {', '.join(timed)}"]
+    lines.append('```')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate MermaidDiagram.md from the machine spec.")
+    parser.add_argument('--spec', default=None, help="Spec file (default: the project's maestro_fsm.json)")
+    parser.add_argument('--out', default=DIAGRAM_FILE)
+    parser.add_argument('--check', action='store_true', help="Only report whether the diagram is up to date.")
+    args = parser.parse_args()
+
+    definition = load_machine_spec(args.spec)
+    diagram = render_mermaid(definition)
+    current = None
+    if os.path.isfile(args.out):
+        with open(args.out, encoding='utf-8') as handle:
+            current = handle.read()
+
+    if args.check:
+        if current != diagram:
+            print(f"FAIL: {args.out} is out of date with {definition.path}; run generate_mermaid_diagram.py.")
+            return 1
+        print(f"OK: {args.out} matches spec {definition.key[:12]}.")
+        return 0
+
+    with open(args.out, 'w', encoding='utf-8', newline='\n') as handle:
+        handle.write(diagram)
+    print(f"Diagram: {args.out}")
+    print(f"  {len(definition.states)} states, {len(definition.transitions)} transitions, spec {definition.key[:12]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,9 @@
 # DAT: /project1/start_state_machine (Execute DAT set to fire onStart)
 # ==============================================================================
 # DAT: /project1/start_state_machine (Execute DAT set to fire onStart)
-# PURPOSE: Dynamically calculate and prepend the Virtual Environment path to sys.path
-# to allow TouchDesigner to find external packages (e.g., 'pytransitions').
+# PURPOSE: Dynamically calculate and prepend the dependency bundle (or Virtual Environment)
+# path to sys.path to allow TouchDesigner to find external packages (e.g., 'pytransitions'),
+# and record how long each startup phase takes.
 # ==============================================================================
 # me - this DAT
 #
@@ -12,40 +13,94 @@
 #
 # Make sure the corresponding toggle is enabled in the Execute DAT.
 
+# 'bundle' loads the pinned dependencies from the bytecode-only zip built by
+# build_dependency_bundle.py (one narrow sys.path entry); 'venv' prepends the whole
+# .venv site-packages folder. 'bundle' falls back to 'venv' if no matching zip exists.
+STARTUP_MODE = 'bundle'
+BUNDLE_DIR = 'Bundle'
+# Folded into the bundle name: bump when the bundle contents change for the same pins, so
+# older zips are no longer picked up. build_dependency_bundle.py imports it from here.
+BUNDLE_LAYOUT = 2
+STATE_COMP = '/project1/State'
+STARTUP_PROFILE_KEY = 'startup_profile'  # read back by StateExtension.onInitTD
+
+
+def bundle_path(project_root_dir):
+    """Same naming as build_dependency_bundle.bundle_name: Python cache tag + layout/requirements hash."""
+    import hashlib
+    import os
+    import sys
+
+    with open(os.path.join(project_root_dir, 'requirements.txt'), 'rb') as handle:
+        digest = hashlib.sha1(b'%d:' % BUNDLE_LAYOUT + handle.read()).hexdigest()[:10]
+    return os.path.join(project_root_dir, BUNDLE_DIR, f"deps-{sys.implementation.cache_tag}-{digest}.zip")
+
+
 def onStart():
     # We rely on sys and os modules, which are part of the standard Python environment
     # available in TouchDesigner [6, 7].
     import sys
     import os
+    import time
 
     # Debug statements are crucial for confirming execution during TD startup [8].
     debug("--- TD Startup Sequence: Executing external path setup (onStart) ---")
+    profile = {'mode': STARTUP_MODE}
+    phase_start = time.perf_counter()
 
     # 1. Determine the project root directory.
     # 'project.folder' returns the absolute path of the directory containing the saved .toe file.
-    # We assume the .venv folder is located here [4, 5].
+    # We assume the .venv folder (or the Bundle folder) is located here [4, 5].
     try:
         project_root_dir = project.folder
 
-        # Define the relative path to site-packages within the standard venv structure.
-        # Use os.path.join for cross-platform compatibility.
-        relative_venv_path = os.path.join(".venv", "Lib", "site-packages")
+        mypath = None
+        if STARTUP_MODE == 'bundle':
+            candidate = bundle_path(project_root_dir)
+            if os.path.isfile(candidate):
+                mypath = candidate
+            else:
+                debug(f"WARNING: No dependency bundle for this Python/requirements.txt ({candidate}); "
+                      f"falling back to the venv. Run build_dependency_bundle.py to create it.")
+                profile['mode'] = 'venv'
+
+        if mypath is None:
+            # Define the relative path to site-packages within the standard venv structure.
+            # Use os.path.join for cross-platform compatibility.
+            relative_venv_path = os.path.join(".venv", "Lib", "site-packages")
 
-        # Construct the full, soft-coded path
-        mypath = os.path.join(project_root_dir, relative_venv_path)
+            # Construct the full, soft-coded path
+            mypath = os.path.join(project_root_dir, relative_venv_path)
 
         # 2. Check if the path exists and add it if necessary
         # Prepending ensures your custom packages have priority over TouchDesigner's built-in ones [9, 10].
         if mypath not in sys.path:
             sys.path = [mypath] + sys.path
-            debug(f"SUCCESS: Virtual Env path added to sys.path. Path: {mypath}")
+            debug(f"SUCCESS: Dependency path added to sys.path. Path: {mypath}")
         else:
-            debug(f"INFO: Virtual Env path already exists in sys.path. Path: {mypath}")
+            debug(f"INFO: Dependency path already exists in sys.path. Path: {mypath}")
 
     except Exception as e:
-        debug(f"ERROR calculating V-Env path: {e}")
+        debug(f"ERROR calculating dependency path: {e}")
 
-    debug("--- TD Startup Sequence: Path setup complete ---")
+    profile['path_setup_ms'] = (time.perf_counter() - phase_start) * 1000.0
+
+    # 3. Import the pinned dependency here so its cost is measured on its own;
+    # the extension's own 'from transitions import Machine' is then a cache hit.
+    phase_start = time.perf_counter()
+    try:
+        import transitions
+        profile['dependency_origin'] = transitions.__file__
+    except Exception as e:
+        debug(f"ERROR importing transitions: {e}")
+    profile['dependency_import_ms'] = (time.perf_counter() - phase_start) * 1000.0
+
+    state_comp = op(STATE_COMP)
+    if state_comp is not None:
+        state_comp.store(STARTUP_PROFILE_KEY, profile)
+
+    debug(f"--- TD Startup Sequence: Path setup complete ({profile['mode']}, "
+          f"path {profile['path_setup_ms']:.2f} ms, import {profile['dependency_import_ms']:.2f} ms) ---")
 
     # NOTE: TouchDesigner's extension loader will proceed automatically with loading
     # extensions (like StateExtension) now that the path is correctly set [11].
@@ -56,6 +111,14 @@ def onCreate():
     # If the Execute DAT is created dynamically, you may want to re-run setup here
     return
 
+def onFrameStart(frame):
+    # Drain the StateExtension trigger queue once per frame (Frame Start toggle must be enabled).
+    # The extension keys the drain off absTime.frame, so extra calls in the same frame are no-ops.
+    state_comp = op('/project1/State')
+    if state_comp is not None and hasattr(state_comp.ext, 'StateExtension'):
+        state_comp.ext.StateExtension.process_frame()
+    return
+
 '''
 
 Expect on TD Startup: